@@ -0,0 +1,218 @@
+"""Agregasi transaksi di atas TransactionColumns (app/columns.py).
+
+Jika NumPy tersedia, kolom disalin sekali ke array NumPy dan agregasi
+berjalan sebagai masked sum dan `bincount` (per kategori / per phone),
+sehingga window per user maupun semua user sekaligus tidak memerlukan
+loop Python per baris. Tanpa NumPy dipakai loop Python biasa dengan hasil
+yang sama.
+
+Salinan NumPy di-memo per instance TransactionColumns; jika instance yang
+sama bertambah baris (tail read), hanya baris barunya yang disalin.
+ColumnsOverlay (baris yang belum di-flush) dihitung per bagian lalu
+digabung: bagian pending yang kecil memakai loop Python supaya memo
+NumPy milik kolom bersama tidak tergeser.
+Catatan: bincount menjumlahkan dalam float64, exact sampai 2^53 (jauh di
+atas total rupiah yang realistis); hasil dibulatkan kembali ke int.
+"""
+
+import functools
+import threading
+
+from app.columns import TYPE_EXPENSE, TYPE_INCOME
+
+try:
+    import numpy as np
+except ImportError:  # NumPy opsional, fallback ke loop Python
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+_COLUMN_DTYPES = {
+    "ts": "int64",
+    "phone": "uint32",
+    "category": "uint32",
+    "type": "int8",
+    "amount": "int64",
+}
+_VECTOR_MEMO = {"columns": None, "length": 0, "arrays": None}
+_VECTOR_LOCK = threading.Lock()
+
+
+def _copy_column(column, dtype: str):
+    # tobytes() menyalin data; np.frombuffer langsung di array.array akan
+    # mengunci buffer sehingga kolom tidak bisa di-extend lagi
+    return np.frombuffer(column.tobytes(), dtype=dtype)
+
+
+def vectors(columns) -> dict:
+    """Kolom sebagai array NumPy {nama: ndarray}, di-memo per instance."""
+    with _VECTOR_LOCK:
+        memo = _VECTOR_MEMO
+        n = len(columns)
+        if memo["columns"] is columns and memo["length"] == n:
+            return memo["arrays"]
+        if memo["columns"] is columns and memo["length"] < n:
+            start = memo["length"]
+            arrays = {
+                name: np.concatenate([memo["arrays"][name], _copy_column(getattr(columns, name)[start:n], dtype)])
+                for name, dtype in _COLUMN_DTYPES.items()
+            }
+        else:
+            arrays = {name: _copy_column(getattr(columns, name)[:n], dtype) for name, dtype in _COLUMN_DTYPES.items()}
+        memo.update(columns=columns, length=n, arrays=arrays)
+        return arrays
+
+
+def _window(columns, start_ts: int, end_ts, phone, tx_type=None) -> dict:
+    """Array NumPy baris dalam window (dan milik phone jika diisi).
+
+    Untuk satu phone, baris diambil lewat posisi per user (gather), jadi
+    biayanya sebanding dengan jumlah transaksi user, bukan seluruh tab.
+    """
+    arrays = vectors(columns)
+    if phone is not None:
+        positions = columns.user_positions(phone)
+        index = np.frombuffer(positions.tobytes(), dtype="uint32")
+        index = index[index < len(arrays["ts"])]
+        arrays = {name: values[index] for name, values in arrays.items()}
+    mask = arrays["ts"] >= start_ts
+    if end_ts is not None:
+        mask &= arrays["ts"] < end_ts
+    if tx_type is not None:
+        mask &= arrays["type"] == tx_type
+    return {name: values[mask] for name, values in arrays.items()}
+
+
+def _merge(a, b):
+    """Gabungkan hasil agregasi dua bagian (int, tuple, atau dict berisi keduanya)."""
+    if isinstance(a, dict):
+        merged = dict(a)
+        for key, value in b.items():
+            merged[key] = _merge(merged[key], value) if key in merged else value
+        return merged
+    if isinstance(a, tuple):
+        return tuple(x + y for x, y in zip(a, b))
+    return a + b
+
+
+def _over_parts(fn):
+    """Jalankan agregasi per bagian columns.parts lalu gabungkan hasilnya."""
+    @functools.wraps(fn)
+    def wrapper(columns, *args, **kwargs):
+        base, *pending = columns.parts
+        result = fn(base, *args, **kwargs)
+        for part in pending:
+            result = _merge(result, fn(part, *args, vectorize=False, **kwargs))
+        return result
+    return wrapper
+
+
+def _positions(columns, phone: str):
+    """Posisi yang perlu discan: milik phone, atau semua baris jika phone None."""
+    return columns.user_positions(phone) if phone is not None else range(len(columns))
+
+
+@_over_parts
+def type_totals(columns, start_ts: int, end_ts: int = None, phone: str = None, vectorize: bool = True) -> tuple:
+    """Total (income, expense) dalam window [start_ts, end_ts), per phone atau semua user."""
+    if phone is not None and columns.phones.get(phone) is None:
+        return 0, 0
+    if vectorize and NUMPY_AVAILABLE:
+        rows = _window(columns, start_ts, end_ts, phone)
+        types, amounts = rows["type"], rows["amount"]
+        return int(amounts[types == TYPE_INCOME].sum()), int(amounts[types == TYPE_EXPENSE].sum())
+
+    ts, tx_type, amount = columns.ts, columns.type, columns.amount
+    income = expense = 0
+    for i in _positions(columns, phone):
+        if ts[i] < start_ts or (end_ts is not None and ts[i] >= end_ts):
+            continue
+        if tx_type[i] == TYPE_INCOME:
+            income += amount[i]
+        elif tx_type[i] == TYPE_EXPENSE:
+            expense += amount[i]
+    return income, expense
+
+
+@_over_parts
+def category_totals(columns, start_ts: int, end_ts: int = None, phone: str = None, tx_type: int = TYPE_EXPENSE,
+                    vectorize: bool = True) -> dict:
+    """Total per kategori {kategori: amount} untuk satu tipe transaksi dalam window."""
+    if phone is not None and columns.phones.get(phone) is None:
+        return {}
+    if vectorize and NUMPY_AVAILABLE:
+        rows = _window(columns, start_ts, end_ts, phone, tx_type)
+        categories = rows["category"]
+        if not len(categories):
+            return {}
+        sums = np.bincount(categories, weights=rows["amount"], minlength=len(columns.categories))
+        present = np.bincount(categories, minlength=len(columns.categories)).nonzero()[0]
+        return {columns.categories[int(c)]: int(round(sums[c])) for c in present}
+
+    ts, types, category, amount = columns.ts, columns.type, columns.category, columns.amount
+    totals = {}
+    for i in _positions(columns, phone):
+        if types[i] != tx_type or ts[i] < start_ts or (end_ts is not None and ts[i] >= end_ts):
+            continue
+        totals[category[i]] = totals.get(category[i], 0) + amount[i]
+    return {columns.categories[c]: total for c, total in totals.items()}
+
+
+@_over_parts
+def category_stats(columns, start_ts: int, end_ts: int = None, phone: str = None, tx_type: int = TYPE_EXPENSE,
+                   vectorize: bool = True) -> dict:
+    """Seperti category_totals, plus jumlah transaksi: {kategori: (total, count)}."""
+    if phone is not None and columns.phones.get(phone) is None:
+        return {}
+    if vectorize and NUMPY_AVAILABLE:
+        rows = _window(columns, start_ts, end_ts, phone, tx_type)
+        categories = rows["category"]
+        if not len(categories):
+            return {}
+        sums = np.bincount(categories, weights=rows["amount"], minlength=len(columns.categories))
+        counts = np.bincount(categories, minlength=len(columns.categories))
+        return {
+            columns.categories[int(c)]: (int(round(sums[c])), int(counts[c]))
+            for c in counts.nonzero()[0]
+        }
+
+    ts, types, category, amount = columns.ts, columns.type, columns.category, columns.amount
+    stats = {}
+    for i in _positions(columns, phone):
+        if types[i] != tx_type or ts[i] < start_ts or (end_ts is not None and ts[i] >= end_ts):
+            continue
+        total, count = stats.get(category[i], (0, 0))
+        stats[category[i]] = (total + amount[i], count + 1)
+    return {columns.categories[c]: value for c, value in stats.items()}
+
+
+@_over_parts
+def totals_by_user(columns, start_ts: int, end_ts: int = None, vectorize: bool = True) -> dict:
+    """Total (income, expense) semua user sekaligus: {phone: (income, expense)}.
+
+    Hanya phone yang punya transaksi di window yang muncul.
+    """
+    if vectorize and NUMPY_AVAILABLE:
+        rows = _window(columns, start_ts, end_ts, None)
+        phones, types, amounts = rows["phone"], rows["type"], rows["amount"]
+        size = len(columns.phones)
+        income = np.bincount(phones, weights=np.where(types == TYPE_INCOME, amounts, 0), minlength=size)
+        expense = np.bincount(phones, weights=np.where(types == TYPE_EXPENSE, amounts, 0), minlength=size)
+        present = np.bincount(phones, minlength=size).nonzero()[0]
+        return {
+            columns.phones[int(p)]: (int(round(income[p])), int(round(expense[p])))
+            for p in present
+        }
+
+    ts, phone, tx_type, amount = columns.ts, columns.phone, columns.type, columns.amount
+    totals = {}
+    for i in range(len(columns)):
+        if ts[i] < start_ts or (end_ts is not None and ts[i] >= end_ts):
+            continue
+        income, expense = totals.get(phone[i], (0, 0))
+        if tx_type[i] == TYPE_INCOME:
+            income += amount[i]
+        elif tx_type[i] == TYPE_EXPENSE:
+            expense += amount[i]
+        totals[phone[i]] = (income, expense)
+    return {columns.phones[p]: value for p, value in totals.items()}
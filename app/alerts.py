@@ -0,0 +1,179 @@
+"""Alert engine budget kategori dan daily target berbasis threshold crossing.
+
+Sebelumnya setiap transaksi expense menghitung ulang total hari ini dari
+nol (check_budgets_exceeded / check_daily_target_exceeded), dan setelah
+budget terlampaui setiap transaksi berikutnya di hari itu mengirim alert
+yang sama lagi.
+
+AlertEngine menyimpan state per (phone, hari):
+
+    {"budget:<kategori>": {"total": int, "limit": int, "level": int},
+     "daily": {...}}
+
+- total: running total pengeluaran hari ini untuk scope tersebut
+- level: threshold tertinggi (persen limit, ALERT_THRESHOLDS) yang sudah
+  dikirim; alert hanya dikirim saat total melewati threshold baru
+
+Per transaksi biayanya O(1): lookup limit lewat index settings dan satu
+read-modify-write state. Total hari ini hanya dihitung (dari kolom
+transaksi) saat state scope belum ada, misalnya setelah restart atau saat
+limit diubah; threshold yang sudah terlewati sebelum transaksi ini
+dianggap sudah dikirim.
+
+State disimpan di ALERT_STATE (TTLCache) atau di SharedStore jika
+multi-worker, sama seperti app/ratelimit.py.
+"""
+
+import threading
+from datetime import datetime
+
+from app.config import ALERT_THRESHOLDS
+from app.state import ALERT_STATE, ALERT_STATE_TTL
+from app.shared_state import SHARED_STORE
+from app.metrics import ERRORS_SWALLOWED
+from app.sheets import budget_limits, spending_limits, today_expense_by_category
+
+BUDGET = "budget"
+DAILY = "daily"
+
+
+def crossed_level(total: int, limit: int, thresholds=ALERT_THRESHOLDS) -> int:
+    """Threshold tertinggi (persen) yang sudah dicapai total, 0 jika belum ada."""
+    level = 0
+    for threshold in thresholds:
+        if total * 100 >= threshold * limit:
+            level = threshold
+    return level
+
+
+def _day_key(phone: str, day: str) -> str:
+    return f"{phone}:{day}"
+
+
+class AlertEngine:
+    """Running total per (phone, scope, hari) dan deteksi threshold crossing."""
+
+    def __init__(self, thresholds=ALERT_THRESHOLDS, store=SHARED_STORE, cache=ALERT_STATE):
+        self.thresholds = tuple(thresholds)
+        self.store = store
+        self.cache = cache
+        # TTLCache hanya aman per operasi; read-modify-write state satu
+        # (phone, hari) harus atomic seperti SharedStore.update
+        self._lock = threading.Lock()
+
+    def _load(self, key: str) -> dict:
+        if self.store is not None:
+            return self.store.get(f"alerts:{key}") or {}
+        return self.cache.get(key) or {}
+
+    def _update(self, key: str, fn) -> dict:
+        if self.store is not None:
+            return self.store.update(f"alerts:{key}", fn, ttl=ALERT_STATE_TTL)
+        with self._lock:
+            state = fn(self.cache.get(key))
+            self.cache.set(key, state)
+        return state
+
+    def evaluate(self, phone: str, expenses: dict, day: str = None) -> list:
+        """Tambahkan pengeluaran baru ke running total dan kembalikan alert yang baru terlewati.
+
+        Dipanggil setelah transaksi disimpan, hanya dengan transaksi yang
+        benar-benar baru dicatat. Total hari ini (sheet + baris buffer
+        batch ini, sudah termasuk `expenses`) hanya dipakai untuk seed.
+
+        Args:
+            phone (str): Nomor WhatsApp user
+            expenses (dict): Pengeluaran baru {kategori: amount}
+            day (str): Tanggal UTC ISO (default hari ini)
+
+        Returns:
+            list: Alert dict {"scope", "category", "threshold", "limit", "total"},
+                  urut budget per kategori lalu daily target
+        """
+        day = day or datetime.utcnow().date().isoformat()
+        budgets = budget_limits(phone)
+        added = {}
+        labels = {}
+        for category, amount in expenses.items():
+            key = category.lower()
+            if budgets.get(key):
+                scope = f"{BUDGET}:{key}"
+                added[scope] = (added.get(scope, (0, 0))[0] + amount, budgets[key])
+                labels.setdefault(scope, category)
+        daily_target = spending_limits(phone).get(DAILY)
+        if daily_target:
+            added[DAILY] = (sum(expenses.values()), daily_target)
+        if not added:
+            return []
+
+        key = _day_key(phone, day)
+        current = self._load(key)
+        seeds = {}
+        if any(scope not in current or current[scope]["limit"] != limit for scope, (_, limit) in added.items()):
+            spent = today_expense_by_category(phone)
+            seeds = {scope: spent.get(scope.split(":", 1)[1], 0) for scope in added if scope != DAILY}
+            seeds[DAILY] = sum(spent.values())
+
+        fired = []
+
+        def step(state):
+            # fn bisa dipanggil ulang oleh store; hasil hanya dari panggilan terakhir
+            state = dict(state or {})
+            fired.clear()
+            for scope, (amount, limit) in added.items():
+                entry = state.get(scope)
+                if entry is None or entry["limit"] != limit:
+                    # Seed sudah termasuk transaksi ini (baris buffer ikut
+                    # terbaca), jadi total sebelum transaksi = seed - amount
+                    previous = max(seeds.get(scope, amount) - amount, 0)
+                    entry = {"total": previous, "limit": limit,
+                             "level": crossed_level(previous, limit, self.thresholds)}
+                total = entry["total"] + amount
+                level = crossed_level(total, limit, self.thresholds)
+                if level > entry["level"]:
+                    fired.append(scope)
+                state[scope] = {"total": total, "limit": limit, "level": max(level, entry["level"])}
+            return state
+
+        state = self._update(key, step)
+        alerts = []
+        for scope in fired:
+            entry = state[scope]
+            alerts.append({
+                "scope": DAILY if scope == DAILY else BUDGET,
+                "category": labels.get(scope),
+                "threshold": entry["level"],
+                "limit": entry["limit"],
+                "total": entry["total"],
+            })
+        return alerts
+
+    def forget(self, phone: str, day: str = None):
+        """Buang state hari ini untuk phone (misal setelah /undo); di-seed ulang saat transaksi berikutnya."""
+        key = _day_key(phone, day or datetime.utcnow().date().isoformat())
+        if self.store is not None:
+            self.store.update(f"alerts:{key}", lambda _: None, ttl=1)
+        else:
+            with self._lock:
+                self.cache.pop(key)
+
+
+ALERTS = AlertEngine()
+
+
+def evaluate_alerts(phone: str, expenses: dict) -> list:
+    """ALERTS.evaluate dengan error handling: alert tidak boleh menggagalkan pencatatan."""
+    try:
+        return ALERTS.evaluate(phone, expenses)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="alerts.evaluate_alerts")
+        print(f"[Alerts] Error: {e}")
+        return []
+
+
+def forget_alerts(phone: str):
+    try:
+        ALERTS.forget(phone)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="alerts.forget_alerts")
+        print(f"[Alerts] Error: {e}")
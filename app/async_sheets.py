@@ -0,0 +1,231 @@
+"""Client Google Sheets asyncio-native untuk handler FastAPI.
+
+googleapiclient bersifat blocking; dipanggil langsung dari `async def`
+handler, satu request Sheets yang lambat membekukan event loop untuk semua
+user. Modul ini memakai REST API Sheets v4 lewat httpx.AsyncClient:
+
+- Kredensial service account yang sama dengan app/sheets.py; token
+  di-refresh otomatis (di thread, karena google-auth blocking) dan sekali
+  lagi jika API menjawab 401
+- Connection pool HTTP (SHEETS_ASYNC_MAX_CONNECTIONS) dengan keep-alive
+- Latency dicatat di SHEETS_LATENCY seperti _execute
+
+Varian async dari fungsi baca/tulis sheets.py memakai snapshot, tab cache
+dan _meta yang sama, jadi handler bisa `await read_ranges([...])` untuk
+membaca banyak range secara concurrent, lalu kode sync di threadpool
+langsung memakai hasilnya dari snapshot.
+
+Dengan SHEETS_BACKEND=fake, request dijalankan ke FakeSheetsService lewat
+asyncio.to_thread.
+"""
+
+import asyncio
+from urllib.parse import quote
+
+import httpx
+
+from app import sheets
+from app.config import SHEETS_ASYNC_MAX_CONNECTIONS, SHEETS_ASYNC_TIMEOUT, SHEETS_BACKEND
+from app.metrics import SHEETS_LATENCY, ERRORS_SWALLOWED, sheets_range_label
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+
+
+class AsyncSheetsClient:
+    """Subset values() Sheets API v4 di atas httpx.AsyncClient."""
+
+    def __init__(self, credentials, spreadsheet_id: str,
+                 max_connections: int = SHEETS_ASYNC_MAX_CONNECTIONS,
+                 timeout: float = SHEETS_ASYNC_TIMEOUT):
+        self.credentials = credentials
+        self.spreadsheet_id = spreadsheet_id
+        self._http = httpx.AsyncClient(
+            base_url=f"{SHEETS_API_URL}/{spreadsheet_id}",
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+        self._refresh_lock = asyncio.Lock()
+
+    async def _token(self, force: bool = False) -> str:
+        async with self._refresh_lock:
+            if force or not self.credentials.valid:
+                # Import lokal: transport requests hanya dibutuhkan untuk refresh
+                from google.auth.transport.requests import Request as AuthRequest
+                await asyncio.to_thread(self.credentials.refresh, AuthRequest())
+            return self.credentials.token
+
+    async def _request(self, http_method: str, path: str, method: str, range_name: str, **kwargs) -> dict:
+        with SHEETS_LATENCY.time(method=method, range=sheets_range_label(range_name)):
+            for attempt in range(2):
+                headers = {"Authorization": f"Bearer {await self._token(force=attempt > 0)}"}
+                response = await self._http.request(http_method, path, headers=headers, **kwargs)
+                if response.status_code != 401:
+                    break
+            response.raise_for_status()
+            return response.json()
+
+    async def get(self, range_name: str) -> dict:
+        return await self._request("GET", f"/values/{quote(range_name, safe='')}", "get", range_name)
+
+    async def batch_get(self, ranges: list) -> dict:
+        return await self._request(
+            "GET", "/values:batchGet", "batchGet", ",".join(r.split("!")[0] for r in ranges),
+            params=[("ranges", r) for r in ranges],
+        )
+
+    async def append(self, range_name: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        return await self._request(
+            "POST", f"/values/{quote(range_name, safe='')}:append", "append", range_name,
+            params={"valueInputOption": value_input_option}, json={"values": values},
+        )
+
+    async def update(self, range_name: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        return await self._request(
+            "PUT", f"/values/{quote(range_name, safe='')}", "update", range_name,
+            params={"valueInputOption": value_input_option}, json={"values": values},
+        )
+
+    async def aclose(self):
+        await self._http.aclose()
+
+
+class FakeAsyncSheetsClient:
+    """Interface yang sama, dijalankan ke service sync (fake backend) di thread."""
+
+    def __init__(self, sheet, spreadsheet_id: str):
+        self.sheet = sheet
+        self.spreadsheet_id = spreadsheet_id
+
+    async def _run(self, request, method: str, range_name: str) -> dict:
+        return await asyncio.to_thread(sheets._execute, request, method, range_name)
+
+    async def get(self, range_name: str) -> dict:
+        request = self.sheet.values().get(spreadsheetId=self.spreadsheet_id, range=range_name)
+        return await self._run(request, "get", range_name)
+
+    async def batch_get(self, ranges: list) -> dict:
+        request = self.sheet.values().batchGet(spreadsheetId=self.spreadsheet_id, ranges=ranges)
+        return await self._run(request, "batchGet", ",".join(r.split("!")[0] for r in ranges))
+
+    async def append(self, range_name: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        request = self.sheet.values().append(
+            spreadsheetId=self.spreadsheet_id, range=range_name,
+            valueInputOption=value_input_option, body={"values": values},
+        )
+        return await self._run(request, "append", range_name)
+
+    async def update(self, range_name: str, values: list, value_input_option: str = "USER_ENTERED") -> dict:
+        request = self.sheet.values().update(
+            spreadsheetId=self.spreadsheet_id, range=range_name,
+            valueInputOption=value_input_option, body={"values": values},
+        )
+        return await self._run(request, "update", range_name)
+
+    async def aclose(self):
+        pass
+
+
+# Connection pool httpx terikat ke event loop; satu client per loop
+_CLIENTS = {}
+
+
+def client():
+    """Client async untuk event loop yang sedang berjalan."""
+    loop = asyncio.get_running_loop()
+    existing = _CLIENTS.get(loop)
+    if existing is None:
+        if SHEETS_BACKEND == "fake":
+            existing = FakeAsyncSheetsClient(sheets.sheet, sheets.SHEET_ID)
+        else:
+            existing = AsyncSheetsClient(sheets.creds, sheets.SHEET_ID)
+        for other in [l for l in _CLIENTS if l.is_closed()]:
+            del _CLIENTS[other]
+        _CLIENTS[loop] = existing
+    return existing
+
+
+async def close_client():
+    """Tutup connection pool milik event loop ini (dipanggil saat shutdown)."""
+    existing = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if existing is not None:
+        await existing.aclose()
+
+
+# ===========================
+# ASYNC VARIANTS
+# Sama seperti tab_versions / _read_range / _append_rows di app/sheets.py,
+# memakai snapshot aktif (contextvar, ikut terbawa ke run_in_threadpool)
+# dan tab cache yang sama.
+# ===========================
+
+async def tab_versions() -> dict:
+    """Varian async sheets.tab_versions()."""
+    versions = sheets._known_versions()
+    if versions is not None:
+        return versions
+
+    values = []
+    try:
+        values = (await client().get(sheets.META_RANGE)).get("values", [])
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="async_sheets.tab_versions")
+        print(f"Error reading {sheets.META_RANGE}: {e}")
+    return sheets._store_versions(values)
+
+
+async def _cached_read(range_name: str, versions: dict):
+    """Varian async sheets._cached_read; keputusannya dari sheets._cache_plan."""
+    kind, plan = sheets._cache_plan(range_name, versions)
+    if kind == "uncached":
+        return None
+    if kind == "hit":
+        return plan
+    if kind == "tail":
+        tail = (await client().get(plan[0])).get("values", [])
+        return sheets._store_tail(range_name, plan, tail)
+
+    if len(plan) > 1:
+        value_ranges = (await client().batch_get(plan)).get("valueRanges", [{}, {}])
+    else:
+        value_ranges = [await client().get(range_name)]
+    return sheets._store_full(range_name, value_ranges, versions)
+
+
+async def read_range(range_name: str, versions: dict = None) -> dict:
+    """Varian async sheets._read_range. Return sama seperti values().get()."""
+    snapshot = sheets._SNAPSHOT.get()
+    if snapshot is not None and range_name in snapshot:
+        return snapshot[range_name]
+
+    result = None
+    if sheets._cacheable(range_name):
+        if versions is None:
+            versions = await tab_versions()
+        result = await _cached_read(range_name, versions)
+    if result is None:
+        result = await client().get(range_name)
+
+    if snapshot is not None:
+        snapshot[range_name] = result
+    return result
+
+
+async def read_ranges(ranges) -> list:
+    """Baca banyak range secara concurrent (satu baca _meta untuk semuanya).
+
+    Di dalam read_snapshot() hasilnya juga tersimpan di snapshot, jadi kode
+    sync yang dijalankan sesudahnya (run_in_threadpool) tidak membaca ulang.
+    """
+    ranges = list(dict.fromkeys(ranges))
+    versions = await tab_versions() if any(sheets._cacheable(r) for r in ranges) else {}
+    return await asyncio.gather(*(read_range(r, versions) for r in ranges))
+
+
+async def append_rows(range_name: str, values: list):
+    """Varian async sheets._append_rows (buffered_appends tetap dihormati)."""
+    if sheets._APPEND_BUFFER.get() is not None:
+        sheets._append_rows(range_name, values)
+        return
+    await client().append(range_name, values)
+    sheets._forget_snapshot_tab(range_name)
+
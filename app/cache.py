@@ -0,0 +1,131 @@
+"""TTL cache kecil untuk state in-memory (dedupe message ID, rate limit, dll).
+
+Entry disimpan berurutan sesuai waktu insert (OrderedDict), jadi entry yang
+paling tua selalu ada di head. Expiry cukup pop dari head sampai ketemu entry
+yang masih hidup: amortized O(1) per operasi, bukan scan seluruh dict.
+Ukuran dibatasi maxsize; kalau penuh, entry tertua di-evict lebih awal.
+
+set() bisa memberi TTL sendiri per entry (misal bucket rate limit yang
+umurnya mengikuti waktu refill). Entry seperti itu bisa "menghalangi"
+expiry dari head sebentar, tapi get()/add() tetap memeriksa deadline
+masing-masing entry, jadi entry yang sudah lewat tidak pernah dikembalikan.
+"""
+
+import threading
+from collections import OrderedDict
+from time import time
+
+
+class TTLCache:
+    """Mapping key -> value dengan TTL (default seragam) dan batas ukuran.
+
+    Args:
+        ttl (float): Umur default entry dalam detik
+        maxsize (int): Jumlah entry maksimum sebelum eviction
+
+    Counters (untuk monitoring):
+        hits: add()/get() yang menemukan entry hidup
+        expired: entry yang dibuang karena TTL habis
+        evicted: entry yang dibuang karena cache penuh
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.expired = 0
+        self.evicted = 0
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        data = self._data
+        while data:
+            key, (expires_at, _) = next(iter(data.items()))
+            if now <= expires_at:
+                break
+            data.popitem(last=False)
+            self.expired += 1
+
+    def _live(self, key, now):
+        """Entry key jika masih hidup (entry dengan TTL sendiri bisa lewat tanpa di head)."""
+        entry = self._data.get(key)
+        if entry is not None and now > entry[0]:
+            del self._data[key]
+            self.expired += 1
+            return None
+        return entry
+
+    def _store(self, key, value, now, ttl=None):
+        data = self._data
+        if key in data:
+            data.move_to_end(key)
+        data[key] = (now + (self.ttl if ttl is None else ttl), value)
+        while len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evicted += 1
+
+    def expire(self, now: float = None):
+        """Buang semua entry yang sudah lewat TTL."""
+        with self._lock:
+            self._expire(time() if now is None else now)
+
+    def add(self, key, now: float = None) -> bool:
+        """Tambah key jika belum ada.
+
+        Returns:
+            bool: True jika key baru, False jika key masih hidup di cache
+        """
+        now = time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            if self._live(key, now) is not None:
+                self.hits += 1
+                return False
+            self._store(key, True, now)
+            return True
+
+    def get(self, key, default=None, now: float = None):
+        now = time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            entry = self._live(key, now)
+            if entry is None:
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, now: float = None, ttl: float = None):
+        """Simpan value dan reset umur entry ke `now`.
+
+        Args:
+            ttl (float): Umur entry ini dalam detik (default: ttl cache,
+                float("inf") = tidak pernah expired, hanya bisa di-evict)
+        """
+        now = time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            self._store(key, value, now, ttl)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def __contains__(self, key):
+        now = time()
+        with self._lock:
+            self._expire(now)
+            return self._live(key, now) is not None
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,266 @@
+"""Representasi kolom (columnar) Database_Input untuk agregasi.
+
+Baris dari Sheets API berupa list string; setiap helper dulu mengubahnya
+lagi menjadi dict dan mem-parse amount dengan int() di setiap panggilan.
+TransactionColumns menyimpan transaksi hidup sekali saja dalam bentuk
+array typed (modul array, tanpa overhead object per baris):
+
+- ts        array('q')  epoch detik UTC
+- phone     array('I')  id phone (StringPool)
+- category  array('I')  id kategori (StringPool)
+- type      array('b')  TYPE_EXPENSE / TYPE_INCOME / TYPE_OTHER
+- amount    array('q')  int64
+- row       array('I')  nomor baris sheet
+- notes     list        string note (dipakai bersama dengan list dari API)
+
+Per phone disimpan posisi baris (array('I')) sehingga query satu user
+hanya menyentuh baris user tersebut. Baris yang masih di buffer append
+ditambahkan lewat ColumnsOverlay, tanpa menyalin kolom bersama. Ukuran per baris bisa dilihat
+dengan `python -m bench.row_memory`.
+"""
+
+import base64
+import sys
+from array import array
+from datetime import datetime, timezone
+
+TYPE_EXPENSE = 0
+TYPE_INCOME = 1
+TYPE_OTHER = 2
+TYPE_CODES = {"expense": TYPE_EXPENSE, "income": TYPE_INCOME}
+TYPE_NAMES = {TYPE_EXPENSE: "expense", TYPE_INCOME: "income", TYPE_OTHER: "other"}
+TOMBSTONE = "deleted"
+_ARRAY_COLUMNS = ("ts", "phone", "category", "type", "amount", "row")
+
+
+def to_epoch(value) -> int:
+    """ISO timestamp (naive = UTC, seperti datetime.utcnow().isoformat()) atau datetime -> epoch detik."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(ts: int) -> str:
+    """Kebalikan to_epoch: ISO timestamp naive UTC (tanpa mikrodetik)."""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class StringPool:
+    """Intern string ke id int kecil (id = urutan pertama kali muncul)."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def intern(self, value: str) -> int:
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def get(self, value: str):
+        """Id value, atau None jika belum pernah muncul."""
+        return self.ids.get(value)
+
+    def copy(self):
+        pool = StringPool()
+        pool.ids = dict(self.ids)
+        pool.values = list(self.values)
+        return pool
+
+
+class TransactionColumns:
+    """Transaksi hidup Database_Input dalam bentuk kolom typed.
+
+    Attributes:
+        source_len (int): Jumlah baris values (termasuk header) yang sudah dibaca
+        positions (dict): {phone_id: array('I') posisi baris di kolom}
+    """
+
+    __slots__ = (
+        "ts", "phone", "category", "type", "amount", "row", "notes",
+        "phones", "categories", "positions", "source_len",
+    )
+
+    def __init__(self):
+        self.ts = array("q")
+        self.phone = array("I")
+        self.category = array("I")
+        self.type = array("b")
+        self.amount = array("q")
+        self.row = array("I")
+        self.notes = []
+        self.phones = StringPool()
+        self.categories = StringPool()
+        self.positions = {}
+        self.source_len = 0
+
+    def __len__(self):
+        return len(self.amount)
+
+    @property
+    def parts(self) -> tuple:
+        """Bagian kolom untuk diiterasi (sama dengan ColumnsOverlay.parts)."""
+        return (self,)
+
+    @classmethod
+    def from_values(cls, values: list):
+        """Bangun dari hasil values().get() Database_Input (baris pertama = header)."""
+        columns = cls()
+        columns.source_len = 1 if values else 0
+        columns.extend(values[1:])
+        return columns
+
+    def add(self, row_number: int, r: list):
+        """Tambahkan satu baris sheet dengan nomor baris eksplisit.
+
+        Baris tombstone, tidak lengkap, atau dengan amount/timestamp yang
+        tidak valid dilewati (sama seperti helper lama yang skip ValueError).
+
+        Returns:
+            int atau None: Posisi baris di kolom, None jika dilewati
+        """
+        if len(r) < 5 or (len(r) > 7 and r[7] == TOMBSTONE):
+            return None
+        try:
+            amount = int(r[4])
+            ts = to_epoch(r[0])
+        except ValueError:
+            return None
+        phone_id = self.phones.intern(r[1])
+        position = len(self.amount)
+        self.ts.append(ts)
+        self.phone.append(phone_id)
+        self.category.append(self.categories.intern(r[3]))
+        self.type.append(TYPE_CODES.get(r[2], TYPE_OTHER))
+        self.amount.append(amount)
+        self.row.append(row_number)
+        self.notes.append(r[5] if len(r) > 5 else "")
+        user_positions = self.positions.get(phone_id)
+        if user_positions is None:
+            user_positions = self.positions[phone_id] = array("I")
+        user_positions.append(position)
+        return position
+
+    def extend(self, rows: list):
+        """Tambahkan baris sheet berikutnya (mulai nomor baris source_len + 1)."""
+        row_number = self.source_len
+        add = self.add
+        for r in rows:
+            row_number += 1
+            add(row_number, r)
+        self.source_len = row_number
+
+    def user_positions(self, phone: str):
+        """Posisi baris milik phone (urut append), kosong jika tidak ada."""
+        phone_id = self.phones.get(phone)
+        if phone_id is None:
+            return ()
+        return self.positions.get(phone_id, ())
+
+    def nbytes(self) -> int:
+        """Perkiraan memory kolom typed + index posisi (tanpa string pool dan notes)."""
+        arrays = [getattr(self, name) for name in _ARRAY_COLUMNS]
+        total = sum(a.buffer_info()[1] * a.itemsize for a in arrays)
+        total += sum(p.buffer_info()[1] * p.itemsize for p in self.positions.values())
+        return total
+
+    def export_state(self) -> dict:
+        """State JSON-serializable untuk warm-start snapshot (app/warm_start.py).
+
+        Array disimpan sebagai dump byte (base64) beserta typecode/itemsize
+        dan byteorder; notes tidak ikut karena dibangun ulang dari values.
+        """
+        def dump(column):
+            return {"typecode": column.typecode, "itemsize": column.itemsize,
+                    "data": base64.b64encode(column.tobytes()).decode("ascii")}
+
+        return {
+            "byteorder": sys.byteorder,
+            "source_len": self.source_len,
+            "arrays": {name: dump(getattr(self, name)) for name in _ARRAY_COLUMNS},
+            "phones": list(self.phones.values),
+            "categories": list(self.categories.values),
+            "positions": {str(phone_id): dump(p) for phone_id, p in self.positions.items()},
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, values: list):
+        """Kebalikan export_state; values = isi Database_Input yang menjadi sumber kolom.
+
+        Raises:
+            ValueError: Jika state tidak cocok (byteorder, typecode, panjang, values)
+        """
+        def load(dumped, typecode):
+            if dumped["typecode"] != typecode or dumped["itemsize"] != array(typecode).itemsize:
+                raise ValueError(f"typecode/itemsize {dumped['typecode']} tidak cocok")
+            column = array(typecode)
+            column.frombytes(base64.b64decode(dumped["data"]))
+            return column
+
+        if state["byteorder"] != sys.byteorder:
+            raise ValueError("byteorder berbeda")
+        columns = cls()
+        for name in _ARRAY_COLUMNS:
+            setattr(columns, name, load(state["arrays"][name], getattr(columns, name).typecode))
+        n = len(columns.amount)
+        if any(len(getattr(columns, name)) != n for name in _ARRAY_COLUMNS):
+            raise ValueError("panjang kolom tidak sama")
+        columns.source_len = int(state["source_len"])
+        if columns.source_len > len(values) or (n and columns.row[-1] > columns.source_len):
+            raise ValueError("values lebih pendek dari kolom")
+
+        for name in ("phones", "categories"):
+            pool = getattr(columns, name)
+            for value in state[name]:
+                if not isinstance(value, str):
+                    raise ValueError(f"{name} berisi non-string")
+                pool.intern(value)
+        if (n and (max(columns.phone) >= len(columns.phones) or max(columns.category) >= len(columns.categories))):
+            raise ValueError("id string pool di luar jangkauan")
+        columns.positions = {int(phone_id): load(p, "I") for phone_id, p in state["positions"].items()}
+        if sum(len(p) for p in columns.positions.values()) != n:
+            raise ValueError("index posisi tidak lengkap")
+
+        for row_number in columns.row:
+            r = values[row_number - 1]
+            columns.notes.append(r[5] if len(r) > 5 else "")
+        return columns
+
+
+class ColumnsOverlay:
+    """TransactionColumns bersama (tab cache) + kolom kecil untuk baris yang belum di-flush.
+
+    Di dalam buffered_appends() baris batch ini belum ada di tab cache.
+    Daripada menyalin seluruh kolom bersama, baris tersebut dibangun
+    sebagai TransactionColumns terpisah (id string pool sendiri) dan
+    agregasi (app/aggregate.py) menggabungkan hasil kedua bagian.
+
+    Attributes:
+        base (TransactionColumns): Kolom bersama, tidak pernah diubah
+        pending (TransactionColumns): Baris sesudah base.source_len
+    """
+
+    __slots__ = ("base", "pending")
+
+    def __init__(self, base: TransactionColumns, pending: TransactionColumns):
+        self.base = base
+        self.pending = pending
+
+    def __len__(self):
+        return len(self.base) + len(self.pending)
+
+    @property
+    def parts(self) -> tuple:
+        return self.base, self.pending
@@ -9,3 +9,48 @@ WHATSAPP_PHONE_NUMBER_ID = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
 # Base URL for PDF export links (set in Railway env, stripped of trailing slash)
 _base_url = os.getenv("APP_BASE_URL", "http://localhost:8000")
 APP_BASE_URL = _base_url.rstrip("/") if _base_url else "http://localhost:8000"
+# Token untuk endpoint /import (CSV mutasi rekening). Kosong = endpoint nonaktif
+IMPORT_API_TOKEN = os.getenv("IMPORT_API_TOKEN")
+# File SQLite untuk state bersama antar worker (dedupe, rate limit, leader lock).
+# Wajib diisi jika menjalankan uvicorn --workers > 1. Kosong = state per proses
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH")
+# Profiling per request (opt-in). Aktif jika PROFILE_SAMPLE_RATE > 0 atau
+# PROFILE_TOKEN diisi (request dengan header X-Debug-Profile: {token})
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+# Backend Google Sheets: "google" (default) atau "fake" (in-memory, tanpa
+# kredensial/network, lihat app/fake_sheets.py untuk opsi FAKE_SHEETS_*)
+SHEETS_BACKEND = os.getenv("SHEETS_BACKEND", "google").lower()
+# Cache tab Sheets antar request, divalidasi lewat tab _meta (versi writer +
+# jumlah baris). "0" = nonaktif. SHEETS_META_MAX_AGE = umur maksimum (detik)
+# hasil baca _meta di luar request (scheduler job, dll)
+SHEETS_TAB_CACHE = os.getenv("SHEETS_TAB_CACHE", "1") != "0"
+SHEETS_META_MAX_AGE = float(os.getenv("SHEETS_META_MAX_AGE", "2"))
+# Rekonsiliasi cache tab vs edit manual di spreadsheet (lihat reconcile_tabs di
+# app/sheets.py): interval job dalam detik (0 = nonaktif) dan ukuran blok baris
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "300"))
+RECONCILE_BLOCK_ROWS = int(os.getenv("RECONCILE_BLOCK_ROWS", "1000"))
+# Warm-start snapshot cache tab, kolom transaksi dan posisi replica di disk
+# (JSON, lihat app/warm_start.py). Opt-in: kosong = nonaktif, misal
+# WARM_START_PATH=data/sheets_snapshot.json. WARM_START_SAVE_SECONDS =
+# interval simpan berkala
+WARM_START_PATH = os.getenv("WARM_START_PATH", "")
+WARM_START_SAVE_SECONDS = int(os.getenv("WARM_START_SAVE_SECONDS", "300"))
+# Client Sheets async (app/async_sheets.py): ukuran connection pool HTTP dan
+# timeout per request (detik)
+SHEETS_ASYNC_MAX_CONNECTIONS = int(os.getenv("SHEETS_ASYNC_MAX_CONNECTIONS", "20"))
+SHEETS_ASYNC_TIMEOUT = float(os.getenv("SHEETS_ASYNC_TIMEOUT", "30"))
+# Alert budget / daily target hanya dikirim saat total melewati threshold ini
+# (persen dari limit, lihat app/alerts.py)
+ALERT_THRESHOLDS = tuple(sorted(int(t) for t in os.getenv("ALERT_THRESHOLDS", "80,100,150").split(",") if t.strip()))
+# Balasan WhatsApp per phone ditahan selama ini (detik) supaya balasan untuk
+# burst pesan dari phone yang sama digabung jadi satu (0 = kirim di akhir request)
+REPLY_LINGER_SECONDS = float(os.getenv("REPLY_LINGER_SECONDS", "0"))
+# Pengiriman /export: "link" (URL ke /export/{phone}/{days}) atau "document"
+# (PDF di-upload ke media WhatsApp dan dikirim sebagai dokumen). Media id
+# di-cache per (phone, hari, versi data) selama EXPORT_MEDIA_TTL detik
+# (media WhatsApp berlaku 30 hari)
+EXPORT_DELIVERY = os.getenv("EXPORT_DELIVERY", "link").lower()
+EXPORT_MEDIA_TTL = int(os.getenv("EXPORT_MEDIA_TTL", str(7 * 86400)))
@@ -0,0 +1,372 @@
+"""Fake Google Sheets API in-process untuk development, test manual dan benchmark.
+
+Meniru subset `service.spreadsheets()` yang dipakai app/sheets.py:
+- values().get / batchGet / append / update / batchUpdate
+- formula =COUNTA('Tab'!A:A) (dipakai tab _meta) dan fingerprint blok
+  SUMPRODUCT/SUM/COUNTA (dipakai tab _blocks) dievaluasi saat dibaca
+- spreadsheets().get / batchUpdate (deleteDimension, addSheet)
+
+Aktif jika SHEETS_BACKEND=fake. Perilaku bisa diatur lewat env:
+- FAKE_SHEETS_LATENCY_MS          latency dasar per request (default 0)
+- FAKE_SHEETS_LATENCY_MS_PER_1K   latency tambahan per 1000 baris dibaca/ditulis
+- FAKE_SHEETS_QUOTA_ERROR_RATE    peluang request gagal HTTP 429 (0-1)
+- FAKE_SHEETS_ROWS                jumlah transaksi sintetis di Database_Input
+- FAKE_SHEETS_USERS               jumlah nomor user sintetis
+- FAKE_SHEETS_SEED                seed random (data dan error reproducible)
+
+Data hanya ada di memory proses; semua value disimpan sebagai string seperti
+FORMATTED_VALUE dari API asli.
+"""
+
+import os
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from time import sleep
+
+HEADERS = {
+    "Database_Input": ["Timestamp", "Phone", "Type", "Category", "Amount", "Note", "Message_ID", "Status"],
+    "Budget_Settings": ["Timestamp", "Phone", "Category", "Amount"],
+    "Spending_Target": ["Timestamp", "Phone", "Type", "Amount"],
+    "Recurring_Transactions": ["Timestamp", "Phone", "Category", "Amount", "Frequency", "Last_Run", "Note"],
+    "Goals_Settings": ["Timestamp", "Phone", "Category", "Amount"],
+    "Raw_Log": ["Timestamp", "Phone", "Message"],
+    "Sheet1": ["Timestamp", "Phone", "Type", "Category", "Amount", "Note", "Message_ID"],
+}
+
+SAMPLE_NOTES = {
+    "makan": ["makan siang", "sarapan bubur", "kopi pagi", "dinner keluarga", "jajan sore"],
+    "transport": ["grab kantor", "bensin motor", "gojek pulang", "krl", "mrt"],
+    "belanja": ["belanja bulanan", "market", "shopping baju"],
+    "hiburan": ["nonton bioskop", "game", "movie"],
+    "other": ["pulsa", "listrik", "donasi"],
+}
+
+
+class FakeQuotaError(Exception):
+    """Dipakai jika googleapiclient tidak tersedia untuk membuat HttpError 429."""
+
+    status_code = 429
+
+
+def _quota_error():
+    try:
+        import httplib2
+        from googleapiclient.errors import HttpError
+        resp = httplib2.Response({"status": 429})
+        resp.reason = "Too Many Requests"
+        return HttpError(resp, b'{"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}')
+    except ImportError:
+        return FakeQuotaError("429 RESOURCE_EXHAUSTED (fake)")
+
+
+# Formula fingerprint blok dari app.sheets.block_fingerprint_formula
+_BLOCK_FORMULA_RE = re.compile(
+    r"""^=SUMPRODUCT\(LEN\('?([^'!]+)'?!([A-Z]+)(\d+):([A-Z]+)(\d+)\)\)&":"&SUM\(.*\)&":"&COUNTA\(.*\)$"""
+)
+
+
+def _col_index(letters: str) -> int:
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _col_letters(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def parse_a1(range_name: str):
+    """Parse notasi A1 -> (tab, row_start, row_end, col_start, col_end).
+
+    Row 0-based inklusif-eksklusif, None berarti tidak dibatasi.
+    Contoh: "Database_Input!A5:H" -> ("Database_Input", 4, None, 0, 8)
+    """
+    tab, _, cells = range_name.partition("!")
+    tab = tab.strip("'")
+    if not cells:
+        return tab, 0, None, 0, None
+
+    parts = cells.split(":")
+    start = re.match(r"([A-Z]*)(\d*)", parts[0])
+    end = re.match(r"([A-Z]*)(\d*)", parts[-1])
+    col_start = _col_index(start.group(1)) if start.group(1) else 0
+    col_end = _col_index(end.group(1)) + 1 if end.group(1) else None
+    row_start = int(start.group(2)) - 1 if start.group(2) else 0
+    row_end = int(end.group(2)) if end.group(2) else None
+    return tab, row_start, row_end, col_start, col_end
+
+
+class FakeRequest:
+    """Meniru HttpRequest: pekerjaan baru dijalankan saat execute()."""
+
+    def __init__(self, backend, fn):
+        self.backend = backend
+        self.fn = fn
+
+    def execute(self, num_retries=0):
+        return self.backend._run(self.fn)
+
+
+class FakeValues:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get(self, spreadsheetId, range, **kwargs):
+        return FakeRequest(self.backend, lambda: self.backend.read("get", range))
+
+    def batchGet(self, spreadsheetId, ranges, **kwargs):
+        def run():
+            return {
+                "spreadsheetId": spreadsheetId,
+                "valueRanges": [self.backend.read("batchGet", r) for r in ranges],
+            }
+        return FakeRequest(self.backend, run)
+
+    def append(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        return FakeRequest(self.backend, lambda: self.backend.append(range, body.get("values", [])))
+
+    def update(self, spreadsheetId, range, body, valueInputOption=None, **kwargs):
+        return FakeRequest(self.backend, lambda: self.backend.update(range, body.get("values", [])))
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        def run():
+            self.backend._count("values.batchUpdate")
+            responses = [self.backend.update(d["range"], d.get("values", []), count=False) for d in body.get("data", [])]
+            return {"spreadsheetId": spreadsheetId, "responses": responses}
+        return FakeRequest(self.backend, run)
+
+
+class FakeSpreadsheets:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def values(self):
+        return FakeValues(self.backend)
+
+    def get(self, spreadsheetId, **kwargs):
+        return FakeRequest(self.backend, lambda: self.backend.properties(spreadsheetId))
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        return FakeRequest(self.backend, lambda: self.backend.batch_update(body.get("requests", [])))
+
+
+class FakeSheetsService:
+    """Pengganti object hasil googleapiclient.discovery.build("sheets", "v4").
+
+    Attributes:
+        tabs (dict): {tab: list of rows (list of str)}, baris 0 = header
+        calls (dict): Jumlah request per method (untuk benchmark)
+        latency_ms, latency_ms_per_1k, quota_error_rate: bisa diubah saat runtime
+    """
+
+    def __init__(self, latency_ms=0.0, latency_ms_per_1k=0.0, quota_error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.latency_ms_per_1k = latency_ms_per_1k
+        self.quota_error_rate = quota_error_rate
+        self.random = random.Random(seed)
+        self.tabs = {tab: [list(header)] for tab, header in HEADERS.items()}
+        self.sheet_ids = {tab: i for i, tab in enumerate(self.tabs)}
+        self.calls = {}
+        self._rows_touched = 0
+        self._writes = 0  # naik setiap write, untuk memo hasil formula
+        self._formula_memo = {}
+        self._lock = threading.RLock()
+
+    # ---------- googleapiclient surface ----------
+
+    def spreadsheets(self):
+        return FakeSpreadsheets(self)
+
+    # ---------- internal ----------
+
+    def _count(self, method):
+        self.calls[method] = self.calls.get(method, 0) + 1
+
+    def _run(self, fn):
+        if self.quota_error_rate and self.random.random() < self.quota_error_rate:
+            self._count("quota_error")
+            raise _quota_error()
+        with self._lock:
+            self._rows_touched = 0
+            result = fn()
+            rows = self._rows_touched
+        delay = self.latency_ms + self.latency_ms_per_1k * rows / 1000.0
+        if delay > 0:
+            sleep(delay / 1000.0)
+        return result
+
+    def _evaluate(self, formula):
+        """Evaluasi formula sederhana seperti FORMATTED_VALUE (cukup untuk _meta dan _blocks)."""
+        match = re.match(r"^=COUNTA\('?([^'!]+)'?!([A-Z]+):([A-Z]+)\)$", formula)
+        block = _BLOCK_FORMULA_RE.match(formula)
+        tab = (match or block).group(1) if (match or block) else None
+        if tab not in self.tabs:
+            return "#REF!"
+        rows = self.tabs[tab]
+        # len(rows) ikut di stamp supaya edit langsung ke self.tabs tetap terdeteksi
+        stamp = (self._writes, len(rows))
+        cached = self._formula_memo.get(formula)
+        if cached is None or cached[0] != stamp:
+            if match:
+                col_start, col_end = _col_index(match.group(2)), _col_index(match.group(3)) + 1
+                value = str(sum(1 for row in rows for cell in row[col_start:col_end] if cell != ""))
+            else:
+                value = self._block_fingerprint(rows, *block.groups()[1:])
+            self._formula_memo[formula] = cached = (stamp, value)
+        return cached[1]
+
+    def _block_fingerprint(self, rows, c0, r0, c1, r1):
+        """SUMPRODUCT(LEN(R))&":"&SUM(R)&":"&COUNTA(R) untuk R = c0r0:c1r1."""
+        col_start, col_end = _col_index(c0), _col_index(c1) + 1
+        length = total = count = 0
+        for row in rows[int(r0) - 1:int(r1)]:
+            for cell in row[col_start:col_end]:
+                if cell == "":
+                    continue
+                length += len(cell)
+                count += 1
+                try:
+                    total += float(cell)
+                except ValueError:
+                    pass
+        total = int(total) if total == int(total) else total
+        return f"{length}:{total}:{count}"
+
+    def _tab(self, tab):
+        if tab not in self.tabs:
+            raise KeyError(f"Unable to parse range: {tab}")
+        return self.tabs[tab]
+
+    def read(self, method, range_name):
+        self._count(method)
+        tab, row_start, row_end, col_start, col_end = parse_a1(range_name)
+        rows = self._tab(tab)[row_start:row_end]
+        values = []
+        for row in rows:
+            cells = [self._evaluate(c) if c.startswith("=") else c for c in row[col_start:col_end]]
+            while cells and cells[-1] == "":
+                cells = cells[:-1]
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        self._rows_touched += len(values)
+        result = {"range": range_name, "majorDimension": "ROWS"}
+        if values:
+            result["values"] = values
+        return result
+
+    def append(self, range_name, values):
+        self._writes += 1
+        self._count("append")
+        tab, _, _, col_start, _ = parse_a1(range_name)
+        rows = self._tab(tab)
+        start = len(rows)
+        for value_row in values:
+            rows.append([""] * col_start + ["" if v is None else str(v) for v in value_row])
+        self._rows_touched += len(values)
+        width = max((len(v) for v in values), default=1)
+        updated = f"{tab}!{_col_letters(col_start)}{start + 1}:{_col_letters(col_start + width - 1)}{start + len(values)}"
+        return {"updates": {"updatedRange": updated, "updatedRows": len(values)}}
+
+    def update(self, range_name, values, count=True):
+        self._writes += 1
+        if count:
+            self._count("update")
+        tab, row_start, _, col_start, _ = parse_a1(range_name)
+        rows = self._tab(tab)
+        for offset, value_row in enumerate(values):
+            index = row_start + offset
+            while len(rows) <= index:
+                rows.append([])
+            row = rows[index]
+            needed = col_start + len(value_row)
+            if len(row) < needed:
+                row.extend([""] * (needed - len(row)))
+            for j, v in enumerate(value_row):
+                row[col_start + j] = "" if v is None else str(v)
+        self._rows_touched += len(values)
+        return {"updatedRange": range_name, "updatedRows": len(values)}
+
+    def properties(self, spreadsheet_id):
+        self._count("spreadsheets.get")
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "sheets": [
+                {
+                    "properties": {
+                        "sheetId": self.sheet_ids[tab],
+                        "title": tab,
+                        "gridProperties": {"rowCount": len(rows)},
+                    }
+                }
+                for tab, rows in self.tabs.items()
+            ],
+        }
+
+    def batch_update(self, requests):
+        self._writes += 1
+        self._count("batchUpdate")
+        titles = {sheet_id: tab for tab, sheet_id in self.sheet_ids.items()}
+        replies = []
+        for req in requests:
+            if "deleteDimension" in req:
+                rng = req["deleteDimension"]["range"]
+                rows = self.tabs[titles[rng.get("sheetId", 0)]]
+                del rows[rng["startIndex"]:rng["endIndex"]]
+                self._rows_touched += rng["endIndex"] - rng["startIndex"]
+                replies.append({})
+            elif "addSheet" in req:
+                title = req["addSheet"]["properties"]["title"]
+                if title not in self.tabs:
+                    self.tabs[title] = []
+                    self.sheet_ids[title] = max(self.sheet_ids.values(), default=-1) + 1
+                replies.append({"addSheet": {"properties": {"title": title, "sheetId": self.sheet_ids[title]}}})
+            else:
+                replies.append({})
+        return {"replies": replies}
+
+    # ---------- data sintetis ----------
+
+    def seed_transactions(self, n_rows: int, n_users: int = 100, days: int = 365):
+        """Isi Database_Input dengan n_rows transaksi sintetis, urut waktu."""
+        rng = self.random
+        phones = [f"628{1000000000 + i}" for i in range(n_users)]
+        now = datetime.utcnow()
+        start = now - timedelta(days=days)
+        step = (now - start) / max(n_rows, 1)
+        categories = list(SAMPLE_NOTES)
+        rows = self.tabs["Database_Input"]
+        for i in range(n_rows):
+            ts = (start + step * i).isoformat()
+            if rng.random() < 0.05:
+                tx_type, category, amount, note = "income", "other", rng.randrange(1_000_000, 10_000_000, 1000), "gaji"
+            else:
+                category = rng.choice(categories)
+                tx_type = "expense"
+                amount = rng.randrange(5_000, 300_000, 500)
+                note = rng.choice(SAMPLE_NOTES[category])
+            rows.append([ts, rng.choice(phones), tx_type, category, str(amount), note, f"seed-{i}"])
+        return phones
+
+
+def build_fake_service() -> FakeSheetsService:
+    """Buat FakeSheetsService dari env FAKE_SHEETS_* (dipanggil oleh app/sheets.py)."""
+    seed = os.getenv("FAKE_SHEETS_SEED")
+    service = FakeSheetsService(
+        latency_ms=float(os.getenv("FAKE_SHEETS_LATENCY_MS", "0")),
+        latency_ms_per_1k=float(os.getenv("FAKE_SHEETS_LATENCY_MS_PER_1K", "0")),
+        quota_error_rate=float(os.getenv("FAKE_SHEETS_QUOTA_ERROR_RATE", "0")),
+        seed=int(seed) if seed else None,
+    )
+    rows = int(os.getenv("FAKE_SHEETS_ROWS", "0"))
+    if rows:
+        service.seed_transactions(rows, int(os.getenv("FAKE_SHEETS_USERS", "100")))
+    return service
@@ -5,6 +5,11 @@ Modul ini menangani:
 - Format dan send reply messages
 - Business logic untuk setiap command (summary, budget, goals, dll)
 
+Routing memakai registry COMMANDS: setiap command didaftarkan dengan
+decorator @command beserta schema argumen dan range sheet yang dibaca,
+lalu handle_command dispatch lewat satu dict lookup pada token pertama.
+Range yang dideklarasikan di-prefetch sekaligus sebelum handler jalan.
+
 Daftar Commands:
 - /summary, /weekly, /monthly - Ringkasan finansial
 - /setbudget, /budget, /budgets - Budget management
@@ -18,51 +23,121 @@ Daftar Commands:
 - /help - Command list
 """
 
+from typing import NamedTuple
+from time import perf_counter
+from datetime import datetime, timedelta
+
 from app.sheets import (
     summarize_today_by_phone,
     summarize_week_by_phone,
     summarize_month_by_phone,
-    get_last_transaction_row_by_phone,
-    delete_row,
+    undo_last_transaction,
+    read_snapshot,
     # Budget & Target
     set_budget,
     get_budget,
     get_all_budgets,
     set_spending_target,
-    get_spending_target,
     # Analysis
     get_category_breakdown,
     get_income_expense_ratio,
-    search_transactions,
     # Recurring
     add_recurring,
     get_recurring,
     # Export
     generate_export_pdf,
+    export_data_version,
     # Feature 3: Goals
     set_goal,
-    get_goal,
-    get_goal_progress,
     get_all_goals,
     # Feature 4: Smart Notifications
     check_daily_target_exceeded,
     check_weekly_target_exceeded,
 )
-from app.config import APP_BASE_URL
-import re
-import base64
+from app.config import APP_BASE_URL, EXPORT_DELIVERY, EXPORT_MEDIA_TTL
+from app.shared_state import SHARED_STORE
+from app.whatsapp import upload_media, send_whatsapp_document
+from app.replica import TRANSACTION_INDEX
+from app.alerts import forget_alerts
+from app.state import HISTORY_CURSORS, EXPORT_MEDIA
+from app.metrics import Histogram, ERRORS_SWALLOWED
+
+
+# Range sheet yang dibaca command (untuk prefetch)
+TRANSACTIONS = "Database_Input!A:H"
+BUDGETS = "Budget_Settings!A:D"
+TARGETS = "Spending_Target!A:D"
+RECURRING = "Recurring_Transactions!A:G"
+GOALS = "Goals_Settings!A:D"
+
+COMMAND_LATENCY = Histogram(
+    "command_latency_seconds",
+    "Latency handler per slash command",
+    labels=("command",),
+)
+
+REQUIRED = object()
+
+
+class Arg(NamedTuple):
+    """Schema satu argumen command.
+
+    Attributes:
+        name: Nama keyword argument untuk handler
+        type: Fungsi konversi (str, int, ...)
+        default: REQUIRED jika wajib, selain itu nilai default
+        choices: Nilai yang diizinkan (None = bebas)
+        error: Pesan jika konversi/choices gagal. None pada argumen opsional
+            berarti nilai invalid diabaikan dan default dipakai
+    """
+    name: str
+    type: type = str
+    default: object = REQUIRED
+    choices: tuple = None
+    error: str = None
+
+
+class ArgError(Exception):
+    """Argumen command tidak valid; message dikirim apa adanya ke user."""
+
+
+# name -> spec dict: {"name", "handler", "args", "ranges", "usage"}
+COMMANDS = {}
+
+
+def command(*names, args=(), ranges=(), usage=None):
+    """Daftarkan handler ke registry COMMANDS.
+
+    Args:
+        names: Nama command (nama pertama dipakai untuk metrics, sisanya alias)
+        args: Tuple of Arg, atau None jika handler menerima list argumen mentah
+        ranges: Range sheet yang dibaca handler (di-prefetch sekaligus)
+        usage: Pesan format yang dikirim jika argumen wajib kurang
+    """
+    def register(handler):
+        spec = {
+            "name": names[0],
+            "handler": handler,
+            "args": args,
+            "ranges": tuple(ranges),
+            "usage": usage,
+        }
+        for name in names:
+            COMMANDS[name] = spec
+        return handler
+    return register
 
 
 def parse_command_args(text: str) -> list:
     """Parse arguments dari command text.
-    
+
     Contoh:
     - Input: "/setbudget makan 500000"
     - Output: ['makan', '500000']
-    
+
     Args:
         text (str): Command text dari user
-    
+
     Returns:
         list: List of arguments setelah command name dihilangkan
     """
@@ -70,17 +145,46 @@ def parse_command_args(text: str) -> list:
     return parts[1:] if len(parts) > 1 else []
 
 
+def bind_args(spec: dict, raw_args: list) -> dict:
+    """Validasi dan konversi argumen mentah sesuai schema command.
+
+    Raises:
+        ArgError: Jika argumen wajib kurang atau nilainya invalid
+    """
+    schema = spec["args"]
+    required = sum(1 for arg in schema if arg.default is REQUIRED)
+    if len(raw_args) < required:
+        raise ArgError(spec["usage"])
+
+    values = {}
+    for i, arg in enumerate(schema):
+        if i >= len(raw_args):
+            values[arg.name] = arg.default
+            continue
+        try:
+            value = arg.type(raw_args[i])
+            if arg.choices and value not in arg.choices:
+                raise ValueError(value)
+        except ValueError:
+            if arg.error is None and arg.default is not REQUIRED:
+                value = arg.default
+            else:
+                raise ArgError(arg.error or spec["usage"])
+        values[arg.name] = value
+    return values
+
+
 def format_currency(amount: int) -> str:
     """Format angka ke format currency Rupiah yang mudah dibaca.
-    
+
     Contoh:
     - 25000 -> "Rp 25,000"
     - 1500000 -> "Rp 1,500,000"
     - 10000000 -> "Rp 10,000,000"
-    
+
     Args:
         amount (int): Jumlah dalam Rupiah
-    
+
     Returns:
         str: Format "Rp X,XXX,XXX" dengan separator comma
     """
@@ -89,19 +193,50 @@ def format_currency(amount: int) -> str:
 
 def handle_command(text, phone, send):
     """Parse dan handle semua slash commands.
-    
+
+    Dispatch O(1) lewat COMMANDS pada token pertama, validasi argumen sesuai
+    schema, prefetch range yang dideklarasikan, lalu catat latency handler
+    ke COMMAND_LATENCY.
+
     Args:
         text (str): Command text dari user
         phone (str): Nomor WhatsApp user
         send (function): Callback function untuk send messages
-    
+
     Returns:
         bool: True jika command berhasil dihandle, False jika text bukan command
     """
+    if not text.startswith("/"):
+        return False
+    parts = text.split()
+    spec = COMMANDS.get(parts[0]) if parts else None
+    if spec is None:
+        return False
+
+    start = perf_counter()
     try:
-        # ========== /help ==========
-        if text == "/help":
-            help_text = """� *MENU PERINTAH BOT KEUANGAN*
+        if spec["args"] is None:
+            kwargs = {"args": parts[1:]}
+        else:
+            kwargs = bind_args(spec, parts[1:])
+
+        with read_snapshot(spec["ranges"]):
+            spec["handler"](phone, send, **kwargs)
+        return True
+    except ArgError as e:
+        send(phone, str(e))
+        return True
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="commands.handle_command")
+        print(f"[Command Handler] Error: {e}")
+        send(phone, "❌ Terjadi error saat memproses perintah Anda.")
+        return True
+    finally:
+        COMMAND_LATENCY.observe(perf_counter() - start, command=spec["name"])
+
+
+# ========== /help ==========
+HELP_TEXT = """� *MENU PERINTAH BOT KEUANGAN*
 
 *━━━━━━━━━━━━━━━━━━━━━━━━━━━━*
 📊 *RINGKASAN FINANSIAL*
@@ -135,7 +270,8 @@ def handle_command(text, phone, send):
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 /breakdown [{hari}] - Per kategori
 /ratio [{hari}] - Income vs Expense
-/history [{kategori}] - Cari transaksi
+/history [{keyword}] [{hari}] - Cari transaksi
+/history next - Halaman berikutnya
 
 *━━━━━━━━━━━━━━━━━━━━━━━━━━━━*
 🔄 *TRANSAKSI OTOMATIS*
@@ -164,335 +300,374 @@ bensin 100000 catatan perjalanan
   • Recurring transaksi jatuh tempo
 
 _Ketik /help lagi untuk update_"""
-            send(phone, help_text)
-            return True
-
-        # ========== /undo ==========
-        if text == "/undo":
-            row = get_last_transaction_row_by_phone(phone)
-            if not row:
-                send(phone, "⚠️ Tidak ada transaksi yang bisa di-undo.")
-                return True
-            
-            delete_row(row)
-            send(phone, f"✅ Transaksi {row[3]} {row[4]} dihapus")
-            return True
-
-        # ========== /summary ==========
-        if text == "/summary":
-            income, expense, net = summarize_today_by_phone(phone)
-            msg = f"📊 RINGKASAN HARI INI\n\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
-            send(phone, msg)
-            return True
-
-        # ========== /weekly ==========
-        if text == "/weekly":
-            income, expense, net, count = summarize_week_by_phone(phone)
-            msg = f"📊 RINGKASAN MINGGU INI\n\nTransaksi: {count}\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
-            send(phone, msg)
-            return True
-
-        # ========== /monthly ==========
-        if text == "/monthly":
-            income, expense, net, count = summarize_month_by_phone(phone)
-            msg = f"📊 RINGKASAN BULAN INI\n\nTransaksi: {count}\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
-            send(phone, msg)
-            return True
-
-        # ========== /setbudget ==========
-        if text.startswith("/setbudget"):
-            args = parse_command_args(text)
-            if len(args) < 2:
-                send(phone, "❌ Format: /setbudget {kategori} {amount}\nContoh: /setbudget makan 500000")
-                return True
-            
-            category = args[0]
-            try:
-                amount = int(args[1])
-                set_budget(phone, category, amount)
-                send(phone, f"✅ Budget {category} ditetapkan: {format_currency(amount)}")
-            except ValueError:
-                send(phone, "❌ Amount harus angka")
-            return True
-
-        # ========== /budget ==========
-        if text.startswith("/budget") and not text.startswith("/budgets"):
-            args = parse_command_args(text)
-            if len(args) < 1:
-                send(phone, "❌ Format: /budget {kategori}\nContoh: /budget makan")
-                return True
-            
-            category = args[0]
-            amount = get_budget(phone, category)
-            if amount == 0:
-                send(phone, f"❌ Belum ada budget untuk {category}")
-            else:
-                send(phone, f"💰 Budget {category}: {format_currency(amount)}")
-            return True
-
-        # ========== /budgets ==========
-        if text == "/budgets":
-            budgets = get_all_budgets(phone)
-            if not budgets:
-                send(phone, "📋 Belum ada budget. Gunakan /setbudget")
-                return True
-            
-            msg = "💰 DAFTAR BUDGET:\n\n"
-            for category, amount in budgets.items():
-                msg += f"{category}: {format_currency(amount)}\n"
-            send(phone, msg)
-            return True
-
-        # ========== /target ==========
-        if text.startswith("/target"):
-            args = parse_command_args(text)
-            if len(args) < 2:
-                send(phone, "❌ Format: /target {daily|weekly} {amount}\nContoh: /target daily 500000")
-                return True
-            
-            period = args[0].lower()
-            if period not in ["daily", "weekly"]:
-                send(phone, "❌ Period harus daily atau weekly")
-                return True
-            
-            try:
-                amount = int(args[1])
-                set_spending_target(phone, period, amount)
-                send(phone, f"✅ Target {period} ditetapkan: {format_currency(amount)}")
-            except ValueError:
-                send(phone, "❌ Amount harus angka")
-            return True
-
-        # ========== /breakdown ==========
-        if text.startswith("/breakdown"):
-            args = parse_command_args(text)
-            days = 30
-            if args:
-                try:
-                    days = int(args[0])
-                except ValueError:
-                    pass
-            
-            breakdown = get_category_breakdown(phone, days)
-            if not breakdown:
-                send(phone, f"📊 Tidak ada data untuk {days} hari terakhir")
-                return True
-            
-            msg = f"📊 BREAKDOWN {days} HARI:\n\n"
-            for category, data in breakdown.items():
-                msg += f"{category}: {format_currency(data['total'])} ({data['count']} transaksi)\n"
-            send(phone, msg)
-            return True
-
-        # ========== /ratio ==========
-        if text.startswith("/ratio"):
-            args = parse_command_args(text)
-            days = 30
-            if args:
-                try:
-                    days = int(args[0])
-                except ValueError:
-                    pass
-            
-            ratio = get_income_expense_ratio(phone, days)
-            if not ratio:
-                send(phone, f"📊 Tidak ada data untuk {days} hari terakhir")
-                return True
-            
-            msg = f"📊 INCOME vs EXPENSE ({days} hari):\n\n"
-            msg += f"Income: {format_currency(ratio['total_income'])}\n"
-            msg += f"Expense: {format_currency(ratio['total_expense'])}\n"
-            msg += f"Saved: {format_currency(ratio['saved'])}\n"
-            msg += f"Saving Rate: {ratio['saving_rate']:.1f}%"
-            send(phone, msg)
-            return True
-
-        # ========== /history ==========
-        if text.startswith("/history"):
-            args = parse_command_args(text)
-            category = None
-            days = 30
-            
-            if args:
-                try:
-                    days = int(args[0])
-                except ValueError:
-                    category = args[0]
-                    if len(args) > 1:
-                        try:
-                            days = int(args[1])
-                        except ValueError:
-                            pass
-            
-            history = search_transactions(phone, category, days)
-            if not history:
-                send(phone, f"📝 Tidak ada transaksi untuk {category or 'semua kategori'}")
-                return True
-            
-            msg = f"📝 HISTORY {category or 'ALL'} ({days} hari):\n\n"
-            for tx in history[:20]:  # Limit 20 entries
-                msg += f"{tx['category']} {tx['type']}: {format_currency(tx['amount'])}\n"
-            send(phone, msg)
-            return True
-
-        # ========== /setrecurring ==========
-        if text.startswith("/setrecurring"):
-            args = parse_command_args(text)
-            if len(args) < 3:
-                send(phone, "❌ Format: /setrecurring {kategori} {amount} {daily|weekly|monthly}\nContoh: /setrecurring bensin 100000 weekly")
-                return True
-            
-            category = args[0]
-            try:
-                amount = int(args[1])
-                frequency = args[2].lower()
-                if frequency not in ["daily", "weekly", "monthly"]:
-                    send(phone, "❌ Frequency harus daily, weekly, atau monthly")
-                    return True
-                
-                add_recurring(phone, category, amount, frequency, f"Auto {frequency}")
-                send(phone, f"✅ Recurring {category} {format_currency(amount)} ({frequency}) ditambahkan")
-            except ValueError:
-                send(phone, "❌ Amount harus angka")
-            return True
-
-        # ========== /recurring ==========
-        if text == "/recurring":
-            recurring = get_recurring(phone)
-            if not recurring:
-                send(phone, "❌ Belum ada recurring transaction")
-                return True
-            
-            msg = "🔄 DAFTAR RECURRING TRANSACTION:\n"
-            for i, item in enumerate(recurring, 1):
-                msg += f"\n{i}. {item['category']} {format_currency(item['amount'])} ({item['frequency']})"
-            send(phone, msg)
-            return True
-
-        # ========== /export ==========
-        if text.startswith("/export"):
-            args = parse_command_args(text)
-            days = 30
-            
-            if args:
-                try:
-                    days = int(args[0])
-                except ValueError:
-                    send(phone, "❌ Format: /export [hari]\nContoh: /export 30")
-                    return True
-            
-            try:
-                pdf_bytes = generate_export_pdf(phone, days)
-                if pdf_bytes:
-                    download_link = f"{APP_BASE_URL}/export/{phone}/{days}"
-                    send(phone, f"📄 Laporan Anda siap!\n\nKlik link di bawah untuk download:\n{download_link}\n\nLaporan berisi {days} hari transaksi terakhir Anda.")
-                    return True
-                else:
-                    send(phone, "❌ Gagal generate laporan")
-                    return True
-            except Exception as e:
-                print(f"[Export] Error: {e}")
-                send(phone, "❌ Error saat membuat laporan")
-                return True
-
-        # ========== FEATURE 3: GOAL TRACKING ====================================
-        
-        if text.startswith("/goal"):
-            # Handle: /goal {kategori} {amount}
-            args = parse_command_args(text)
-            
-            if len(args) < 2:
-                send(phone, "❌ Format: /goal {kategori} {amount}\nContoh: /goal saving 500000")
-                return True
-            
-            category = args[0]
-            try:
-                amount = int(args[1])
-                if set_goal(phone, category, amount):
-                    send(phone, f"🎯 Goal {category} ditetapkan: {format_currency(amount)}")
-                else:
-                    send(phone, "❌ Error membuat goal")
-            except ValueError:
-                send(phone, "❌ Amount harus berupa angka")
-            return True
-
-        if text == "/goals":
-            # Display semua goals dengan progress bar visual
-            goals = get_all_goals(phone)
-            
-            if not goals:
-                send(phone, "📋 Belum ada goals. Gunakan /goal untuk membuat.\nContoh: /goal saving 500000")
-                return True
-            
-            # Build message dengan progress bars
-            msg = "🎯 PROGRESS GOALS:\n\n"
-            for goal in goals:
-                progress = goal["progress"]
-                saved = progress["saved"]
-                target = progress["goal"]
-                percent = progress["percent"]
-                
-                # Create visual progress bar
-                filled = int(percent / 10)
-                bar = "█" * filled + "░" * (10 - filled)
-                
-                msg += f"{goal['category']}:\n"
-                msg += f"{bar} {percent:.0f}%\n"
-                msg += f"{format_currency(saved)} / {format_currency(target)}\n\n"
-            
-            send(phone, msg)
-            return True
-
-        # ========== FEATURE 4: SMART NOTIFICATIONS ==================================
-        
-        if text == "/dalert" or text == "/dailyalert":
-            # Display daily target status
-            alert = check_daily_target_exceeded(phone)
-            
-            if not alert:
-                send(phone, "📊 Belum ada daily target. Gunakan /target daily {amount}\nContoh: /target daily 500000")
-                return True
-            
-            # Build status message
-            msg = f"📊 DAILY TARGET STATUS\n\n"
-            msg += f"Target: {format_currency(alert['target'])}\n"
-            msg += f"Spent: {format_currency(alert['spent'])}\n"
-            
-            if alert['exceeded']:
-                msg += f"⚠️ Over: {format_currency(alert['over_by'])}"
-            else:
-                remaining = alert['target'] - alert['spent']
-                msg += f"✅ Remaining: {format_currency(remaining)}"
-            
-            send(phone, msg)
-            return True
-
-        if text == "/walert" or text == "/weeklyalert":
-            # Display weekly target status dengan days remaining
-            alert = check_weekly_target_exceeded(phone)
-            
-            if not alert:
-                send(phone, "📊 Belum ada weekly target. Gunakan /target weekly {amount}\nContoh: /target weekly 3500000")
-                return True
-            
-            # Build status message
-            msg = f"📊 WEEKLY TARGET STATUS\n\n"
-            msg += f"Target: {format_currency(alert['target'])}\n"
-            msg += f"Spent: {format_currency(alert['spent'])}\n"
-            msg += f"Days Left: {alert['days_remaining']}\n"
-            
-            if alert['exceeded']:
-                msg += f"⚠️ Over: {format_currency(alert['over_by'])}"
-            else:
-                remaining = alert['target'] - alert['spent']
-                msg += f"✅ Remaining: {format_currency(remaining)}"
-            
-            send(phone, msg)
-            return True
 
-        return False
+
+@command("/help")
+def cmd_help(phone, send):
+    send(phone, HELP_TEXT)
+
+
+# ========== /undo ==========
+@command("/undo")
+def cmd_undo(phone, send):
+    # Soft delete: baris ditandai tombstone, dihapus fisik oleh compaction job
+    tx = undo_last_transaction(phone)
+    if not tx:
+        send(phone, "⚠️ Tidak ada transaksi yang bisa di-undo.")
+        return
+
+    # Running total alert hari ini tidak lagi valid, di-seed ulang dari sheet
+    forget_alerts(phone)
+    send(phone, f"✅ Transaksi {tx['category']} {format_currency(tx['amount'])} dihapus")
+
+
+# ========== /summary ==========
+@command("/summary", ranges=(TRANSACTIONS,))
+def cmd_summary(phone, send):
+    income, expense, net = summarize_today_by_phone(phone)
+    msg = f"📊 RINGKASAN HARI INI\n\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
+    send(phone, msg)
+
+
+# ========== /weekly ==========
+@command("/weekly", ranges=(TRANSACTIONS,))
+def cmd_weekly(phone, send):
+    income, expense, net, count = summarize_week_by_phone(phone)
+    msg = f"📊 RINGKASAN MINGGU INI\n\nTransaksi: {count}\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
+    send(phone, msg)
+
+
+# ========== /monthly ==========
+@command("/monthly", ranges=(TRANSACTIONS,))
+def cmd_monthly(phone, send):
+    income, expense, net, count = summarize_month_by_phone(phone)
+    msg = f"📊 RINGKASAN BULAN INI\n\nTransaksi: {count}\nIncome: {format_currency(income)}\nExpense: {format_currency(expense)}\nNet: {format_currency(net)}\n\nSaving Rate: {((income - expense) / income * 100) if income > 0 else 0:.1f}%"
+    send(phone, msg)
+
+
+# ========== /setbudget ==========
+@command(
+    "/setbudget",
+    args=(Arg("category"), Arg("amount", int, error="❌ Amount harus angka")),
+    usage="❌ Format: /setbudget {kategori} {amount}\nContoh: /setbudget makan 500000",
+)
+def cmd_setbudget(phone, send, category, amount):
+    set_budget(phone, category, amount)
+    send(phone, f"✅ Budget {category} ditetapkan: {format_currency(amount)}")
+
+
+# ========== /budget ==========
+@command(
+    "/budget",
+    args=(Arg("category"),),
+    ranges=(BUDGETS,),
+    usage="❌ Format: /budget {kategori}\nContoh: /budget makan",
+)
+def cmd_budget(phone, send, category):
+    amount = get_budget(phone, category)
+    if amount == 0:
+        send(phone, f"❌ Belum ada budget untuk {category}")
+    else:
+        send(phone, f"💰 Budget {category}: {format_currency(amount)}")
+
+
+# ========== /budgets ==========
+@command("/budgets", ranges=(BUDGETS,))
+def cmd_budgets(phone, send):
+    budgets = get_all_budgets(phone)
+    if not budgets:
+        send(phone, "📋 Belum ada budget. Gunakan /setbudget")
+        return
+
+    msg = "💰 DAFTAR BUDGET:\n\n"
+    for category, amount in budgets.items():
+        msg += f"{category}: {format_currency(amount)}\n"
+    send(phone, msg)
+
+
+# ========== /target ==========
+@command(
+    "/target",
+    args=(
+        Arg("period", str.lower, choices=("daily", "weekly"), error="❌ Period harus daily atau weekly"),
+        Arg("amount", int, error="❌ Amount harus angka"),
+    ),
+    usage="❌ Format: /target {daily|weekly} {amount}\nContoh: /target daily 500000",
+)
+def cmd_target(phone, send, period, amount):
+    set_spending_target(phone, period, amount)
+    send(phone, f"✅ Target {period} ditetapkan: {format_currency(amount)}")
+
+
+# ========== /breakdown ==========
+@command("/breakdown", args=(Arg("days", int, default=30),), ranges=(TRANSACTIONS,))
+def cmd_breakdown(phone, send, days):
+    breakdown = get_category_breakdown(phone, days)
+    if not breakdown:
+        send(phone, f"📊 Tidak ada data untuk {days} hari terakhir")
+        return
+
+    msg = f"📊 BREAKDOWN {days} HARI:\n\n"
+    for category, data in breakdown.items():
+        msg += f"{category}: {format_currency(data['total'])} ({data['count']} transaksi)\n"
+    send(phone, msg)
+
+
+# ========== /ratio ==========
+@command("/ratio", args=(Arg("days", int, default=30),), ranges=(TRANSACTIONS,))
+def cmd_ratio(phone, send, days):
+    ratio = get_income_expense_ratio(phone, days)
+    if not ratio:
+        send(phone, f"📊 Tidak ada data untuk {days} hari terakhir")
+        return
+
+    msg = f"📊 INCOME vs EXPENSE ({days} hari):\n\n"
+    msg += f"Income: {format_currency(ratio['income'])}\n"
+    msg += f"Expense: {format_currency(ratio['expense'])}\n"
+    msg += f"Saved: {format_currency(ratio['saved'])}\n"
+    msg += f"Saving Rate: {ratio['saving_rate']:.1f}%"
+    send(phone, msg)
+
+
+# ========== /history ==========
+HISTORY_PAGE_SIZE = 20
+
+
+@command("/history", args=None)
+def cmd_history(phone, send, args):
+    # Format fleksibel: /history [{keyword} ...] [{hari}], lalu /history next
+    # untuk halaman berikutnya. Keyword dicocokkan ke note, kategori, dan tipe
+    # lewat inverted index (app/replica.py), bukan scan seluruh sheet.
+    if args and args[0].lower() == "next":
+        query = HISTORY_CURSORS.get(phone)
+        if not query:
+            send(phone, "📝 Tidak ada halaman berikutnya. Mulai dengan /history {keyword}")
+            return
+    else:
+        terms = list(args)
+        days = 30
+        if terms and terms[-1].isdigit():
+            days = int(terms.pop())
+        query = {
+            "terms": terms,
+            "days": days,
+            "start": (datetime.utcnow() - timedelta(days=days)).isoformat(),
+            "cursor": None,
+            "page": 0,
+        }
+
+    TRANSACTION_INDEX.sync()
+    history, cursor = TRANSACTION_INDEX.search(
+        phone, query["terms"], query["start"], query["cursor"], HISTORY_PAGE_SIZE
+    )
+    label = " ".join(query["terms"])
+    if not history:
+        HISTORY_CURSORS.pop(phone)
+        send(phone, f"📝 Tidak ada transaksi untuk {label or 'semua kategori'}")
+        return
+
+    query["page"] += 1
+    query["cursor"] = cursor
+    if cursor:
+        HISTORY_CURSORS.set(phone, query)
+    else:
+        HISTORY_CURSORS.pop(phone)
+
+    msg = f"📝 HISTORY {label.upper() or 'ALL'} ({query['days']} hari)"
+    msg += f" - hal. {query['page']}:\n\n" if query["page"] > 1 else ":\n\n"
+    for tx in history:
+        msg += f"{tx['timestamp'][:10]} {tx['category']} {tx['type']}: {format_currency(tx['amount'])}"
+        msg += f" ({tx['note']})\n" if query["terms"] else "\n"
+    if cursor:
+        msg += f"\nKetik /history next untuk {HISTORY_PAGE_SIZE} transaksi berikutnya"
+    send(phone, msg)
+
+
+# ========== /setrecurring ==========
+@command(
+    "/setrecurring",
+    args=(
+        Arg("category"),
+        Arg("amount", int, error="❌ Amount harus angka"),
+        Arg("frequency", str.lower, choices=("daily", "weekly", "monthly"),
+            error="❌ Frequency harus daily, weekly, atau monthly"),
+    ),
+    usage="❌ Format: /setrecurring {kategori} {amount} {daily|weekly|monthly}\nContoh: /setrecurring bensin 100000 weekly",
+)
+def cmd_setrecurring(phone, send, category, amount, frequency):
+    add_recurring(phone, category, amount, frequency, f"Auto {frequency}")
+    send(phone, f"✅ Recurring {category} {format_currency(amount)} ({frequency}) ditambahkan")
+
+
+# ========== /recurring ==========
+@command("/recurring", ranges=(RECURRING,))
+def cmd_recurring(phone, send):
+    recurring = get_recurring(phone)
+    if not recurring:
+        send(phone, "❌ Belum ada recurring transaction")
+        return
+
+    msg = "🔄 DAFTAR RECURRING TRANSACTION:\n"
+    for i, item in enumerate(recurring, 1):
+        msg += f"\n{i}. {item['category']} {format_currency(item['amount'])} ({item['frequency']})"
+    send(phone, msg)
+
+
+# ========== /export ==========
+@command(
+    "/export",
+    args=(Arg("days", int, default=30, error="❌ Format: /export [hari]\nContoh: /export 30"),),
+    ranges=(TRANSACTIONS,),
+)
+def cmd_export(phone, send, days):
+    try:
+        if EXPORT_DELIVERY == "document" and send_export_document(phone, days):
+            return
+        pdf_bytes = generate_export_pdf(phone, days)
+        if pdf_bytes:
+            download_link = f"{APP_BASE_URL}/export/{phone}/{days}"
+            send(phone, f"📄 Laporan Anda siap!\n\nKlik link di bawah untuk download:\n{download_link}\n\nLaporan berisi {days} hari transaksi terakhir Anda.")
+        else:
+            send(phone, "❌ Gagal generate laporan")
     except Exception as e:
-        print(f"[Command Handler] Error: {e}")
-        send(phone, "❌ Terjadi error saat memproses perintah Anda.")
+        ERRORS_SWALLOWED.inc(where="commands.cmd_export")
+        print(f"[Export] Error: {e}")
+        send(phone, "❌ Error saat membuat laporan")
+
+
+def _cached_media_id(key: str):
+    if SHARED_STORE is not None:
+        return SHARED_STORE.get(f"export_media:{key}")
+    return EXPORT_MEDIA.get(key)
+
+
+def _store_media_id(key: str, media_id):
+    if SHARED_STORE is not None:
+        SHARED_STORE.update(f"export_media:{key}", lambda _: media_id, ttl=EXPORT_MEDIA_TTL if media_id else 1)
+    elif media_id:
+        EXPORT_MEDIA.set(key, media_id)
+    else:
+        EXPORT_MEDIA.pop(key)
+
+
+def send_export_document(phone: str, days: int) -> bool:
+    """Kirim PDF export sebagai dokumen WhatsApp (EXPORT_DELIVERY=document).
+
+    PDF di-render dan di-upload ke media endpoint hanya jika belum ada media
+    id untuk (phone, days, export_data_version); request berikutnya dengan
+    data yang sama langsung mengirim ulang media id tersebut.
+
+    Returns:
+        bool: True jika dokumen terkirim, False jika perlu fallback ke link
+    """
+    key = f"{phone}:{days}:{export_data_version(phone, days)}"
+    filename = f"laporan_{phone}_{days}hari.pdf"
+    caption = f"📄 Laporan {days} hari transaksi terakhir Anda"
+
+    media_id = _cached_media_id(key)
+    if media_id and send_whatsapp_document(phone, media_id, filename, caption):
+        print(f"[Export] Reused media {media_id} for {phone}, days={days}")
         return True
+    if media_id:
+        # Media kadaluarsa atau dihapus: upload ulang
+        _store_media_id(key, None)
+
+    pdf_bytes = generate_export_pdf(phone, days)
+    if not pdf_bytes:
+        return False
+    media_id = upload_media(pdf_bytes, "application/pdf", filename)
+    if not media_id:
+        return False
+    _store_media_id(key, media_id)
+    return send_whatsapp_document(phone, media_id, filename, caption)
+
+
+# ========== FEATURE 3: GOAL TRACKING ====================================
+
+@command(
+    "/goal",
+    args=(Arg("category"), Arg("amount", int, error="❌ Amount harus berupa angka")),
+    usage="❌ Format: /goal {kategori} {amount}\nContoh: /goal saving 500000",
+)
+def cmd_goal(phone, send, category, amount):
+    if set_goal(phone, category, amount):
+        send(phone, f"🎯 Goal {category} ditetapkan: {format_currency(amount)}")
+    else:
+        send(phone, "❌ Error membuat goal")
+
+
+@command("/goals", ranges=(GOALS, TRANSACTIONS))
+def cmd_goals(phone, send):
+    # Display semua goals dengan progress bar visual
+    goals = get_all_goals(phone)
+
+    if not goals:
+        send(phone, "📋 Belum ada goals. Gunakan /goal untuk membuat.\nContoh: /goal saving 500000")
+        return
+
+    # Build message dengan progress bars
+    msg = "🎯 PROGRESS GOALS:\n\n"
+    for goal in goals:
+        progress = goal["progress"]
+        saved = progress["saved"]
+        target = progress["goal"]
+        percent = progress["percent"]
+
+        # Create visual progress bar
+        filled = int(percent / 10)
+        bar = "█" * filled + "░" * (10 - filled)
+
+        msg += f"{goal['category']}:\n"
+        msg += f"{bar} {percent:.0f}%\n"
+        msg += f"{format_currency(saved)} / {format_currency(target)}\n\n"
+
+    send(phone, msg)
+
+
+# ========== FEATURE 4: SMART NOTIFICATIONS ==================================
+
+@command("/dalert", "/dailyalert", ranges=(TARGETS, TRANSACTIONS))
+def cmd_dalert(phone, send):
+    # Display daily target status
+    alert = check_daily_target_exceeded(phone)
+
+    if not alert:
+        send(phone, "📊 Belum ada daily target. Gunakan /target daily {amount}\nContoh: /target daily 500000")
+        return
+
+    # Build status message
+    msg = f"📊 DAILY TARGET STATUS\n\n"
+    msg += f"Target: {format_currency(alert['target'])}\n"
+    msg += f"Spent: {format_currency(alert['spent'])}\n"
+
+    if alert['exceeded']:
+        msg += f"⚠️ Over: {format_currency(alert['over_by'])}"
+    else:
+        remaining = alert['target'] - alert['spent']
+        msg += f"✅ Remaining: {format_currency(remaining)}"
+
+    send(phone, msg)
+
+
+@command("/walert", "/weeklyalert", ranges=(TARGETS, TRANSACTIONS))
+def cmd_walert(phone, send):
+    # Display weekly target status dengan days remaining
+    alert = check_weekly_target_exceeded(phone)
+
+    if not alert:
+        send(phone, "📊 Belum ada weekly target. Gunakan /target weekly {amount}\nContoh: /target weekly 3500000")
+        return
+
+    # Build status message
+    msg = f"📊 WEEKLY TARGET STATUS\n\n"
+    msg += f"Target: {format_currency(alert['target'])}\n"
+    msg += f"Spent: {format_currency(alert['spent'])}\n"
+    msg += f"Days Left: {alert['days_remaining']}\n"
+
+    if alert['exceeded']:
+        msg += f"⚠️ Over: {format_currency(alert['over_by'])}"
+    else:
+        remaining = alert['target'] - alert['spent']
+        msg += f"✅ Remaining: {format_currency(remaining)}"
 
+    send(phone, msg)
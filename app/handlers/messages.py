@@ -1,32 +1,68 @@
 """Handler untuk transaksi reguler (non-command messages).
 
 Modul ini menangani:
-- Parsing input transaksi dari user (contoh: "makan 25000")
+- Parsing input transaksi dari user (contoh: "makan 25000"), termasuk
+  pesan multi-baris yang berisi beberapa transaksi sekaligus
 - Menyimpan transaksi ke Google Sheets
 - Trigger automatic alerts (budget exceeded, daily target exceeded)
 """
 
 from app.parser import parse_message
+from app.metrics import PARSE_LATENCY, DEDUPE_HITS, ERRORS_SWALLOWED
 from app.sheets import (
-    insert_transaction, 
-    has_message_id, 
-    check_budget_exceeded, 
-    check_daily_target_exceeded
+    insert_transactions,
+    has_message_ids,
 )
+from app.alerts import evaluate_alerts, BUDGET
+
+
+def parse_transaction_lines(text, message_id):
+    """Parse input multi-baris menjadi satu transaksi per baris.
+
+    Contoh input (satu pesan WhatsApp):
+        makan 25k
+        bensin 50k
+        kopi 18k
+
+    Message ID per baris diturunkan dari message ID WhatsApp
+    ({message_id}-{index}) supaya anti-duplicate tetap jalan saat retry.
+    Pesan satu baris tetap memakai message ID aslinya.
+
+    Args:
+        text (str): Input dari user
+        message_id (str): Unique ID dari WhatsApp
+
+    Returns:
+        tuple: (entries, skipped) - entries berupa list of (parsed, line_message_id),
+               skipped berupa list baris yang tidak bisa di-parse
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    entries = []
+    skipped = []
+    for i, line in enumerate(lines):
+        parsed = parse_message(line)
+        if not parsed:
+            skipped.append(line)
+            continue
+        line_id = message_id if len(lines) == 1 else f"{message_id}-{i}"
+        entries.append((parsed, line_id))
+    return entries, skipped
 
 
 def handle_transaction(text, phone, message_id, send):
     """Handle regular transaction input dari user (bukan command).
     
     Flow:
-    1. Parse input text menjadi struktur (kategori, amount, tipe)
-    2. Simpan ke database jika belum pernah (anti-duplicate via message_id)
-    3. Kirim konfirmasi ke user
-    4. Check budget alerts (FEATURE 1)
-    5. Check daily/weekly target alerts (FEATURE 4)
+    1. Parse input text per baris menjadi struktur (kategori, amount, tipe)
+    2. Simpan semua baris baru ke database dengan satu batch append
+       (anti-duplicate via message_id per baris)
+    3. Kirim satu konfirmasi gabungan ke user
+    4. Alert budget kategori (FEATURE 1) dan daily target (FEATURE 4),
+       hanya saat total melewati threshold baru (app/alerts.py)
     
     Args:
-        text (str): Input dari user (misal: "makan 25000" atau "gaji 5000000")
+        text (str): Input dari user (misal: "makan 25000", atau beberapa
+            transaksi dipisah baris baru)
         phone (str): Nomor WhatsApp user
         message_id (str): Unique ID dari WhatsApp untuk anti-duplicate
         send (function): Fungsi untuk mengirim pesan balik ke user
@@ -35,55 +71,98 @@ def handle_transaction(text, phone, message_id, send):
         None (result hanya via send() callback)
     """
     try:
-        # Parse input text menjadi struktur data
-        parsed = parse_message(text)
-        if not parsed:
+        # Parse input text menjadi struktur data (satu per baris)
+        with PARSE_LATENCY.time(stage="transaction"):
+            entries, skipped = parse_transaction_lines(text, message_id)
+        if not entries:
             send(phone, "❌ Format tidak dikenali. Contoh: Makan siang 25000")
             return
 
         # Simpan transaksi hanya jika belum pernah diproses sebelumnya
-        if not has_message_id(message_id):
-            insert_transaction(phone, parsed, message_id)
+        existing = has_message_ids([line_id for _, line_id in entries])
+        if existing:
+            DEDUPE_HITS.inc(len(existing), source="message_id")
+        new_entries = [e for e in entries if e[1] not in existing]
+        inserted = insert_transactions(phone, new_entries)
 
         # Kirim konfirmasi kesuksesan
-        send(phone, f"✅ {parsed['category']} {parsed['amount']} dicatat")
-        
-        # ========== FEATURE 1: BUDGET ALERT OTOMATIS ==========
-        # Kirim alert jika pengeluaran melebihi budget kategori
-        if parsed["type"] == "expense":
-            budget_alert = check_budget_exceeded(
-                phone, 
-                parsed["category"], 
-                parsed["amount"]
-            )
-            
-            # Hanya send alert jika budget terlampaui
-            if budget_alert and budget_alert["exceeded"]:
-                overage = budget_alert["new_total"] - budget_alert["budget"]
-                alert_msg = (
-                    f"⚠️ BUDGET ALERT\n"
-                    f"Kategori: {parsed['category']}\n"
-                    f"Budget: Rp {budget_alert['budget']:,.0f}\n"
-                    f"Spent: Rp {budget_alert['new_total']:,.0f}\n"
-                    f"Over: Rp {overage:,.0f}"
+        send(phone, format_confirmation(entries, skipped))
+
+        # Total pengeluaran baru per kategori untuk alert; hanya baris yang
+        # benar-benar dicatat (retry yang di-dedupe tidak dihitung ulang)
+        expenses = {}
+        for parsed, _ in (new_entries if inserted else []):
+            if parsed["type"] == "expense":
+                expenses[parsed["category"]] = (
+                    expenses.get(parsed["category"], 0) + parsed["amount"]
                 )
-                send(phone, alert_msg)
         
-        # ========== FEATURE 4: SMART NOTIFICATION - Daily Target ==========
-        # Kirim alert jika pengeluaran harian melebihi target
-        if parsed["type"] == "expense":
-            daily_alert = check_daily_target_exceeded(phone)
-            
-            # Hanya send alert jika daily target terlampaui
-            if daily_alert and daily_alert["exceeded"]:
-                alert_msg = (
-                    f"⚠️ DAILY TARGET EXCEEDED\n"
-                    f"Target: Rp {daily_alert['target']:,.0f}\n"
-                    f"Spent: Rp {daily_alert['spent']:,.0f}\n"
-                    f"Over: Rp {daily_alert['over_by']:,.0f}"
-                )
-                send(phone, alert_msg)
-                
+        # ========== FEATURE 1 & 4: BUDGET ALERT / DAILY TARGET ==========
+        # Alert hanya dikirim saat total melewati threshold baru (app/alerts.py)
+        if expenses:
+            for alert in evaluate_alerts(phone, expenses):
+                send(phone, format_alert(alert))
+
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="messages.handle_transaction")
         print(f"[Transaction Handler] Error: {e}")
         send(phone, "❌ Terjadi error saat mencatat transaksi.")
+
+
+def format_alert(alert):
+    """Susun pesan alert budget / daily target dari hasil evaluate_alerts.
+
+    Args:
+        alert (dict): {"scope", "category", "threshold", "limit", "total"}
+
+    Returns:
+        str: Pesan alert siap kirim
+    """
+    total, limit, threshold = alert["total"], alert["limit"], alert["threshold"]
+    if alert["scope"] == BUDGET:
+        title = "BUDGET ALERT" if threshold >= 100 else "BUDGET WARNING"
+        lines = [f"Kategori: {alert['category']}", f"Budget: Rp {limit:,.0f}"]
+    else:
+        title = "DAILY TARGET EXCEEDED" if threshold >= 100 else "DAILY TARGET WARNING"
+        lines = [f"Target: Rp {limit:,.0f}"]
+    lines.append(f"Spent: Rp {total:,.0f} ({threshold}%)")
+    if total > limit:
+        lines.append(f"Over: Rp {total - limit:,.0f}")
+    else:
+        lines.append(f"Sisa: Rp {limit - total:,.0f}")
+    return f"⚠️ {title}\n" + "\n".join(lines)
+
+
+def format_confirmation(entries, skipped):
+    """Susun satu pesan konfirmasi untuk semua transaksi yang dicatat.
+
+    Args:
+        entries (list): List of (parsed, message_id) yang berhasil di-parse
+        skipped (list): Baris yang tidak dikenali
+
+    Returns:
+        str: Pesan konfirmasi siap kirim
+    """
+    if len(entries) == 1 and not skipped:
+        parsed = entries[0][0]
+        return f"✅ {parsed['category']} {parsed['amount']} dicatat"
+
+    msg = f"✅ {len(entries)} transaksi dicatat:"
+    for parsed, _ in entries:
+        msg += f"\n• {parsed['category']} {parsed['amount']} ({parsed['type']})"
+
+    expense = sum(p["amount"] for p, _ in entries if p["type"] == "expense")
+    income = sum(p["amount"] for p, _ in entries if p["type"] == "income")
+    totals = []
+    if expense:
+        totals.append(f"Total expense: Rp {expense:,.0f}")
+    if income:
+        totals.append(f"Total income: Rp {income:,.0f}")
+    if totals:
+        msg += "\n\n" + "\n".join(totals)
+
+    if skipped:
+        msg += "\n\n❌ Tidak dikenali:"
+        for line in skipped:
+            msg += f"\n• {line}"
+    return msg
@@ -4,24 +4,52 @@ Modul ini menghandle:
 - WhatsApp webhook listener untuk incoming messages
 - Command dan transaction routing
 - PDF export endpoint
+- CSV import endpoint (mutasi rekening bank)
 - Health check endpoints
 - Background scheduler untuk daily auto reports (FEATURE 2)
 """
 
-from fastapi import FastAPI, Request
-from fastapi.responses import PlainTextResponse, FileResponse, StreamingResponse
-from time import time
+from fastapi import FastAPI, Request, UploadFile, File, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, FileResponse, StreamingResponse, JSONResponse
+from time import time, perf_counter
 from apscheduler.schedulers.background import BackgroundScheduler
 
-from app.config import VERIFY_TOKEN
-from app.state import RATE_LIMIT, SEEN_MESSAGE_IDS, cleanup_seen_ids
+from app.config import VERIFY_TOKEN, IMPORT_API_TOKEN, RECONCILE_INTERVAL_SECONDS, WARM_START_PATH, WARM_START_SAVE_SECONDS
+from app.state import SEEN_MESSAGE_IDS
+from app.ratelimit import check_rate_limit, message_kind, SLOW_DOWN_MESSAGE
+from app.shared_state import is_leader, release_leadership, WORKER_ID
+from app.profiling import PROFILING_ENABLED, should_profile, profile_request
+from app.state import RATE_LIMIT
+from app import metrics
+from app.metrics import (
+    WEBHOOK_LATENCY,
+    PARSE_LATENCY,
+    SCHEDULER_JOB_LATENCY,
+    DEDUPE_HITS,
+    ERRORS_SWALLOWED,
+    CallbackGauge,
+)
 from app.handlers.commands import handle_command
 from app.handlers.messages import handle_transaction
 from app.whatsapp import send_whatsapp_message
-from app.sheets import generate_export_pdf, get_all_user_phones, get_daily_summary
+from app.replies import ReplyBuilder, deliver as deliver_replies, flush_pending as flush_pending_replies
+from app.recurring import RECURRING_QUEUE, RECURRING_TICK_SECONDS
+from app.warm_start import READY, save_snapshot, warm_start
+from app.sheets import (
+    generate_export_pdf, get_all_user_phones, get_daily_summary, import_transactions, compact_transactions,
+    read_snapshot, buffered_appends, flush_appends, ensure_meta_tab, reconcile_tabs, daily_totals_all_users,
+    TRANSACTIONS_RANGE,
+)
+from app import async_sheets
+from app.parser import map_statement_header, parse_statement_row
 import os
 from datetime import datetime
 import io
+import csv
+import hmac
+import functools
+import threading
 
 app = FastAPI()
 
@@ -32,6 +60,31 @@ app = FastAPI()
 
 scheduler = BackgroundScheduler()
 
+# Dengan beberapa worker, scheduler jalan di setiap proses tapi job hanya
+# dieksekusi oleh proses yang memegang leader lock (lihat app/shared_state.py)
+SCHEDULER_LOCK = "scheduler"
+SCHEDULER_LOCK_TTL = 90
+
+
+def leader_only(job):
+    """Bungkus scheduled job supaya hanya jalan di worker leader."""
+    @functools.wraps(job)
+    def wrapper(*args, **kwargs):
+        if not is_leader(SCHEDULER_LOCK, SCHEDULER_LOCK_TTL):
+            print(f"[SCHEDULER] SKIP {job.__name__}: {WORKER_ID} bukan leader")
+            return None
+        with SCHEDULER_JOB_LATENCY.time(job=job.__name__):
+            return job(*args, **kwargs)
+    return wrapper
+
+
+def renew_leadership():
+    """Heartbeat leader lock supaya leader tidak berpindah-pindah antar job."""
+    if not is_leader(SCHEDULER_LOCK, SCHEDULER_LOCK_TTL):
+        # Heap recurring di worker non-leader bisa basi (last_run diupdate leader lain)
+        RECURRING_QUEUE.invalidate()
+
+
 def send_daily_reports():
     """Background job yang berjalan setiap hari pada jam yang ditentukan.
     
@@ -50,11 +103,14 @@ def send_daily_reports():
         phones = get_all_user_phones()
         print(f"[SCHEDULER] Starting daily report job for {len(phones)} users")
         
+        # Income/expense hari ini untuk semua user dihitung sekali (vectorized)
+        totals = daily_totals_all_users()
+        
         # Kirim report ke setiap user
         for phone in phones:
             try:
                 # Generate summary khusus untuk user ini
-                summary = get_daily_summary(phone)
+                summary = get_daily_summary(phone, totals.get(phone, (0, 0)) if totals else None)
                 if summary:
                     # Kirim via WhatsApp
                     send_whatsapp_message(phone, summary)
@@ -62,13 +118,15 @@ def send_daily_reports():
                 else:
                     print(f"[SCHEDULER] SKIP No summary for {phone}")
             except Exception as e:
+                ERRORS_SWALLOWED.inc(where="main.send_daily_reports")
                 print(f"[SCHEDULER] ERR {phone}: {e}")
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.send_daily_reports")
         print(f"[SCHEDULER] FATAL: {e}")
 
 # Schedule daily report at 21:00 UTC (9 PM Jakarta time = 02:00 next day)
 scheduler.add_job(
-    send_daily_reports, 
+    leader_only(send_daily_reports), 
     'cron', 
     hour=21,
     minute=0,
@@ -76,6 +134,94 @@ scheduler.add_job(
     name='Daily Report Job'
 )
 
+
+def process_recurring():
+    """Background job: insert recurring transactions yang sudah jatuh tempo.
+
+    Item disimpan di min-heap (app/recurring.py), jadi tiap tick hanya item
+    yang due yang diproses: satu append ke Database_Input dan satu
+    batchUpdate last_run untuk semua user sekaligus.
+    """
+    try:
+        inserted = RECURRING_QUEUE.run_due()
+        if inserted:
+            print(f"[SCHEDULER] OK {inserted} recurring transactions inserted")
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.process_recurring")
+        print(f"[SCHEDULER] ERR recurring: {e}")
+
+scheduler.add_job(
+    leader_only(process_recurring),
+    'interval',
+    seconds=RECURRING_TICK_SECONDS,
+    id='recurring_transactions',
+    name='Recurring Transactions Job'
+)
+
+
+def compact_tombstones():
+    """Background job: hapus fisik transaksi yang sudah di-undo (tombstone).
+
+    /undo hanya menandai kolom status, jadi baris tidak bergeser saat jam
+    ramai. Job ini menghapusnya sekaligus di jam sepi.
+    """
+    try:
+        removed = compact_transactions()
+        print(f"[SCHEDULER] OK Compaction removed {removed} rows")
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.compact_tombstones")
+        print(f"[SCHEDULER] ERR compaction: {e}")
+
+# Compaction jam 19:00 UTC (02:00 WIB), di luar jam ramai
+scheduler.add_job(
+    leader_only(compact_tombstones),
+    'cron',
+    hour=19,
+    minute=0,
+    id='compact_tombstones',
+    name='Tombstone Compaction Job'
+)
+
+def reconcile_sheets():
+    """Background job: gabungkan edit manual di spreadsheet ke cache dan replica.
+
+    Jalan di setiap worker (cache tab dan replica milik masing-masing
+    proses). Hanya leader yang menambah formula fingerprint di _blocks.
+    """
+    try:
+        reconcile_tabs(ensure_formulas=is_leader(SCHEDULER_LOCK, SCHEDULER_LOCK_TTL))
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.reconcile_sheets")
+        print(f"[SCHEDULER] ERR reconcile: {e}")
+
+if RECONCILE_INTERVAL_SECONDS > 0:
+    scheduler.add_job(
+        reconcile_sheets,
+        'interval',
+        seconds=RECONCILE_INTERVAL_SECONDS,
+        id='reconcile_sheets',
+        name='Sheet Block Reconciliation Job'
+    )
+
+# Snapshot disimpan oleh setiap worker (cache milik proses masing-masing);
+# penulisan atomik, jadi worker di host yang sama cukup saling menimpa
+if WARM_START_PATH and WARM_START_SAVE_SECONDS > 0:
+    scheduler.add_job(
+        save_snapshot,
+        'interval',
+        seconds=WARM_START_SAVE_SECONDS,
+        id='warm_start_snapshot',
+        name='Warm-start Snapshot Job'
+    )
+
+scheduler.add_job(
+    renew_leadership,
+    'interval',
+    seconds=SCHEDULER_LOCK_TTL // 3,
+    id='leader_heartbeat',
+    name='Scheduler Leader Heartbeat'
+)
+
 @app.on_event("startup")
 async def startup_event():
     """Dijalankan saat aplikasi start (deployment atau restart).
@@ -83,12 +229,21 @@ async def startup_event():
     Tugas:
     - Start APScheduler background scheduler
     - Scheduler akan mulai menjalankan scheduled jobs
+    - Coba ambil leader lock (multi-worker: hanya leader yang menjalankan job)
+    - Pastikan tab _meta ada (change detection untuk cache tab Sheets);
+      formula _blocks hanya ditambahkan oleh leader
+    - Muat warm-start snapshot + delta di background; /health 503 sampai selesai
     """
+    ensure_meta_tab(ensure_formulas=is_leader(SCHEDULER_LOCK, SCHEDULER_LOCK_TTL))
+    threading.Thread(target=warm_start, name="warm-start", daemon=True).start()
     try:
+        renew_leadership()
         scheduler.start()
         print("[SCHEDULER] OK Background scheduler started")
         print("[SCHEDULER] Daily reports at 21:00 UTC")
+        print(f"[SCHEDULER] Recurring transactions every {RECURRING_TICK_SECONDS}s")
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.startup_event")
         print(f"[SCHEDULER] ERR startup: {e}")
 
 @app.on_event("shutdown")
@@ -97,20 +252,55 @@ async def shutdown_event():
     
     Tugas:
     - Stop APScheduler dengan graceful shutdown
+    - Lepas leader lock supaya worker lain bisa langsung mengambil alih
+    - Kirim balasan WhatsApp yang masih ditahan (REPLY_LINGER_SECONDS)
+    - Simpan warm-start snapshot untuk start berikutnya
     - Ensure tidak ada zombie processes
     """
     try:
         scheduler.shutdown()
+        flush_pending_replies()
+        if READY.is_set():
+            save_snapshot()
+        await async_sheets.close_client()
+        release_leadership(SCHEDULER_LOCK)
         print("[SCHEDULER] OK Background scheduler stopped")
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.shutdown_event")
         print(f"[SCHEDULER] ERR shutdown: {e}")
 
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint - verifikasi bot masih berjalan."""
+    """Health check endpoint - verifikasi bot masih berjalan.
+
+    Return 503 selama warm-start (snapshot + delta Sheets) belum selesai,
+    supaya load balancer belum mengirim traffic ke worker ini.
+    """
+    if not READY.is_set():
+        return JSONResponse({"status": "starting", "message": "Warm start in progress"}, status_code=503)
     return {"status": "ok", "message": "Bot is running"}
 
+# Statistik state in-memory yang sudah ada, diekspos sebagai gauge
+CallbackGauge(
+    "seen_message_ids",
+    "Statistik cache dedupe SEEN_MESSAGE_IDS",
+    lambda: {(k,): v for k, v in SEEN_MESSAGE_IDS.stats().items()},
+    labels=("stat",),
+)
+CallbackGauge(
+    "rate_limit_state",
+    "Statistik cache bucket RATE_LIMIT",
+    lambda: {(k,): v for k, v in RATE_LIMIT.stats().items()},
+    labels=("stat",),
+)
+
+
+@app.get("/metrics")
+async def metrics_endpoint():
+    """Metrics in-process dalam format text Prometheus."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/config")
 async def config_check():
     """Debug config endpoint - lihat konfigurasi APP_BASE_URL."""
@@ -123,48 +313,170 @@ async def config_check():
 
 @app.post("/webhook")
 async def webhook(request: Request):
-    """WhatsApp webhook listener - menerima dan memproses incoming messages.
-    
-    Flow:
-    1. Terima JSON dari WhatsApp Cloud API
-    2. Extract nomor pengirim (phone), text message, message ID
-    3. Anti-duplicate check via SEEN_MESSAGE_IDS
-    4. Route ke /command handler atau /transaction handler
-    5. Return status response ke WhatsApp
+    """WhatsApp webhook listener (lihat process_webhook).
+
+    Jika profiling aktif (PROFILE_SAMPLE_RATE / header X-Debug-Profile),
+    request ini di-capture dengan cProfile + tracemalloc.
     """
-    try:
-        data = await request.json()
-        msg = data["entry"][0]["changes"][0]["value"].get("messages")
-        if not msg:
-            return {"status": "ok"}
+    return await process_webhook(request, PROFILING_ENABLED and should_profile(request))
+
+
+def iter_webhook_messages(data: dict):
+    """Yield semua pesan teks di payload webhook (semua entry, change, message).
+
+    WhatsApp bisa mengirim beberapa entry/change/message dalam satu POST,
+    terutama saat traffic tinggi.
+    """
+    for entry in data.get("entry") or []:
+        for change in entry.get("changes") or []:
+            for msg in (change.get("value") or {}).get("messages") or []:
+                if "text" in msg and "from" in msg and "id" in msg:
+                    yield msg
+
+
+def group_by_phone(messages) -> dict:
+    """Kelompokkan pesan per phone; urutan pesan per phone tetap dipertahankan."""
+    groups = {}
+    for msg in messages:
+        groups.setdefault(msg["from"], []).append(msg)
+    return groups
+
 
-        msg = msg[0]
+def handle_message(msg: dict, send) -> str:
+    """Proses satu pesan: dedupe, rate limit, lalu command atau transaksi.
+
+    Returns:
+        str: kind untuk metrics (command, transaction, duplicate, rate_limited, error)
+    """
+    try:
         phone = msg["from"]
         text = msg["text"]["body"].lower().strip()
         message_id = msg["id"]
 
-        # Cleanup old seen message IDs dan cek duplicate
-        now = time()
-        cleanup_seen_ids(now)
+        # Cek duplicate (expired IDs dibuang otomatis oleh TTLCache)
+        if not SEEN_MESSAGE_IDS.add(message_id, time()):
+            DEDUPE_HITS.inc(source="webhook")
+            return "duplicate"
 
-        if message_id in SEEN_MESSAGE_IDS:
-            return {"status": "ok"}  # Duplicate, ignore
-        SEEN_MESSAGE_IDS[message_id] = now
+        # Rate limit per phone sebelum menyentuh Google Sheets
+        limit = check_rate_limit(phone, message_kind(text))
+        if limit != "allowed":
+            if limit == "notify":
+                send(phone, SLOW_DOWN_MESSAGE)
+            return "rate_limited"
 
-        # Try command handler first
-        if handle_command(text, phone, send_whatsapp_message):
-            return {"status": "ok"}
+        # Command bisa membaca sheet / replica secara langsung (/undo,
+        # /history), jadi transaksi yang masih di-buffer dikirim dulu
+        if text.startswith("/"):
+            flush_appends()
+            if handle_command(text, phone, send):
+                return "command"
 
         # If not command, handle as transaction
-        handle_transaction(text, phone, message_id, send_whatsapp_message)
-        return {"status": "ok"}
+        handle_transaction(text, phone, message_id, send)
+        return "transaction"
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.handle_message")
+        print(f"[Webhook] Error: {e}")
+        return "error"
+
+
+def process_messages(messages: list) -> list:
+    """Proses semua pesan satu payload (blocking, dijalankan di threadpool).
+
+    Seluruh batch memakai read snapshot aktif dan append transaksi digabung
+    menjadi satu request saat batch selesai. Balasan WhatsApp dikirim
+    setelah data tersimpan: semua fragmen untuk satu phone (konfirmasi,
+    alert, ...) digabung menjadi satu pesan (lihat app/replies.py).
+
+    Returns:
+        list: kind per pesan (lihat handle_message)
+    """
+    replies = ReplyBuilder()
+
+    kinds = []
+    with read_snapshot(), buffered_appends():
+        for phone, phone_messages in group_by_phone(messages).items():
+            for msg in phone_messages:
+                kinds.append(handle_message(msg, replies.send))
+
+    deliver_replies(replies, send_whatsapp_message)
+    return kinds
+
+
+def run_profiled(name: str, profile: bool, fn, *args):
+    """Jalankan fn (di thread pemanggil), dengan cProfile jika profile=True."""
+    if profile:
+        with profile_request(name):
+            return fn(*args)
+    return fn(*args)
+
+
+async def process_webhook(request: Request, profile: bool = False):
+    """WhatsApp webhook listener - menerima dan memproses incoming messages.
+    
+    Flow:
+    1. Terima JSON dari WhatsApp Cloud API
+    2. Ambil semua pesan di payload, kelompokkan per phone (urutan per
+       phone tetap)
+    3. Baca _meta lewat client Sheets async (tanpa memblokir event loop)
+    4. Proses batch di threadpool (process_messages): anti-duplicate, rate
+       limit, route ke command / transaksi (lihat handle_message), lalu
+       kirim balasan
+    5. Return status response ke WhatsApp
+
+    Event loop tidak pernah menunggu call Sheets/WhatsApp yang blocking,
+    jadi satu request Sheets yang lambat tidak menahan user lain.
+
+    Latency end-to-end dicatat di WEBHOOK_LATENCY dengan label kind
+    (command, transaction, duplicate, rate_limited, empty, error, atau
+    batch jika payload berisi lebih dari satu pesan).
+    """
+    start = perf_counter()
+    kind = "error"
+    try:
+        with PARSE_LATENCY.time(stage="payload"):
+            data = await request.json()
+            messages = list(iter_webhook_messages(data))
+        if not messages:
+            kind = "empty"
+            return {"status": "ok"}
+
+        # Snapshot dibuat di event loop; contextvar-nya ikut ke threadpool
+        with read_snapshot():
+            await async_sheets.tab_versions()
+            kinds = await run_in_threadpool(run_profiled, "webhook", profile, process_messages, messages)
+
+        kind = kinds[0] if len(kinds) == 1 else "batch"
+        result = {"status": "ok"}
+        if len(kinds) > 1:
+            result["messages"] = len(kinds)
+        if "rate_limited" in kinds:
+            result["rate_limited"] = True
+        return result
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.process_webhook")
         print(f"[Webhook] Error: {e}")
         return {"status": "error", "message": str(e)}
+    finally:
+        WEBHOOK_LATENCY.observe(perf_counter() - start, kind=kind)
 
 
 @app.get("/export/{phone}/{days}")
-async def export_pdf(phone: str, days: int = 30):
+async def export_pdf(request: Request, phone: str, days: int = 30):
+    """Endpoint download PDF (lihat build_export_response, dijalankan di threadpool).
+
+    Jika profiling aktif (PROFILE_SAMPLE_RATE / header X-Debug-Profile),
+    request ini di-capture dengan cProfile + tracemalloc.
+    """
+    profile = PROFILING_ENABLED and should_profile(request)
+    with read_snapshot():
+        # Data transaksi dibaca async; render PDF (blocking) di threadpool
+        await async_sheets.read_ranges([TRANSACTIONS_RANGE])
+        return await run_in_threadpool(run_profiled, "export", profile, build_export_response, phone, days)
+
+
+def build_export_response(phone: str, days: int):
     """Generate dan download PDF laporan transaksi.
     
     Endpoint ini:
@@ -222,6 +534,7 @@ async def export_pdf(phone: str, days: int = 30):
         )
         
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.build_export_response")
         print(f"[Export] FATAL: {str(e)}")
         import traceback
         error_trace = traceback.format_exc()
@@ -235,3 +548,87 @@ async def export_pdf(phone: str, days: int = 30):
         }
 
 
+
+
+def iter_statement_rows(binary_file):
+    """Buka CSV mutasi rekening dan validasi header-nya sekarang juga.
+
+    File dibaca baris per baris, jadi memory tidak bergantung ukuran upload.
+    Baris yang tidak valid di-yield sebagai None supaya tetap terhitung.
+
+    Returns:
+        iterator: Transaksi hasil parse_statement_row per baris data
+
+    Raises:
+        ValueError: Jika header tidak punya kolom tanggal dan amount/debit/credit
+            (sebelum ada read/quota Sheets yang terpakai)
+    """
+    text_file = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    try:
+        sample = text_file.read(4096)
+        text_file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+
+        reader = csv.reader(text_file, dialect)
+        columns = map_statement_header(next(reader, []))
+        if "date" not in columns or not ({"amount", "debit", "credit"} & columns.keys()):
+            raise ValueError("CSV header harus punya kolom tanggal dan amount/debit/credit")
+    except Exception:
+        text_file.detach()
+        raise
+    return _statement_rows(text_file, reader, columns)
+
+
+def _statement_rows(text_file, reader, columns):
+    try:
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield parse_statement_row(row, columns)
+    finally:
+        text_file.detach()
+
+
+@app.post("/import/{phone}")
+async def import_csv(
+    phone: str,
+    file: UploadFile = File(...),
+    authorization: str = Header(None),
+):
+    """Import histori transaksi dari CSV mutasi rekening bank.
+
+    Endpoint ini:
+    1. Validasi token (header "Authorization: Bearer {IMPORT_API_TOKEN}")
+    2. Validasi header CSV (kolom tanggal, keterangan, amount atau debit/credit)
+       sebelum menyentuh Sheets, lalu parse sisanya sebagai stream
+    3. Kategorisasi tiap baris pakai CATEGORY_MAP dari parser.py
+    4. Dedupe lewat index message ID, lalu append ke Database_Input
+       secara batch lewat quota governor
+
+    Example:
+        curl -H "Authorization: Bearer $TOKEN" -F file=@mutasi.csv \\
+            $APP_BASE_URL/import/6282210401127
+
+    Returns:
+        JSON berisi jumlah imported, duplicates, invalid dan batches
+    """
+    expected = f"Bearer {IMPORT_API_TOKEN}" if IMPORT_API_TOKEN else None
+    if not expected or not hmac.compare_digest(authorization or "", expected):
+        return JSONResponse({"error": "unauthorized"}, status_code=401)
+
+    try:
+        print(f"[Import] Start import - Phone: {phone}, File: {file.filename}")
+        rows = await run_in_threadpool(iter_statement_rows, file.file)
+        stats = await run_in_threadpool(import_transactions, phone, rows)
+        return {"status": "ok", "phone": phone, **stats}
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="main.import_csv")
+        print(f"[Import] FATAL: {e}")
+        return JSONResponse(
+            {"error": str(e), "type": type(e).__name__, "phone": phone},
+            status_code=400,
+        )
+    finally:
+        await file.close()
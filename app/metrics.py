@@ -0,0 +1,206 @@
+"""Instrumentasi ringan in-process (tanpa service eksternal).
+
+Histogram menyimpan jumlah observasi per bucket (kumulatif seperti
+Prometheus), sum dan count untuk setiap kombinasi label. Semua metric
+terdaftar di REGISTRY dan dirender oleh render() untuk endpoint /metrics
+dalam format text Prometheus.
+"""
+
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+# Bucket latency dalam detik
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REGISTRY = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """Histogram latency dengan label.
+
+    Contoh:
+        COMMAND_LATENCY.observe(0.12, command="/summary")
+        with COMMAND_LATENCY.time(command="/summary"):
+            ...
+    """
+
+    def __init__(self, name: str, description: str, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> {"counts": [...], "sum": float, "count": int}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Copy data histogram: {label values: {"buckets": {bound: count}, "sum", "count"}}."""
+        with self._lock:
+            return {
+                key: {
+                    "buckets": dict(zip(self.buckets, series["counts"])),
+                    "sum": series["sum"],
+                    "count": series["count"],
+                }
+                for key, series in self._series.items()
+            }
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self.snapshot().items()):
+            for bound, count in series["buckets"].items():
+                lines.append(f"{self.name}_bucket{_label_str(self.labels, key, [('le', bound)])} {count}")
+            lines.append(f"{self.name}_bucket{_label_str(self.labels, key, [('le', '+Inf')])} {series['count']}")
+            lines.append(f"{self.name}_sum{_label_str(self.labels, key)} {series['sum']}")
+            lines.append(f"{self.name}_count{_label_str(self.labels, key)} {series['count']}")
+        return lines
+
+
+class Counter:
+    """Counter monotonic dengan label."""
+
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = tuple(str(labels.get(label, "")) for label in self.labels)
+        return self._values.get(key, 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge yang nilainya diambil dari fungsi saat /metrics di-scrape.
+
+    fn() harus return dict {tuple label values: angka}.
+    """
+
+    def __init__(self, name: str, description: str, fn, labels=()):
+        self.name = name
+        self.description = description
+        self.fn = fn
+        self.labels = tuple(labels)
+        REGISTRY.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        try:
+            for key, value in sorted(self.fn().items()):
+                lines.append(f"{self.name}{_label_str(self.labels, key)} {value}")
+        except Exception as e:
+            print(f"[Metrics] Error collecting {self.name}: {e}")
+        return lines
+
+
+def render() -> str:
+    """Render semua metric di REGISTRY dalam format text Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===========================
+# HOT PATH METRICS
+# ===========================
+
+WEBHOOK_LATENCY = Histogram(
+    "webhook_latency_seconds",
+    "End-to-end latency POST /webhook",
+    labels=("kind",),
+)
+PARSE_LATENCY = Histogram(
+    "parse_latency_seconds",
+    "Waktu parsing payload webhook dan teks transaksi",
+    labels=("stage",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+SHEETS_LATENCY = Histogram(
+    "sheets_call_latency_seconds",
+    "Latency Google Sheets API per method dan range",
+    labels=("method", "range"),
+)
+WHATSAPP_LATENCY = Histogram(
+    "whatsapp_send_latency_seconds",
+    "Latency kirim pesan WhatsApp Cloud API",
+    labels=("status",),
+)
+SCHEDULER_JOB_LATENCY = Histogram(
+    "scheduler_job_duration_seconds",
+    "Durasi scheduled job APScheduler",
+    labels=("job",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+PDF_RENDER_LATENCY = Histogram(
+    "pdf_render_latency_seconds",
+    "Waktu render PDF export (ReportLab)",
+)
+DEDUPE_HITS = Counter(
+    "dedupe_hits_total",
+    "Pesan/transaksi duplikat yang di-skip",
+    labels=("source",),
+)
+RATE_LIMIT_MESSAGES = Counter(
+    "rate_limit_messages_total",
+    "Pesan yang diproses rate limiter per jenis dan hasil (allowed/notify/rejected)",
+    labels=("kind", "result"),
+)
+ERRORS_SWALLOWED = Counter(
+    "errors_swallowed_total",
+    "Exception yang ditangkap except Exception (di-log, tidak di-raise)",
+    labels=("where",),
+)
+
+
+def sheets_range_label(range_name: str) -> str:
+    """Normalisasi range untuk label (buang nomor baris supaya cardinality kecil)."""
+    tab, _, cells = range_name.partition("!")
+    return f"{tab}!{''.join(c for c in cells if not c.isdigit())}" if cells else tab
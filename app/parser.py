@@ -1,4 +1,5 @@
 import re
+from datetime import datetime
 
 CATEGORY_MAP = {
     "makan": ["makan", "sarapan", "lunch", "dinner", "kopi", "jajan"],
@@ -7,6 +8,19 @@ CATEGORY_MAP = {
     "hiburan": ["nonton", "movie", "game"],
 }
 
+INCOME_KEYWORDS = ["gaji", "salary", "masuk"]
+
+
+def detect_type(text_lower: str) -> str:
+    return "income" if any(k in text_lower for k in INCOME_KEYWORDS) else "expense"
+
+
+def categorize(text_lower: str) -> str:
+    for cat, keywords in CATEGORY_MAP.items():
+        if any(k in text_lower for k in keywords):
+            return cat
+    return "other"
+
 
 def parse_message(text: str):
     text_lower = text.lower()
@@ -24,19 +38,130 @@ def parse_message(text: str):
         amount = int(raw_amount.replace(".", "").replace(",", ""))
 
     # type
-    tx_type = "income" if any(k in text_lower for k in ["gaji", "salary", "masuk"]) else "expense"
+    tx_type = detect_type(text_lower)
 
     # category
-    category = "other"
-    for cat, keywords in CATEGORY_MAP.items():
-        if any(k in text_lower for k in keywords):
-            category = cat
-            break
+    category = categorize(text_lower)
 
     return {
         "type": tx_type,
         "category": category,
         "amount": amount,
         "note": text,
-        
+
     }
+
+
+# ===========================
+# CSV IMPORT (mutasi rekening bank)
+# ===========================
+
+STATEMENT_COLUMNS = {
+    "date": ["date", "tanggal", "tgl", "transaction date", "posting date"],
+    "note": ["description", "keterangan", "deskripsi", "note", "catatan", "remark"],
+    "amount": ["amount", "jumlah", "nominal", "mutasi"],
+    "debit": ["debit", "db", "keluar"],
+    "credit": ["credit", "kredit", "cr", "masuk"],
+    "type": ["type", "tipe", "jenis"],
+}
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%Y/%m/%d", "%d %b %Y"]
+
+
+def map_statement_header(header: list) -> dict:
+    """Cocokkan nama kolom CSV bank ke field internal.
+
+    Returns:
+        dict: {field: index kolom}, misal {"date": 0, "note": 1, "amount": 2}
+    """
+    mapping = {}
+    for idx, name in enumerate(header):
+        name = name.strip().lower()
+        for field, aliases in STATEMENT_COLUMNS.items():
+            if field not in mapping and name in aliases:
+                mapping[field] = idx
+    return mapping
+
+
+def parse_amount_str(raw: str) -> int:
+    """Parse angka dari CSV bank ("1.250.000,00", "1,250,000.00", "-25000")."""
+    raw = raw.strip().replace("Rp", "").replace(" ", "")
+    if not raw:
+        raise ValueError("empty amount")
+    negative = raw.startswith("-") or (raw.startswith("(") and raw.endswith(")"))
+    raw = raw.strip("-()")
+    # Pemisah desimal = separator terakhir jika diikuti 1-2 digit
+    match = re.match(r"^(.*?)[.,](\d{1,2})$", raw)
+    if match:
+        raw = match.group(1)
+    amount = int(raw.replace(".", "").replace(",", ""))
+    return -amount if negative else amount
+
+
+def parse_statement_date(raw: str) -> str:
+    raw = raw.strip()
+    try:
+        return datetime.fromisoformat(raw).isoformat()
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt).isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"unknown date format: {raw}")
+
+
+def parse_statement_row(row: list, columns: dict):
+    """Parse satu baris mutasi rekening menjadi transaksi.
+
+    Kategori memakai CATEGORY_MAP yang sama dengan parse_message, dari
+    kolom keterangan. Tipe diambil dari kolom debit/credit, kolom tipe,
+    tanda minus pada amount, atau keyword (gaji, salary, ...) sebagai fallback.
+
+    Args:
+        row (list): Satu baris CSV
+        columns (dict): Hasil map_statement_header
+
+    Returns:
+        dict atau None jika baris tidak valid:
+        {'timestamp', 'type', 'category', 'amount', 'note'}
+    """
+    def col(field):
+        idx = columns.get(field)
+        return row[idx].strip() if idx is not None and idx < len(row) else ""
+
+    try:
+        timestamp = parse_statement_date(col("date"))
+        note = col("note")
+        note_lower = note.lower()
+
+        debit, credit = col("debit"), col("credit")
+        if debit or credit:
+            amount = parse_amount_str(credit) if credit else parse_amount_str(debit)
+            tx_type = "income" if credit else "expense"
+        else:
+            amount = parse_amount_str(col("amount"))
+            raw_type = col("type").lower()
+            if raw_type in ("cr", "kredit", "credit", "income", "masuk"):
+                tx_type = "income"
+            elif raw_type in ("db", "debit", "expense", "keluar"):
+                tx_type = "expense"
+            elif amount < 0:
+                tx_type = "expense"
+            else:
+                tx_type = detect_type(note_lower)
+
+        amount = abs(amount)
+        if amount == 0:
+            return None
+
+        return {
+            "timestamp": timestamp,
+            "type": tx_type,
+            "category": categorize(note_lower),
+            "amount": amount,
+            "note": note,
+        }
+    except (ValueError, IndexError):
+        return None
@@ -0,0 +1,103 @@
+"""Profiling CPU dan alokasi memory per request (opt-in).
+
+Dipakai untuk investigasi laporan "bot lambat 20 detik": satu request
+di-capture dengan cProfile + tracemalloc, lalu hasilnya disimpan ke
+PROFILE_DIR:
+- {timestamp}_{name}.prof  -> buka dengan `python -m pstats` atau snakeviz
+- {timestamp}_{name}.txt   -> ringkasan top fungsi (cumulative) dan top alokasi
+
+Hanya PROFILE_KEEP capture terbaru yang disimpan. Jika PROFILE_SAMPLE_RATE
+dan PROFILE_TOKEN kosong, PROFILING_ENABLED False dan route cukup
+mengecek satu boolean.
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import random
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.config import PROFILE_SAMPLE_RATE, PROFILE_TOKEN, PROFILE_DIR, PROFILE_KEEP
+from app.metrics import ERRORS_SWALLOWED
+
+PROFILING_ENABLED = PROFILE_SAMPLE_RATE > 0 or bool(PROFILE_TOKEN)
+PROFILE_HEADER = "x-debug-profile"
+
+# cProfile tidak bisa nested dengan aman; request lain jalan tanpa profile
+_profile_lock = threading.Lock()
+
+
+def should_profile(request) -> bool:
+    """True jika request ini perlu di-profile (header debug atau sampling)."""
+    if not PROFILING_ENABLED:
+        return False
+    header = request.headers.get(PROFILE_HEADER)
+    if PROFILE_TOKEN and header and hmac.compare_digest(header, PROFILE_TOKEN):
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _prune(directory: str, keep: int):
+    """Hapus capture lama, sisakan `keep` capture terbaru."""
+    captures = sorted(f for f in os.listdir(directory) if f.endswith(".prof"))
+    for name in captures[:-keep] if keep > 0 else captures:
+        base = os.path.join(directory, name[:-len(".prof")])
+        for ext in (".prof", ".txt"):
+            if os.path.exists(base + ext):
+                os.remove(base + ext)
+
+
+def _write_capture(name: str, profiler, snapshot):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+    base = os.path.join(PROFILE_DIR, f"{stamp}_{name}")
+    profiler.dump_stats(base + ".prof")
+
+    report = io.StringIO()
+    report.write(f"# {name} @ {stamp}\n\n## CPU (top 30 cumulative)\n")
+    pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(30)
+    report.write("\n## Memory (top 20 alokasi per baris)\n")
+    for stat in snapshot.statistics("lineno")[:20]:
+        report.write(f"{stat}\n")
+    with open(base + ".txt", "w") as f:
+        f.write(report.getvalue())
+
+    _prune(PROFILE_DIR, PROFILE_KEEP)
+    return base
+
+
+@contextmanager
+def profile_request(name: str):
+    """Capture cProfile + tracemalloc untuk blok di dalamnya.
+
+    Jika profile lain sedang berjalan, blok dijalankan tanpa profiling.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    started_tracemalloc = not tracemalloc.is_tracing()
+    if started_tracemalloc:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        if started_tracemalloc:
+            tracemalloc.stop()
+        try:
+            base = _write_capture(name, profiler, snapshot)
+            print(f"[Profiling] OK {name} -> {base}.prof")
+        except Exception as e:
+            ERRORS_SWALLOWED.inc(where="profiling.profile_request")
+            print(f"[Profiling] Error writing capture: {e}")
+        finally:
+            _profile_lock.release()
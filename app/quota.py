@@ -0,0 +1,50 @@
+"""Quota governor untuk Google Sheets API.
+
+Google Sheets membatasi jumlah request per menit per service account
+(default 60 read dan 60 write per menit). Job berat seperti import CSV
+memakai governor ini supaya tidak menghabiskan quota milik webhook.
+
+Governor memakai token bucket sederhana per jenis request ("read" / "write"):
+acquire() akan sleep sampai ada token, bukan melempar error.
+"""
+
+import os
+import threading
+from time import monotonic, sleep
+
+READ_QUOTA_PER_MIN = int(os.getenv("SHEETS_READ_QUOTA_PER_MIN", "50"))
+WRITE_QUOTA_PER_MIN = int(os.getenv("SHEETS_WRITE_QUOTA_PER_MIN", "50"))
+
+_lock = threading.Lock()
+_buckets = {
+    "read": {"capacity": READ_QUOTA_PER_MIN, "tokens": READ_QUOTA_PER_MIN, "ts": monotonic()},
+    "write": {"capacity": WRITE_QUOTA_PER_MIN, "tokens": WRITE_QUOTA_PER_MIN, "ts": monotonic()},
+}
+
+
+def acquire(kind: str = "write", cost: int = 1):
+    """Tunggu sampai quota tersedia untuk `cost` request jenis `kind`.
+
+    Args:
+        kind (str): "read" atau "write"
+        cost (int): Jumlah request yang akan dipakai
+
+    Returns:
+        float: Total detik menunggu (0 jika langsung dapat)
+    """
+    waited = 0.0
+    while True:
+        with _lock:
+            bucket = _buckets[kind]
+            now = monotonic()
+            rate = bucket["capacity"] / 60.0  # token per detik
+            bucket["tokens"] = min(
+                bucket["capacity"], bucket["tokens"] + (now - bucket["ts"]) * rate
+            )
+            bucket["ts"] = now
+            if bucket["tokens"] >= cost:
+                bucket["tokens"] -= cost
+                return waited
+            delay = (cost - bucket["tokens"]) / rate
+        sleep(delay)
+        waited += delay
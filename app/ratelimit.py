@@ -0,0 +1,109 @@
+"""Per-phone token bucket rate limiter untuk webhook.
+
+Setiap nomor punya dua bucket terpisah: "command" (/summary, /breakdown, ...
+yang mahal karena membaca banyak sheet) dan "transaction" (input biasa).
+Bucket terisi ulang secara kontinu; pesan yang datang saat bucket kosong
+ditolak sebelum menyentuh Google Sheets.
+
+State bucket disimpan di RATE_LIMIT (TTLCache) sehingga nomor yang idle
+otomatis dibuang setelah bucket-nya pasti penuh lagi, atau di SharedStore
+jika multi-worker. TTL setiap bucket = waktu refill penuh (capacity /
+refill rate), jadi bucket yang kosong tidak pernah dibuang lebih awal lalu
+muncul kembali penuh; dengan refill 0 bucket tidak pernah expired.
+Read-modify-write bucket selalu atomik: SharedStore.update di SQLite,
+_BUCKET_LOCK untuk TTLCache in-memory (webhook jalan di thread pool).
+"""
+
+import os
+import threading
+from time import time
+
+from app.state import RATE_LIMIT
+from app.shared_state import SHARED_STORE
+from app.metrics import ERRORS_SWALLOWED, RATE_LIMIT_MESSAGES
+
+# (kapasitas burst, refill token per menit)
+RATE_LIMITS = {
+    "command": (
+        int(os.getenv("RATE_LIMIT_COMMAND_BURST", "10")),
+        float(os.getenv("RATE_LIMIT_COMMAND_PER_MIN", "6")),
+    ),
+    "transaction": (
+        int(os.getenv("RATE_LIMIT_TRANSACTION_BURST", "20")),
+        float(os.getenv("RATE_LIMIT_TRANSACTION_PER_MIN", "20")),
+    ),
+}
+
+SLOW_DOWN_MESSAGE = "⏳ Terlalu banyak pesan. Tunggu sebentar lalu coba lagi ya."
+
+# get -> refill/take -> set bucket in-memory harus satu langkah, kalau tidak
+# dua pesan bersamaan bisa memakai token yang sama
+_BUCKET_LOCK = threading.Lock()
+
+
+def _refill(bucket, capacity, per_sec, now):
+    if bucket is None:
+        return {"tokens": float(capacity), "ts": now, "notified": False}
+    tokens = min(capacity, bucket["tokens"] + (now - bucket["ts"]) * per_sec)
+    return {"tokens": tokens, "ts": now, "notified": bucket["notified"]}
+
+
+def _take(bucket):
+    """Ambil satu token; tandai notified supaya slow-down hanya dikirim sekali."""
+    if bucket["tokens"] >= 1:
+        bucket["tokens"] -= 1
+        bucket["notified"] = False
+        bucket["result"] = "allowed"
+    elif not bucket["notified"]:
+        bucket["notified"] = True
+        bucket["result"] = "notify"
+    else:
+        bucket["result"] = "rejected"
+    return bucket
+
+
+def message_kind(text: str) -> str:
+    return "command" if text.startswith("/") else "transaction"
+
+
+def check_rate_limit(phone: str, kind: str, now: float = None) -> str:
+    """Cek dan konsumsi satu token untuk pesan dari `phone`.
+
+    Args:
+        phone (str): Nomor WhatsApp user
+        kind (str): "command" atau "transaction"
+
+    Returns:
+        str: "allowed" - proses pesan
+             "notify"  - tolak dan kirim SLOW_DOWN_MESSAGE (sekali per episode)
+             "rejected" - tolak tanpa membalas
+    """
+    now = time() if now is None else now
+    capacity, per_min = RATE_LIMITS[kind]
+    per_sec = per_min / 60.0
+    # Setelah idle selama ini bucket pasti penuh, jadi state boleh dibuang
+    # (refill 0: bucket tidak pernah penuh lagi, state tidak boleh expired)
+    full_after = capacity / per_sec if per_sec > 0 else None
+    key = f"{kind}:{phone}"
+
+    try:
+        if SHARED_STORE is not None:
+            bucket = SHARED_STORE.update(
+                f"ratelimit:{key}",
+                lambda b: _take(_refill(b, capacity, per_sec, now)),
+                ttl=full_after,
+                now=now,
+            )
+        else:
+            with _BUCKET_LOCK:
+                bucket = _take(_refill(RATE_LIMIT.get(key, now=now), capacity, per_sec, now))
+                RATE_LIMIT.set(key, bucket, now=now, ttl=full_after if full_after is not None else float("inf"))
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="ratelimit.check_rate_limit")
+        # Rate limiter tidak boleh memblokir user kalau backend state error
+        print(f"[Rate Limit] Error: {e}")
+        return "allowed"
+
+    result = bucket["result"]
+    RATE_LIMIT_MESSAGES.inc(kind=kind, result=result)
+    return result
@@ -0,0 +1,98 @@
+"""Antrian recurring transactions berbasis waktu jatuh tempo.
+
+Semua item dari Recurring_Transactions disimpan di min-heap dengan key
+waktu jatuh tempo berikutnya. Setiap tick scheduler hanya item di puncak
+heap yang sudah jatuh tempo yang di-pop, jadi biaya per tick sebanding
+dengan jumlah item jatuh tempo, bukan jumlah user.
+
+Heap dimuat ulang dari sheet secara berkala (RECURRING_RELOAD_SECONDS)
+supaya item baru dari /setrecurring, yang bisa masuk lewat worker mana
+saja, ikut terjadwal.
+"""
+
+import heapq
+import os
+import threading
+from datetime import datetime
+from time import monotonic
+
+from app.sheets import load_recurring_items, run_recurring_items
+
+RECURRING_TICK_SECONDS = int(os.getenv("RECURRING_TICK_SECONDS", "60"))
+RECURRING_RELOAD_SECONDS = int(os.getenv("RECURRING_RELOAD_SECONDS", "900"))
+# Batas item per batch supaya satu append/batchUpdate tidak terlalu besar
+RECURRING_BATCH_SIZE = 500
+
+
+class RecurringQueue:
+    """Min-heap (due, key, item) untuk recurring transactions."""
+
+    def __init__(self, reload_seconds: int = RECURRING_RELOAD_SECONDS):
+        self.reload_seconds = reload_seconds
+        self._heap = []
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def reload(self):
+        """Bangun ulang heap dari sheet (satu read Recurring_Transactions)."""
+        items = load_recurring_items()
+        heap = [(item["due"], item["key"], item) for item in items]
+        heapq.heapify(heap)
+        self._heap = heap
+        self._loaded_at = monotonic()
+        print(f"[RECURRING] Loaded {len(heap)} recurring items")
+
+    def invalidate(self):
+        """Paksa reload pada run_due berikutnya (mis. setelah kehilangan leader lock)."""
+        self._loaded_at = None
+
+    def _stale(self):
+        return self._loaded_at is None or monotonic() - self._loaded_at >= self.reload_seconds
+
+    def pop_due(self, now: datetime, limit: int = RECURRING_BATCH_SIZE) -> list:
+        """Ambil item yang due <= now (maksimal limit)."""
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def push(self, item):
+        if item["due"] is not None:
+            heapq.heappush(self._heap, (item["due"], item["key"], item))
+
+    def run_due(self, now: datetime = None) -> int:
+        """Insert semua item yang jatuh tempo, batch per RECURRING_BATCH_SIZE.
+
+        Item yang gagal ditulis dikembalikan ke heap dengan due yang sama
+        sehingga dicoba lagi pada tick berikutnya. Transaksi yang sudah
+        masuk sebelum kegagalan tidak diinsert ulang (message ID
+        deterministik, lihat run_recurring_items). Batch yang berhasil
+        tanpa transaksi baru (semua sudah ada) tidak menghentikan tick.
+
+        Returns:
+            int: Jumlah transaksi yang diinsert
+        """
+        now = now or datetime.utcnow()
+        with self._lock:
+            if self._stale():
+                self.reload()
+            inserted = 0
+            while True:
+                batch = self.pop_due(now)
+                if not batch:
+                    break
+                count, ok = run_recurring_items(batch, now)
+                # run_recurring_items sudah memajukan due item yang berhasil
+                # (dan mengosongkan due item yang barisnya sudah dihapus)
+                for item in batch:
+                    self.push(item)
+                inserted += count
+                if not ok:
+                    break
+            return inserted
+
+
+RECURRING_QUEUE = RecurringQueue()
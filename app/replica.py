@@ -0,0 +1,370 @@
+"""Replica in-memory Database_Input dengan inverted index per user.
+
+/history dengan keyword tidak lagi memfilter seluruh sheet. Replica
+menyimpan baris transaksi dan, per phone, posting list per token (kata
+di kolom note, kategori, dan tipe) yang terurut berdasarkan
+(timestamp, nomor baris). Query berjalan dari posting terbaru ke belakang
+dan berhenti setelah `limit` hasil, jadi biayanya sebanding dengan jumlah
+hasil, bukan jumlah baris.
+
+Sinkronisasi (versi tab dari _meta, lihat tab_versions di app/sheets.py):
+- Load pertama: satu read penuh Database_Input
+- Versi writer sama, jumlah baris naik: hanya membaca baris baru (A{n}:H)
+- Versi writer berubah atau baris berkurang (undo di worker lain,
+  compaction): rebuild
+- Tidak ada perubahan: tidak ada read selain _meta
+- Jika _meta tidak tersedia: baca baris baru setiap query dan rebuild
+  penuh tiap REPLICA_REBUILD_SECONDS
+
+Edit manual di tengah sheet (tanpa perubahan versi/jumlah baris)
+ditangkap oleh reconcile_tabs di app/sheets.py, yang memanggil
+replace_rows untuk blok yang berubah.
+
+Baris dengan status tombstone (kolom H = "deleted", lihat /undo) tidak
+masuk index. Per phone juga disimpan urutan baris (urutan append) supaya
+/undo bisa menemukan transaksi terakhir tanpa membaca sheet.
+
+Isi baris disimpan sebagai TransactionColumns (app/columns.py): id phone
+dan kategori yang di-intern, epoch int, amount int64, flag tipe, dan note
+yang dipakai bersama dengan list dari API. Posting list berisi posisi
+kolom (array('I')), bukan tuple string per baris. Baris yang diganti
+(replace_rows) mendapat posisi baru; posisi lama menjadi mati dan
+dilewati saat query.
+"""
+
+import heapq
+import os
+import re
+import threading
+from array import array
+from time import monotonic
+
+from app.columns import TYPE_NAMES, TransactionColumns, from_epoch, to_epoch
+from app.metrics import ERRORS_SWALLOWED
+
+REPLICA_REBUILD_SECONDS = int(os.getenv("REPLICA_REBUILD_SECONDS", "600"))
+TRANSACTIONS_TAB = "Database_Input"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> set:
+    """Token lowercase dari note (kata dengan huruf/angka)."""
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+class TransactionIndex:
+    """Replica Database_Input + posting list per (phone, token).
+
+    Attributes:
+        columns (TransactionColumns): Isi baris; columns.positions per phone
+            berisi posisi urut nomor baris (urutan append)
+        row_position (array): nomor baris sheet -> posisi hidup di columns, -1 jika tidak ada
+        postings (dict): {phone_id: {token: array('I') posisi terurut (ts, row)}}
+        by_phone (dict): {phone_id: array('I') posisi terurut (ts, row)} untuk query tanpa keyword
+
+    Baris yang di-undo atau diganti hanya dimatikan di row_position; posisi
+    lama di posting list dilewati saat query (dibersihkan saat rebuild).
+    """
+
+    def __init__(self, rebuild_seconds: int = REPLICA_REBUILD_SECONDS):
+        self.rebuild_seconds = rebuild_seconds
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.columns = TransactionColumns()
+        self.row_position = array("i")
+        self.postings = {}
+        self.by_phone = {}
+        self.synced_rows = 0  # jumlah baris sheet (termasuk header) yang sudah dibaca
+        self.version = None  # (writer_version, row_count) _meta saat sync terakhir
+        self._built_at = None
+
+    # ---------- sinkronisasi ----------
+
+    def _fetch(self, range_name: str) -> list:
+        # Import lokal: app.sheets juga memakai replica (hindari circular import)
+        from app.sheets import _read_range
+        return _read_range(range_name).get("values", [])
+
+    def _tab_version(self):
+        from app.sheets import tab_versions
+        return tab_versions().get(TRANSACTIONS_TAB)
+
+    def _key(self, position: int) -> tuple:
+        return self.columns.ts[position], self.columns.row[position]
+
+    def _bisect(self, positions, key: tuple) -> int:
+        """Indeks pertama di positions (terurut _key) dengan _key >= key."""
+        lo, hi = 0, len(positions)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(positions[mid]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _insort(self, positions, position: int):
+        key = self._key(position)
+        if not positions or self._key(positions[-1]) <= key:
+            positions.append(position)  # kasus umum: baris baru paling akhir
+        else:
+            positions.insert(self._bisect(positions, key), position)
+
+    def _alive(self, position: int) -> bool:
+        row_number = self.columns.row[position]
+        return row_number < len(self.row_position) and self.row_position[row_number] == position
+
+    def _tokens(self, position: int) -> set:
+        columns = self.columns
+        return tokenize(columns.notes[position]) | {
+            columns.categories[columns.category[position]].lower(),
+            TYPE_NAMES[columns.type[position]],
+        }
+
+    def _add_row(self, row_number: int, r: list):
+        columns = self.columns
+        if len(self.row_position) <= row_number:
+            self.row_position.extend([-1] * (row_number + 1 - len(self.row_position)))
+        position = columns.add(row_number, r)
+        if position is None:
+            return
+        self.row_position[row_number] = position
+        phone_id = columns.phone[position]
+        order = columns.positions[phone_id]
+        if len(order) > 1 and columns.row[order[-2]] > row_number:
+            # Baris lama yang ditarik ulang oleh replace_rows: jaga urutan nomor baris
+            order.pop()
+            lo, hi = 0, len(order)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if columns.row[order[mid]] < row_number:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            order.insert(lo, position)
+
+        by_phone = self.by_phone.get(phone_id)
+        if by_phone is None:
+            by_phone = self.by_phone[phone_id] = array("I")
+        self._insort(by_phone, position)
+        user_postings = self.postings.setdefault(phone_id, {})
+        for token in self._tokens(position):
+            postings = user_postings.get(token)
+            if postings is None:
+                postings = user_postings[token] = array("I")
+            self._insort(postings, position)
+
+    def _load(self, values: list, synced_rows: int):
+        self._reset()
+        self.row_position = array("i", [-1]) * max(synced_rows, 1)
+        for row_number, r in enumerate(values[1:synced_rows], start=2):
+            self._add_row(row_number, r)
+        self.columns.source_len = synced_rows
+        self.synced_rows = synced_rows
+
+    def rebuild(self):
+        """Load ulang seluruh Database_Input (satu read)."""
+        values = self._fetch(f"{TRANSACTIONS_TAB}!A:H")
+        self._load(values, len(values))
+        self._built_at = monotonic()
+        print(f"[Replica] Rebuilt index: {len(self.columns)} rows, {len(self.by_phone)} users")
+
+    def sync(self):
+        """Pastikan replica up to date: rebuild jika basi, kalau tidak baca baris baru saja."""
+        with self._lock:
+            try:
+                version = self._tab_version()
+                if version is not None and self._built_at is not None:
+                    token, rows = version
+                    known_token, known_rows = self.version or (None, 0)
+                    if token == known_token and rows == known_rows:
+                        return
+                    if token != known_token or rows < known_rows:
+                        self.rebuild()
+                        self.version = version
+                        return
+                elif self._built_at is None or (
+                    version is None and monotonic() - self._built_at >= self.rebuild_seconds
+                ):
+                    self.rebuild()
+                    self.version = version
+                    return
+                self.version = version
+                first = self.synced_rows + 1
+                values = self._fetch(f"{TRANSACTIONS_TAB}!A{first}:H")
+                for offset, r in enumerate(values):
+                    self._add_row(first + offset, r)
+                self.synced_rows += len(values)
+                self.columns.source_len = self.synced_rows
+            except Exception as e:
+                ERRORS_SWALLOWED.inc(where="replica.sync")
+                print(f"[Replica] Error syncing: {e}")
+
+    def export_state(self):
+        """Posisi sync untuk warm-start snapshot, atau None jika belum dibangun.
+
+        Isi index tidak ikut disimpan: dibangun ulang dari values tab cache
+        (lihat load_state), jadi snapshot tidak menyimpan data dua kali.
+        """
+        with self._lock:
+            if self._built_at is None:
+                return None
+            return {"synced_rows": self.synced_rows, "version": self.version}
+
+    def load_state(self, state: dict, values: list) -> bool:
+        """Bangun index dari values Database_Input!A:H (tanpa read sheet).
+
+        Hanya baris sampai synced_rows yang dipakai; sync berikutnya membaca
+        delta sejak versi di state. Return False jika values kurang panjang.
+        """
+        synced_rows = int(state["synced_rows"])
+        if synced_rows > len(values):
+            return False
+        version = state["version"]
+        with self._lock:
+            self._load(values, synced_rows)
+            self.version = (version[0], int(version[1])) if version else None
+            self._built_at = monotonic()
+        return True
+
+    def mark_deleted(self, row_number: int):
+        """Keluarkan baris dari index setelah ditandai tombstone."""
+        with self._lock:
+            if row_number < len(self.row_position):
+                self.row_position[row_number] = -1
+
+    def replace_rows(self, first_row: int, values: list):
+        """Ganti baris first_row.. dengan isi terbaru dari sheet (edit manual).
+
+        Dipakai reconcile_tabs setelah menarik ulang satu blok. Baris di luar
+        yang sudah disinkronkan dilewati (nanti masuk lewat sync). Posisi
+        lama dimatikan; isi baru mendapat posisi (dan posting) baru.
+        """
+        with self._lock:
+            if self._built_at is None:
+                return
+            for offset, r in enumerate(values):
+                row_number = first_row + offset
+                if row_number < 2 or row_number > self.synced_rows:
+                    continue
+                self.row_position[row_number] = -1
+                self._add_row(row_number, r)
+
+    def _transaction(self, position: int) -> dict:
+        columns = self.columns
+        return {
+            "row": columns.row[position],
+            "ts": columns.ts[position],
+            "timestamp": from_epoch(columns.ts[position]),
+            "phone": columns.phones[columns.phone[position]],
+            "type": TYPE_NAMES[columns.type[position]],
+            "category": columns.categories[columns.category[position]],
+            "amount": columns.amount[position],
+            "note": columns.notes[position],
+        }
+
+    def last_transaction(self, phone: str):
+        """Transaksi hidup terakhir (baris terbawah) milik phone, atau None.
+
+        Returns:
+            dict atau None: {'row', 'ts' (epoch), 'timestamp' (ISO UTC, tanpa
+            mikrodetik), 'phone', 'type', 'category', 'amount', 'note'}
+        """
+        with self._lock:
+            phone_id = self.columns.phones.get(phone)
+            order = self.columns.positions.get(phone_id) if phone_id is not None else None
+            # Posisi mati (undo / diganti) di ujung urutan tidak akan hidup lagi
+            while order and not self._alive(order[-1]):
+                order.pop()
+            if not order:
+                return None
+            return self._transaction(order[-1])
+
+    def invalidate(self):
+        """Paksa rebuild pada sync berikutnya."""
+        with self._lock:
+            self._built_at = None
+            self.version = None
+
+    # ---------- query ----------
+
+    def _newest_first(self, postings, before):
+        """Iterasi posting list dari terbaru, mulai sebelum cursor `before`."""
+        end = self._bisect(postings, before) if before else len(postings)
+        for i in range(end - 1, -1, -1):
+            yield postings[i]
+
+    def _term_stream(self, user_postings: dict, term: str, before):
+        """Posting terbaru-dulu untuk semua token yang diawali `term`.
+
+        Jika term cocok dengan beberapa token (prefix, misal "kant" ->
+        "kantor", "kantin"), posting list digabung dengan heap berukuran
+        jumlah token sehingga tetap urut terbaru-dulu tanpa materialisasi.
+        """
+        if term in user_postings:
+            lists = [user_postings[term]]
+        else:
+            lists = [p for token, p in user_postings.items() if token.startswith(term)]
+        if len(lists) == 1:
+            yield from self._newest_first(lists[0], before)
+            return
+        previous = None
+        merged = heapq.merge(*(self._newest_first(p, before) for p in lists), key=self._key, reverse=True)
+        for position in merged:
+            # Baris yang punya dua token cocok muncul dua kali berurutan
+            if position != previous:
+                yield position
+            previous = position
+
+    def _row_matches(self, position: int, terms: list) -> bool:
+        tokens = self._tokens(position)
+        return all(any(token.startswith(term) for token in tokens) for term in terms)
+
+    def search(self, phone: str, terms=(), start: str = None, before=None, limit: int = 20):
+        """Cari transaksi terbaru user yang cocok dengan semua keyword.
+
+        Args:
+            phone (str): Nomor WhatsApp user
+            terms (list): Keyword (lowercase); kosong = semua transaksi
+            start (str): Timestamp ISO paling awal (None = tanpa batas)
+            before (tuple): Cursor (epoch ts, row) dari halaman sebelumnya
+            limit (int): Jumlah hasil maksimum
+
+        Returns:
+            tuple: (list of dict transaksi terbaru-dulu, cursor berikutnya atau None)
+        """
+        terms = [t.lower() for t in terms if t]
+        start_ts = to_epoch(start) if start else None
+        with self._lock:
+            phone_id = self.columns.phones.get(phone)
+            if phone_id is None:
+                return [], None
+            if terms:
+                # Keyword pertama menggerakkan iterasi; keyword lain dicek ke isi baris
+                stream = self._term_stream(self.postings.get(phone_id, {}), terms[0], before)
+            else:
+                stream = self._newest_first(self.by_phone.get(phone_id, ()), before)
+
+            ts = self.columns.ts
+            results = []
+            last = None
+            for position in stream:
+                if start_ts is not None and ts[position] < start_ts:
+                    break
+                if not self._alive(position):
+                    continue  # sudah di-undo atau diganti karena edit manual
+                if len(terms) > 1 and not self._row_matches(position, terms[1:]):
+                    continue
+                if len(results) == limit:
+                    return results, last
+                tx = self._transaction(position)
+                del tx["ts"], tx["phone"]
+                results.append(tx)
+                last = self._key(position)
+            return results, None
+
+
+TRANSACTION_INDEX = TransactionIndex()
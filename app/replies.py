@@ -0,0 +1,119 @@
+"""Penggabungan balasan WhatsApp per request.
+
+Handler memanggil send() beberapa kali untuk satu pesan (konfirmasi,
+alert budget, alert daily target, ...); tiap panggilan dulu menjadi satu
+request Graph API sendiri dan ikut menghabiskan throughput messaging.
+ReplyBuilder mengumpulkan semua fragmen per phone selama request dan
+mengirimnya sebagai satu pesan di akhir (dipotong per MAX_TEXT_LENGTH).
+
+Opsional, REPLY_LINGER_SECONDS > 0 menahan balasan per phone sebentar
+sehingga balasan untuk beberapa pesan beruntun (burst) dari phone yang
+sama ikut digabung. Linger berlaku per proses worker.
+"""
+
+import threading
+
+from app.config import REPLY_LINGER_SECONDS
+from app.metrics import ERRORS_SWALLOWED
+
+# Batas panjang body pesan teks WhatsApp Cloud API
+MAX_TEXT_LENGTH = 4096
+FRAGMENT_SEPARATOR = "\n\n"
+
+
+def combine(fragments: list, limit: int = MAX_TEXT_LENGTH) -> list:
+    """Gabungkan fragmen menjadi sesedikit mungkin pesan dengan panjang <= limit.
+
+    Fragmen tidak dipecah kecuali satu fragmen sendiri melebihi limit.
+    """
+    messages = []
+    current = ""
+    for fragment in fragments:
+        while len(fragment) > limit:
+            if current:
+                messages.append(current)
+                current = ""
+            messages.append(fragment[:limit])
+            fragment = fragment[limit:]
+        if not current:
+            current = fragment
+        elif len(current) + len(FRAGMENT_SEPARATOR) + len(fragment) <= limit:
+            current += FRAGMENT_SEPARATOR + fragment
+        else:
+            messages.append(current)
+            current = fragment
+    if current:
+        messages.append(current)
+    return messages
+
+
+class ReplyBuilder:
+    """Kumpulan fragmen balasan per phone (urut sesuai panggilan send)."""
+
+    def __init__(self):
+        self.fragments = {}
+
+    def send(self, phone: str, message: str) -> bool:
+        """Pengganti send_whatsapp_message untuk handler: hanya mencatat fragmen."""
+        if message:
+            self.fragments.setdefault(phone, []).append(message)
+        return True
+
+    def messages(self) -> list:
+        """Pesan gabungan siap kirim: list of (phone, text)."""
+        return [
+            (phone, text)
+            for phone, fragments in self.fragments.items()
+            for text in combine(fragments)
+        ]
+
+
+# Balasan yang sedang ditahan (linger): {phone: {"fragments": [...], "send": fn}}
+_PENDING = {}
+_PENDING_LOCK = threading.Lock()
+
+
+def _flush(phone: str):
+    with _PENDING_LOCK:
+        pending = _PENDING.pop(phone, None)
+    if pending is None:
+        return
+    for text in combine(pending["fragments"]):
+        try:
+            pending["send"](phone, text)
+        except Exception as e:
+            ERRORS_SWALLOWED.inc(where="replies._flush")
+            print(f"[Replies] Error sending to {phone}: {e}")
+
+
+def deliver(builder: ReplyBuilder, send, linger: float = REPLY_LINGER_SECONDS):
+    """Kirim balasan builder lewat send(phone, text).
+
+    Args:
+        builder (ReplyBuilder): Fragmen yang dikumpulkan selama request
+        send (function): Pengirim sebenarnya (send_whatsapp_message)
+        linger (float): Detik menahan balasan per phone (0 = kirim langsung)
+    """
+    if linger <= 0:
+        for phone, text in builder.messages():
+            send(phone, text)
+        return
+
+    for phone, fragments in builder.fragments.items():
+        with _PENDING_LOCK:
+            pending = _PENDING.get(phone)
+            if pending is not None:
+                pending["fragments"].extend(fragments)
+                continue
+            _PENDING[phone] = {"fragments": list(fragments), "send": send}
+        timer = threading.Timer(linger, _flush, (phone,))
+        timer.daemon = True
+        timer.start()
+
+
+def flush_pending():
+    """Kirim semua balasan yang masih ditahan (dipanggil saat shutdown)."""
+    with _PENDING_LOCK:
+        phones = list(_PENDING)
+    for phone in phones:
+        _flush(phone)
@@ -0,0 +1,243 @@
+"""Shared state antar worker (uvicorn --workers N) tanpa service eksternal.
+
+State yang harus sama di semua proses (dedupe message ID, counter rate limit,
+leader lock untuk scheduler) disimpan di satu file SQLite mode WAL. Semua
+proses di host yang sama cukup menunjuk SHARED_STATE_PATH ke file yang sama.
+
+Jika SHARED_STATE_PATH kosong, app berjalan single-process seperti biasa
+(state tetap di memory proses, scheduler selalu jalan).
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+from time import time
+
+from app.config import SHARED_STATE_PATH
+from app.metrics import ERRORS_SWALLOWED
+
+# ID unik proses ini, dipakai sebagai pemilik leader lock
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"
+
+# Purge entry expired setiap N insert (amortized, bukan per request)
+PURGE_EVERY = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen (
+    ns TEXT NOT NULL,
+    key TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (ns, key)
+);
+CREATE INDEX IF NOT EXISTS seen_expires ON seen (expires_at);
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS kv_expires ON kv (expires_at);
+CREATE TABLE IF NOT EXISTS locks (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SharedStore:
+    """Key-value, TTL set dan lock di atas SQLite (WAL) yang aman multi-proses.
+
+    Setiap thread memakai koneksi sendiri; operasi read-modify-write memakai
+    BEGIN IMMEDIATE supaya atomic antar proses.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._inserts = 0
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        # Koneksi SQLite tidak boleh dipakai lintas fork, jadi cek pid juga
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _maybe_purge(self, conn, now):
+        self._inserts += 1
+        if self._inserts % PURGE_EVERY:
+            return
+        conn.execute("DELETE FROM seen WHERE expires_at < ?", (now,))
+        conn.execute("DELETE FROM kv WHERE expires_at < ?", (now,))
+
+    # ---------- TTL set (dedupe) ----------
+
+    def add_seen(self, ns: str, key: str, ttl: float, now: float = None) -> bool:
+        """Tandai key sebagai sudah dilihat.
+
+        Returns:
+            bool: True jika key baru (atau sudah expired), False jika duplikat
+        """
+        now = time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM seen WHERE ns = ? AND key = ? AND expires_at < ?",
+                (ns, key, now),
+            )
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO seen (ns, key, expires_at) VALUES (?, ?, ?)",
+                (ns, key, now + ttl),
+            )
+            added = cur.rowcount == 1
+            if added:
+                self._maybe_purge(conn, now)
+            conn.execute("COMMIT")
+            return added
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def count_seen(self, ns: str) -> int:
+        row = self._conn().execute(
+            "SELECT COUNT(*) FROM seen WHERE ns = ? AND expires_at >= ?", (ns, time())
+        ).fetchone()
+        return row[0]
+
+    # ---------- Counters / key-value ----------
+
+    def update(self, key: str, fn, ttl: float = None, now: float = None):
+        """Read-modify-write atomic untuk satu key.
+
+        Args:
+            key (str): Nama key
+            fn (function): fn(value_lama_atau_None) -> value_baru (JSON-serializable)
+            ttl (float): Umur key dalam detik (None = tidak expired)
+
+        Returns:
+            Value baru hasil fn
+        """
+        now = time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+                (key, now),
+            ).fetchone()
+            value = fn(json.loads(row[0]) if row else None)
+            conn.execute(
+                "INSERT INTO kv (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(value), now + ttl if ttl else None),
+            )
+            self._maybe_purge(conn, now)
+            conn.execute("COMMIT")
+            return value
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def incr(self, key: str, delta: int = 1, ttl: float = None, now: float = None) -> int:
+        """Tambah counter (dibuat dengan 0 jika belum ada)."""
+        return self.update(key, lambda v: (v or 0) + delta, ttl=ttl, now=now)
+
+    def get(self, key: str, default=None):
+        row = self._conn().execute(
+            "SELECT value FROM kv WHERE key = ? AND (expires_at IS NULL OR expires_at >= ?)",
+            (key, time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else default
+
+    # ---------- Leader lock ----------
+
+    def acquire_lock(self, name: str, owner: str, ttl: float, now: float = None) -> bool:
+        """Ambil atau perpanjang lock.
+
+        Lock didapat jika belum ada, sudah expired, atau sudah dimiliki owner
+        yang sama (renew). Panggil ulang lebih sering dari ttl untuk tetap
+        jadi leader.
+
+        Returns:
+            bool: True jika owner sekarang memegang lock
+        """
+        now = time() if now is None else now
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE locks.owner = excluded.owner OR locks.expires_at < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM locks WHERE name = ?", (name,)).fetchone()
+            conn.execute("COMMIT")
+            return row is not None and row[0] == owner
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release_lock(self, name: str, owner: str):
+        self._conn().execute(
+            "DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner)
+        )
+
+
+class SharedTTLSet:
+    """Adapter SharedStore dengan interface yang sama seperti TTLCache.add().
+
+    Dipakai untuk SEEN_MESSAGE_IDS saat multi-worker, supaya webhook tidak
+    perlu tahu backend mana yang aktif.
+    """
+
+    def __init__(self, store: SharedStore, ns: str, ttl: float):
+        self.store = store
+        self.ns = ns
+        self.ttl = ttl
+        self.hits = 0
+
+    def add(self, key, now: float = None) -> bool:
+        added = self.store.add_seen(self.ns, key, self.ttl, now)
+        if not added:
+            self.hits += 1
+        return added
+
+    def __len__(self):
+        return self.store.count_seen(self.ns)
+
+    def stats(self) -> dict:
+        return {"size": len(self), "hits": self.hits}
+
+
+SHARED_STORE = SharedStore(SHARED_STATE_PATH) if SHARED_STATE_PATH else None
+
+
+def is_leader(name: str, ttl: float = 90) -> bool:
+    """True jika proses ini leader untuk `name` (selalu True tanpa shared store)."""
+    if SHARED_STORE is None:
+        return True
+    try:
+        return SHARED_STORE.acquire_lock(name, WORKER_ID, ttl)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="shared_state.is_leader")
+        print(f"[Shared State] Error acquiring lock {name}: {e}")
+        return False
+
+
+def release_leadership(name: str):
+    if SHARED_STORE is not None:
+        try:
+            SHARED_STORE.release_lock(name, WORKER_ID)
+        except Exception as e:
+            ERRORS_SWALLOWED.inc(where="shared_state.release_leadership")
+            print(f"[Shared State] Error releasing lock {name}: {e}")
@@ -10,19 +10,998 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 import io
+import re
+import hashlib
+import contextvars
+import threading
+from time import monotonic, time
+from contextlib import contextmanager
+
+from app import quota
+from app.replica import TRANSACTION_INDEX
+from app.columns import ColumnsOverlay, TransactionColumns, TOMBSTONE, TYPE_NAMES, to_epoch
+from app.aggregate import category_stats, category_totals, type_totals, totals_by_user
+from app.config import (
+    SHEETS_BACKEND,
+    SHEETS_TAB_CACHE,
+    SHEETS_META_MAX_AGE,
+    RECONCILE_INTERVAL_SECONDS,
+    RECONCILE_BLOCK_ROWS,
+)
+from app.metrics import SHEETS_LATENCY, PDF_RENDER_LATENCY, ERRORS_SWALLOWED, DEDUPE_HITS, sheets_range_label
 
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
-SERVICE_ACCOUNT_INFO = json.loads(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON"))
 
-creds = Credentials.from_service_account_info(
-    SERVICE_ACCOUNT_INFO, scopes=SCOPES
-)
+if SHEETS_BACKEND == "fake":
+    # In-memory Sheets untuk development/benchmark (tanpa kredensial)
+    from app.fake_sheets import build_fake_service
+    SHEET_ID = SHEET_ID or "fake-sheet"
+    creds = None
+    service = build_fake_service()
+else:
+    SERVICE_ACCOUNT_INFO = json.loads(os.getenv("GOOGLE_SERVICE_ACCOUNT_JSON"))
+
+    creds = Credentials.from_service_account_info(
+        SERVICE_ACCOUNT_INFO, scopes=SCOPES
+    )
 
-service = build("sheets", "v4", credentials=creds)
+    service = build("sheets", "v4", credentials=creds)
 sheet = service.spreadsheets()
 
 
+# ===========================
+# READ SNAPSHOT & PREFETCH
+# Satu request (command / webhook) memakai snapshot supaya range yang sama
+# tidak didownload berkali-kali, dan range yang sudah diketahui bisa
+# di-prefetch sekaligus dengan satu batchGet.
+# ===========================
+
+_SNAPSHOT = contextvars.ContextVar("sheets_snapshot", default=None)
+
+
+def _execute(request, method: str, range_name: str):
+    """Jalankan request Sheets API sambil mencatat latency per method/range."""
+    with SHEETS_LATENCY.time(method=method, range=sheets_range_label(range_name)):
+        return request.execute()
+
+
+@contextmanager
+def read_snapshot(ranges=()):
+    """Context manager: semua _read_range di dalamnya di-cache per range.
+
+    Jika sudah ada snapshot aktif (misal satu batch webhook yang berisi
+    beberapa command), snapshot luar dipakai ulang dan hanya range yang
+    belum ada yang di-prefetch.
+
+    Args:
+        ranges (iterable): Range yang langsung di-prefetch dengan satu batchGet
+
+    Yields:
+        dict: Snapshot {range: result}
+    """
+    outer = _SNAPSHOT.get()
+    if outer is not None:
+        if ranges:
+            prefetch_ranges(ranges)
+        yield outer
+        return
+
+    snapshot = {}
+    token = _SNAPSHOT.set(snapshot)
+    try:
+        if ranges:
+            prefetch_ranges(ranges)
+        yield snapshot
+    finally:
+        _SNAPSHOT.reset(token)
+
+
+def prefetch_ranges(ranges):
+    """Ambil beberapa range sekaligus (batchGet) ke snapshot aktif."""
+    snapshot = _SNAPSHOT.get()
+    missing = [r for r in dict.fromkeys(ranges) if snapshot is None or r not in snapshot]
+    if not missing:
+        return
+    try:
+        # Range yang masih valid di tab cache tidak perlu ikut batchGet
+        if snapshot is not None:
+            for range_name in [r for r in missing if _cache_valid(r)]:
+                snapshot[range_name] = _with_pending(range_name, _cached_read(range_name))
+                missing.remove(range_name)
+        if not missing:
+            return
+        cacheable = any(_cacheable(r) for r in missing)
+        versions = tab_versions() if cacheable else {}
+        # Fingerprint blok ikut diambil di request yang sama sebagai baseline rekonsiliasi
+        with_blocks = cacheable and RECONCILE_ENABLED
+        result = _execute(
+            sheet.values().batchGet(
+                spreadsheetId=SHEET_ID,
+                ranges=missing + [BLOCKS_RANGE] if with_blocks else missing,
+            ),
+            "batchGet",
+            ",".join(r.split("!")[0] for r in missing),
+        )
+        value_ranges = result.get("valueRanges", [])
+        fingerprints = _parse_fingerprints(value_ranges[-1].get("values", [])) if with_blocks else {}
+        # valueRanges urut sesuai request, "range" di response sudah dinormalisasi
+        for range_name, value_range in zip(missing, value_ranges):
+            values = value_range.get("values", [])
+            if _cacheable(range_name):
+                _store_cache(range_name, values, versions, fingerprints)
+            if snapshot is not None:
+                snapshot[range_name] = _with_pending(
+                    range_name, {"values": values, "_shared": _cacheable(range_name)}
+                )
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.prefetch_ranges")
+        print(f"Error prefetching ranges: {e}")
+
+
+def _read_range(range_name: str) -> dict:
+    """Baca satu range (lewat snapshot jika ada). Return sama seperti values().get()."""
+    snapshot = _SNAPSHOT.get()
+    if snapshot is not None and range_name in snapshot:
+        return snapshot[range_name]
+
+    result = _cached_read(range_name) if _cacheable(range_name) else None
+    if result is None:
+        result = _execute(
+            sheet.values().get(spreadsheetId=SHEET_ID, range=range_name),
+            "get",
+            range_name,
+        )
+
+    result = _with_pending(range_name, result)
+    if snapshot is not None:
+        snapshot[range_name] = result
+    return result
+
+
+# ===========================
+# TAB CACHE & CHANGE DETECTION
+# Tab yang sering dibaca di-cache antar request. Validasinya memakai tab
+# tersembunyi _meta, satu baris per tab:
+#   A = nama tab, B = versi writer, C = =COUNTA('Tab'!A:A)
+# Append (dari bot maupun manual) menaikkan C otomatis; writer yang mengubah
+# baris di tempat (undo, last_run recurring, compaction) menaikkan B.
+# Satu read kecil _meta!A2:C cukup untuk tahu tab mana yang berubah:
+# - versi sama, jumlah baris sama -> pakai cache
+# - versi sama, jumlah baris naik -> baca baris baru saja (tail)
+# - selain itu -> download ulang tab
+# ===========================
+
+META_TAB = "_meta"
+META_RANGE = "_meta!A2:C"
+TRACKED_TABS = [
+    "Database_Input",
+    "Budget_Settings",
+    "Spending_Target",
+    "Recurring_Transactions",
+    "Goals_Settings",
+]
+_COLUMNS_RE = re.compile(r"^([A-Z]+):([A-Z]+)$")
+
+_TAB_CACHE = {}  # range -> {"values", "token", "rows"}
+_TAB_CACHE_LOCK = threading.Lock()
+_META_ROWS = {}  # tab -> nomor baris di _meta
+_VERSIONS_MEMO = {"at": None, "versions": {}}
+
+
+def _cacheable(range_name: str) -> bool:
+    """Hanya range kolom penuh (misal A:H, G:G) dari tab yang dilacak _meta."""
+    if not SHEETS_TAB_CACHE or "!" not in range_name:
+        return False
+    tab, cells = range_name.split("!", 1)
+    return tab in TRACKED_TABS and bool(_COLUMNS_RE.match(cells))
+
+
+def tab_versions() -> dict:
+    """Versi per tab dari _meta: {tab: (writer_version, row_count)}.
+
+    Dibaca sekali per read snapshot (per request); di luar snapshot hasilnya
+    dipakai ulang selama SHEETS_META_MAX_AGE detik. Return {} jika _meta
+    tidak ada / gagal dibaca (cache otomatis tidak dipakai).
+    """
+    versions = _known_versions()
+    if versions is not None:
+        return versions
+
+    values = []
+    try:
+        values = _execute(
+            sheet.values().get(spreadsheetId=SHEET_ID, range=META_RANGE),
+            "get",
+            META_RANGE,
+        ).get("values", [])
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.tab_versions")
+        print(f"Error reading {META_RANGE}: {e}")
+    return _store_versions(values)
+
+
+def _known_versions():
+    """Versi _meta yang masih boleh dipakai tanpa read (snapshot / memo), atau None.
+
+    Dipakai bersama oleh tab_versions di sini dan di app/async_sheets.py.
+    """
+    snapshot = _SNAPSHOT.get()
+    if snapshot is not None and META_RANGE in snapshot:
+        return snapshot[META_RANGE]
+    memo = _VERSIONS_MEMO
+    if snapshot is None and memo["at"] is not None and monotonic() - memo["at"] < SHEETS_META_MAX_AGE:
+        return memo["versions"]
+    return None
+
+
+def _store_versions(values: list) -> dict:
+    """Parse baris _meta!A2:C, simpan ke memo proses dan snapshot aktif."""
+    versions = {}
+    for row_number, r in enumerate(values, start=2):
+        if len(r) < 3 or not r[0]:
+            continue
+        _META_ROWS[r[0]] = row_number
+        try:
+            versions[r[0]] = (r[1], int(r[2]))
+        except ValueError:
+            continue
+
+    _VERSIONS_MEMO["at"] = monotonic()
+    _VERSIONS_MEMO["versions"] = versions
+    snapshot = _SNAPSHOT.get()
+    if snapshot is not None:
+        snapshot[META_RANGE] = versions
+    return versions
+
+
+def _cache_valid(range_name: str) -> bool:
+    """True jika range ada di cache dan versi writer tab belum berubah."""
+    if not _cacheable(range_name):
+        return False
+    entry = _TAB_CACHE.get(range_name)
+    version = tab_versions().get(range_name.split("!")[0])
+    return bool(entry and version and entry["token"] == version[0] and version[1] >= entry["rows"])
+
+
+def _store_cache(range_name: str, values: list, versions: dict, fingerprints: dict = None):
+    """Simpan hasil download penuh ke tab cache.
+
+    fingerprints (dari _blocks, diambil di request yang sama) menjadi
+    baseline reconcile_tabs; tanpa baseline entry tidak ikut direkonsiliasi.
+    """
+    tab = range_name.split("!")[0]
+    version = versions.get(tab)
+    if version is None:
+        return
+    with _TAB_CACHE_LOCK:
+        _TAB_CACHE[range_name] = {
+            "values": values,
+            "token": version[0],
+            "rows": version[1],
+            "fingerprints": (fingerprints or {}).get(tab),
+        }
+
+
+def _cache_plan(range_name: str, versions: dict) -> tuple:
+    """Keputusan tab cache untuk satu range kolom penuh, tanpa I/O.
+
+    Dipakai bersama oleh _cached_read di sini dan di app/async_sheets.py,
+    sehingga kedua client hanya berbeda di cara mengirim request.
+
+    Returns:
+        tuple: (kind, data), salah satu dari
+            ("uncached", None): versi tab tidak diketahui, baca langsung
+            ("hit", result): cache masih valid
+            ("tail", plan): baca plan[0] (baris baru saja) lalu _store_tail
+            ("full", ranges): baca ranges (get jika satu, batchGet jika
+                ada _blocks) lalu _store_full
+    """
+    tab, cells = range_name.split("!", 1)
+    version = versions.get(tab)
+    if version is None:
+        return "uncached", None
+    token, rows = version
+
+    entry = _TAB_CACHE.get(range_name)
+    if entry and entry["token"] == token and rows == entry["rows"]:
+        return "hit", {"values": entry["values"], "_shared": True}
+
+    if entry and entry["token"] == token and rows > entry["rows"]:
+        # Hanya ada baris baru di bawah: ambil tail-nya saja
+        first_col, last_col = _COLUMNS_RE.match(cells).groups()
+        values = entry["values"] + [[]] * max(0, entry["rows"] - len(entry["values"]))
+        return "tail", (f"{tab}!{first_col}{len(values) + 1}:{last_col}", entry, values, rows)
+
+    # Fingerprint blok ikut diambil di request yang sama sebagai baseline rekonsiliasi
+    return "full", [range_name, BLOCKS_RANGE] if RECONCILE_ENABLED else [range_name]
+
+
+def _store_tail(range_name: str, plan: tuple, tail: list) -> dict:
+    """Gabungkan hasil read tail (plan "tail" dari _cache_plan) ke tab cache."""
+    _, entry, values, rows = plan
+    values = values + tail
+    with _TAB_CACHE_LOCK:
+        # Blok terakhir berubah karena tail; baseline lama tetap dipakai
+        # sehingga rekonsiliasi berikutnya menarik ulang blok itu saja
+        _TAB_CACHE[range_name] = dict(entry, values=values, rows=rows)
+    return {"values": values, "_shared": True}
+
+
+def _store_full(range_name: str, value_ranges: list, versions: dict) -> dict:
+    """Simpan hasil download penuh (plan "full", urut sesuai ranges) ke tab cache."""
+    values = value_ranges[0].get("values", [])
+    fingerprints = _parse_fingerprints(value_ranges[1].get("values", [])) if len(value_ranges) > 1 else {}
+    _store_cache(range_name, values, versions, fingerprints)
+    return {"values": values, "_shared": True}
+
+
+def _cached_read(range_name: str):
+    """Baca range kolom penuh lewat tab cache.
+
+    Returns:
+        dict seperti values().get() (list values dipakai bersama antar
+        request, jangan diubah in-place; lihat "_shared"), atau None jika
+        versi tab tidak diketahui.
+    """
+    versions = tab_versions()
+    kind, plan = _cache_plan(range_name, versions)
+    if kind == "uncached":
+        return None
+    if kind == "hit":
+        return plan
+    if kind == "tail":
+        tail = _execute(
+            sheet.values().get(spreadsheetId=SHEET_ID, range=plan[0]),
+            "get",
+            range_name,
+        ).get("values", [])
+        return _store_tail(range_name, plan, tail)
+
+    if len(plan) > 1:
+        value_ranges = _execute(
+            sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=plan),
+            "batchGet",
+            range_name,
+        ).get("valueRanges", [{}, {}])
+    else:
+        value_ranges = [_execute(
+            sheet.values().get(spreadsheetId=SHEET_ID, range=range_name),
+            "get",
+            range_name,
+        )]
+    return _store_full(range_name, value_ranges, versions)
+
+
+def _version_updates(tabs) -> list:
+    """Data values().batchUpdate untuk menaikkan versi writer tab di _meta."""
+    if not _META_ROWS:
+        tab_versions()
+    token = f"v{time():.6f}"
+    return [
+        {"range": f"{META_TAB}!B{_META_ROWS[tab]}", "values": [[token]]}
+        for tab in tabs
+        if tab in _META_ROWS
+    ]
+
+
+def _forget_tabs(tabs):
+    """Buang cache lokal tab yang baru diubah in-place oleh proses ini."""
+    with _TAB_CACHE_LOCK:
+        for range_name in [r for r in _TAB_CACHE if r.split("!")[0] in tabs]:
+            del _TAB_CACHE[range_name]
+    _VERSIONS_MEMO["at"] = None
+    snapshot = _SNAPSHOT.get()
+    if snapshot:
+        snapshot.pop(META_RANGE, None)
+
+
+def clear_tab_cache():
+    """Kosongkan semua cache tab dan index replica (misal setelah restore sheet)."""
+    with _TAB_CACHE_LOCK:
+        _TAB_CACHE.clear()
+    _forget_columns()
+    _forget_message_ids()
+    _META_ROWS.clear()
+    _SHEET_IDS.clear()
+    _VERSIONS_MEMO["at"] = None
+    TRANSACTION_INDEX.invalidate()
+
+
+def export_tab_cache() -> dict:
+    """Tab cache dalam bentuk JSON-serializable untuk warm-start snapshot (app/warm_start.py)."""
+    with _TAB_CACHE_LOCK:
+        entries = list(_TAB_CACHE.items())
+    return {
+        range_name: {
+            "values": entry["values"],
+            "token": entry["token"],
+            "rows": entry["rows"],
+            "fingerprints": (
+                {str(block): fp for block, fp in entry["fingerprints"].items()}
+                if entry.get("fingerprints") is not None else None
+            ),
+        }
+        for range_name, entry in entries
+    }
+
+
+def _load_cache_entry(entry: dict) -> dict:
+    """Validasi satu entry snapshot (hasil export_tab_cache). Raises ValueError jika rusak."""
+    values = entry["values"]
+    if not isinstance(values, list) or not all(
+        isinstance(r, list) and all(isinstance(c, str) for c in r) for r in values
+    ):
+        raise ValueError("values harus list of list string")
+    if not isinstance(entry["token"], str) or not isinstance(entry["rows"], int):
+        raise ValueError("versi tab tidak valid")
+    fingerprints = entry.get("fingerprints")
+    if fingerprints is not None:
+        fingerprints = {int(block): str(fp) for block, fp in fingerprints.items()}
+    return {"values": values, "token": entry["token"], "rows": entry["rows"], "fingerprints": fingerprints}
+
+
+def load_tab_cache(entries: dict):
+    """Isi tab cache dari warm-start snapshot.
+
+    Entry tetap membawa versi (token, rows) saat disimpan, jadi read
+    berikutnya hanya mengambil delta: tail jika hanya ada baris baru,
+    download penuh jika versi writer sudah berubah.
+
+    Raises:
+        ValueError: Jika ada entry yang tidak valid (snapshot tidak dipakai)
+    """
+    loaded = {
+        range_name: _load_cache_entry(entry)
+        for range_name, entry in entries.items()
+        if _cacheable(range_name)
+    }
+    with _TAB_CACHE_LOCK:
+        _TAB_CACHE.update(loaded)
+
+
+def cached_values(range_name: str):
+    """Values tab cache untuk range (tanpa read), atau None jika belum di-cache."""
+    entry = _TAB_CACHE.get(range_name)
+    return entry["values"] if entry else None
+
+
+def export_columns():
+    """State TransactionColumns milik tab cache Database_Input, atau None."""
+    values = cached_values(TRANSACTIONS_RANGE)
+    with _COLUMNS_LOCK:
+        previous, columns = _COLUMNS_MEMO["values"], _COLUMNS_MEMO["columns"]
+        if values is None or columns is None:
+            return None
+        if previous is not values and not _extends(values, previous, columns.source_len):
+            return None
+        return columns.export_state()
+
+
+def load_columns(state: dict) -> bool:
+    """Pasang TransactionColumns dari snapshot di atas values tab cache.
+
+    Baris yang ditambahkan sesudahnya (tail) di-extend saat
+    transaction_columns() berikutnya. Return False jika tab belum di-cache.
+    """
+    values = cached_values(TRANSACTIONS_RANGE)
+    if values is None:
+        return False
+    columns = TransactionColumns.from_state(state, values)
+    with _COLUMNS_LOCK:
+        _COLUMNS_MEMO["values"], _COLUMNS_MEMO["columns"] = values, columns
+    return True
+
+
+def refresh_tab_cache() -> int:
+    """Bawa semua entry tab cache ke versi terbaru (hanya delta). Return jumlah range."""
+    with _TAB_CACHE_LOCK:
+        ranges = list(_TAB_CACHE)
+    _VERSIONS_MEMO["at"] = None
+    with read_snapshot():
+        for range_name in ranges:
+            _read_range(range_name)
+    return len(ranges)
+
+
+def bump_versions(tabs):
+    """Naikkan versi writer tab (setelah perubahan in-place di luar append)."""
+    data = _version_updates(tabs)
+    try:
+        if data:
+            _execute(
+                sheet.values().batchUpdate(
+                    spreadsheetId=SHEET_ID,
+                    body={"valueInputOption": "RAW", "data": data},
+                ),
+                "batchUpdate",
+                META_TAB,
+            )
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.bump_versions")
+        print(f"Error bumping {META_TAB} versions: {e}")
+    finally:
+        _forget_tabs(tabs)
+
+
+# ===========================
+# BLOCK RECONCILIATION
+# Edit manual di tengah tab (ubah nilai, hapus/sisip baris) tidak selalu
+# mengubah jumlah baris. Tab tersembunyi _blocks berisi satu formula
+# fingerprint per blok RECONCILE_BLOCK_ROWS baris:
+#   A = tab, B = nomor blok, C = =SUMPRODUCT(LEN(R))&":"&SUM(R)&":"&COUNTA(R)
+# Sheets menghitung ulang formula saat ada edit, jadi cukup membaca
+# _blocks!A2:C (satu read kecil) dan membandingkannya dengan fingerprint
+# yang tercatat saat data di cache diambil. Hanya blok yang berbeda yang
+# ditarik ulang (satu batchGet) lalu ditempel ke cache dan replica.
+# Fingerprint ini checksum ringan: penggantian teks dengan panjang sama di
+# kolom non-angka tidak terdeteksi.
+# ===========================
+
+BLOCKS_TAB = "_blocks"
+BLOCKS_RANGE = "_blocks!A2:C"
+RECONCILE_ENABLED = SHEETS_TAB_CACHE and RECONCILE_INTERVAL_SECONDS > 0
+# Kolom terakhir yang di-fingerprint per tab (mulai dari kolom A)
+RECONCILE_COLUMNS = {
+    "Database_Input": "H",
+    "Budget_Settings": "D",
+    "Spending_Target": "D",
+    "Recurring_Transactions": "G",
+    "Goals_Settings": "D",
+}
+
+
+def block_fingerprint_formula(tab: str, block: int) -> str:
+    start = block * RECONCILE_BLOCK_ROWS + 1
+    end = start + RECONCILE_BLOCK_ROWS - 1
+    cells = f"'{tab}'!A{start}:{RECONCILE_COLUMNS[tab]}{end}"
+    return f'=SUMPRODUCT(LEN({cells}))&":"&SUM({cells})&":"&COUNTA({cells})'
+
+
+def _parse_fingerprints(values: list) -> dict:
+    """Baris _blocks -> {tab: {blok: fingerprint}}."""
+    fingerprints = {}
+    for r in values:
+        if len(r) < 3:
+            continue
+        try:
+            fingerprints.setdefault(r[0], {})[int(r[1])] = r[2]
+        except ValueError:
+            continue
+    return fingerprints
+
+
+def _ensure_block_formulas(fingerprints: dict, versions: dict) -> int:
+    """Tambahkan formula _blocks untuk blok yang belum ada (+1 blok cadangan)."""
+    rows = []
+    for tab in RECONCILE_COLUMNS:
+        if tab not in versions:
+            continue
+        needed = versions[tab][1] // RECONCILE_BLOCK_ROWS + 2
+        known = fingerprints.get(tab, {})
+        rows += [[tab, block, block_fingerprint_formula(tab, block)] for block in range(needed) if block not in known]
+    if rows:
+        _execute(
+            sheet.values().append(
+                spreadsheetId=SHEET_ID,
+                range=f"{BLOCKS_TAB}!A:C",
+                valueInputOption="USER_ENTERED",
+                body={"values": rows},
+            ),
+            "append",
+            BLOCKS_TAB,
+        )
+    return len(rows)
+
+
+def _patch_rows(values: list, first_row: int, block_values: list, first_col: int, last_col: int) -> list:
+    """Copy values dengan baris first_row.. diganti block_values (hanya dalam panjang values)."""
+    patched = list(values)
+    for offset, r in enumerate(block_values):
+        index = first_row - 1 + offset
+        if index >= len(patched):
+            break
+        cells = r[first_col:last_col + 1]
+        while cells and cells[-1] == "":
+            cells = cells[:-1]
+        patched[index] = cells
+    return patched
+
+
+def reconcile_tabs(ensure_formulas: bool = False) -> dict:
+    """Cocokkan cache tab dengan spreadsheet per blok; tarik ulang blok yang berubah.
+
+    Dijalankan berkala oleh scheduler di setiap worker (cache per proses).
+    Formula _blocks yang kurang hanya ditambahkan jika ensure_formulas=True
+    (worker leader) supaya tidak ada append ganda.
+
+    Returns:
+        dict: {tab: jumlah blok yang ditarik ulang}
+    """
+    if not RECONCILE_ENABLED:
+        return {}
+    try:
+        versions = tab_versions()
+        remote = _parse_fingerprints(
+            _execute(
+                sheet.values().get(spreadsheetId=SHEET_ID, range=BLOCKS_RANGE),
+                "get",
+                BLOCKS_RANGE,
+            ).get("values", [])
+        )
+        if ensure_formulas:
+            _ensure_block_formulas(remote, versions)
+
+        # Blok berubah per tab, hanya untuk entry cache yang punya baseline
+        changed = {}
+        with _TAB_CACHE_LOCK:
+            entries = [(r, e) for r, e in _TAB_CACHE.items() if e.get("fingerprints") is not None]
+        for range_name, entry in entries:
+            tab = range_name.split("!")[0]
+            local_blocks = (len(entry["values"]) - 1) // RECONCILE_BLOCK_ROWS + 1
+            for block, fingerprint in remote.get(tab, {}).items():
+                if block < local_blocks and entry["fingerprints"].get(block) != fingerprint:
+                    changed.setdefault(tab, set()).add(block)
+        if not changed:
+            return {}
+
+        pulls = [
+            (tab, block, f"{tab}!A{block * RECONCILE_BLOCK_ROWS + 1}:{RECONCILE_COLUMNS[tab]}{(block + 1) * RECONCILE_BLOCK_ROWS}")
+            for tab, blocks in changed.items()
+            for block in sorted(blocks)
+        ]
+        value_ranges = _execute(
+            sheet.values().batchGet(spreadsheetId=SHEET_ID, ranges=[p[2] for p in pulls]),
+            "batchGet",
+            ",".join(changed),
+        ).get("valueRanges", [])
+
+        for (tab, block, _), value_range in zip(pulls, value_ranges):
+            block_values = value_range.get("values", [])
+            block_values += [[]] * (RECONCILE_BLOCK_ROWS - len(block_values))
+            first_row = block * RECONCILE_BLOCK_ROWS + 1
+            with _TAB_CACHE_LOCK:
+                for range_name, entry in list(_TAB_CACHE.items()):
+                    if range_name.split("!")[0] != tab or entry.get("fingerprints") is None:
+                        continue
+                    first_col, last_col = (_column_index(c) for c in _COLUMNS_RE.match(range_name.split("!")[1]).groups())
+                    _TAB_CACHE[range_name] = dict(
+                        entry,
+                        values=_patch_rows(entry["values"], first_row, block_values, first_col, last_col),
+                        fingerprints={**entry["fingerprints"], block: remote[tab][block]},
+                    )
+            if tab == "Database_Input":
+                TRANSACTION_INDEX.replace_rows(first_row, block_values)
+                _forget_columns()
+
+        summary = {tab: len(blocks) for tab, blocks in changed.items()}
+        print(f"[Reconcile] Re-pulled blocks: {summary}")
+        return summary
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.reconcile_tabs")
+        print(f"Error reconciling tabs: {e}")
+        return {}
+
+
+def ensure_meta_tab(ensure_formulas: bool = False):
+    """Buat tab _meta (jika belum ada) dan baris versi untuk setiap TRACKED_TABS.
+
+    Juga menyiapkan tab _blocks untuk reconcile_tabs. Dipanggil saat startup
+    di setiap worker; formula fingerprint per blok hanya ditambahkan jika
+    ensure_formulas=True (worker leader, sama seperti reconcile_tabs) supaya
+    tidak ada append ganda. Aman dipanggil berulang; baris yang sudah ada
+    tidak diubah.
+    """
+    try:
+        props = _execute(
+            sheet.get(spreadsheetId=SHEET_ID, fields="sheets.properties(sheetId,title)"),
+            "spreadsheets.get",
+            META_TAB,
+        )
+        for sheet_props in props.get("sheets", []):
+            _SHEET_IDS[sheet_props["properties"]["title"]] = sheet_props["properties"]["sheetId"]
+
+        hidden_tabs = [META_TAB] + ([BLOCKS_TAB] if RECONCILE_ENABLED else [])
+        missing_tabs = [tab for tab in hidden_tabs if tab not in _SHEET_IDS]
+        if missing_tabs:
+            _execute(
+                sheet.batchUpdate(
+                    spreadsheetId=SHEET_ID,
+                    body={"requests": [
+                        {"addSheet": {"properties": {"title": tab, "hidden": True}}} for tab in missing_tabs
+                    ]},
+                ),
+                "batchUpdate",
+                ",".join(missing_tabs),
+            )
+            if BLOCKS_TAB in missing_tabs:
+                _execute(
+                    sheet.values().update(
+                        spreadsheetId=SHEET_ID,
+                        range=f"{BLOCKS_TAB}!A1",
+                        valueInputOption="RAW",
+                        body={"values": [["tab", "block", "fingerprint"]]},
+                    ),
+                    "update",
+                    BLOCKS_TAB,
+                )
+
+        names = [
+            r[0] if r else ""
+            for r in _execute(
+                sheet.values().get(spreadsheetId=SHEET_ID, range=f"{META_TAB}!A:A"),
+                "get",
+                f"{META_TAB}!A:A",
+            ).get("values", [])
+        ]
+        rows = [] if names else [["tab", "writer_version", "row_count"]]
+        rows += [[tab, "0", f"=COUNTA('{tab}'!A:A)"] for tab in TRACKED_TABS if tab not in names]
+        if len(rows) > (0 if names else 1):
+            _execute(
+                sheet.values().update(
+                    spreadsheetId=SHEET_ID,
+                    range=f"{META_TAB}!A{max(len(names), 0) + 1}",
+                    valueInputOption="USER_ENTERED",
+                    body={"values": rows},
+                ),
+                "update",
+                META_TAB,
+            )
+            print(f"[Sheets] {META_TAB} initialized for {len(rows)} rows")
+        _VERSIONS_MEMO["at"] = None
+
+        if RECONCILE_ENABLED and ensure_formulas:
+            fingerprints = _parse_fingerprints(
+                _execute(
+                    sheet.values().get(spreadsheetId=SHEET_ID, range=BLOCKS_RANGE),
+                    "get",
+                    BLOCKS_RANGE,
+                ).get("values", [])
+            )
+            added = _ensure_block_formulas(fingerprints, tab_versions())
+            if added:
+                print(f"[Sheets] {BLOCKS_TAB} initialized for {added} blocks")
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.ensure_meta_tab")
+        print(f"Error ensuring {META_TAB} tab: {e}")
+
+
+# Kolom H Database_Input = status; TOMBSTONE (app/columns.py) menandai transaksi
+# yang di-undo (soft delete). Baris fisiknya dihapus belakangan oleh compact_transactions.
+TRANSACTIONS_RANGE = "Database_Input!A:H"
+_LIVE_TRANSACTIONS = TRANSACTIONS_RANGE + "#live"
+
+
+def _read_transactions() -> dict:
+    """Baca Database_Input tanpa baris tombstone. Return sama seperti values().get()."""
+    snapshot = _SNAPSHOT.get()
+    if snapshot is not None and _LIVE_TRANSACTIONS in snapshot:
+        return snapshot[_LIVE_TRANSACTIONS]
+
+    values = _read_range(TRANSACTIONS_RANGE).get("values", [])
+    live = {"values": [r for r in values if len(r) < 8 or r[7] != TOMBSTONE]}
+
+    if snapshot is not None:
+        snapshot[_LIVE_TRANSACTIONS] = live
+    return live
+
+
+# Kolom typed Database_Input (app/columns.py) yang dibangun dari list tab
+# cache, dipakai ulang antar request. Tail read membuat list baru dengan
+# object baris lama yang sama, jadi cukup extend baris barunya.
+_COLUMNS_MEMO = {"values": None, "columns": None}
+_COLUMNS_LOCK = threading.Lock()
+_LIVE_COLUMNS = TRANSACTIONS_RANGE + "#columns"
+
+
+def _extends(values: list, previous: list, length: int) -> bool:
+    """True jika values = previous[:length] + baris baru (object baris yang sama)."""
+    return (
+        previous is not None
+        and 1 < length <= len(values)
+        and values[0] is previous[0]
+        and values[length - 1] is previous[length - 1]
+    )
+
+
+def _forget_columns():
+    with _COLUMNS_LOCK:
+        _COLUMNS_MEMO["values"] = _COLUMNS_MEMO["columns"] = None
+
+
+def transaction_columns():
+    """Transaksi hidup Database_Input sebagai TransactionColumns.
+
+    Dari list tab cache: dipakai ulang antar request dan di-extend untuk
+    baris baru. Dari list milik request (ada append yang belum di-flush):
+    ColumnsOverlay berisi kolom bersama apa adanya plus kolom kecil untuk
+    baris sesudahnya, memoized di snapshot. Kolom bersama tidak disalin.
+    """
+    result = _read_range(TRANSACTIONS_RANGE)
+    values = result.get("values", [])
+    snapshot = _SNAPSHOT.get()
+    if snapshot is not None and _LIVE_COLUMNS in snapshot:
+        memo_values, memo_len, columns = snapshot[_LIVE_COLUMNS]
+        if memo_values is values and memo_len == len(values):
+            return columns
+
+    with _COLUMNS_LOCK:
+        previous, columns = _COLUMNS_MEMO["values"], _COLUMNS_MEMO["columns"]
+        length = columns.source_len if columns else 0
+        if columns is not None and previous is values and length == len(values):
+            pass
+        elif columns is not None and _extends(values, previous, length):
+            if result.get("_shared"):
+                columns.extend(values[length:])
+            else:
+                pending = TransactionColumns()
+                pending.source_len = length
+                pending.extend(values[length:])
+                columns = ColumnsOverlay(columns, pending)
+        else:
+            columns = TransactionColumns.from_values(values)
+        if result.get("_shared"):
+            _COLUMNS_MEMO["values"], _COLUMNS_MEMO["columns"] = values, columns
+
+    if snapshot is not None:
+        snapshot[_LIVE_COLUMNS] = (values, len(values), columns)
+    return columns
+
+
+def _append_rows(range_name: str, values: list):
+    """Append baris ke tab dan buang cache snapshot untuk tab tersebut.
+
+    Di dalam buffered_appends(), baris hanya ditampung (lihat flush_appends)
+    dan langsung ditambahkan ke snapshot supaya read berikutnya di batch
+    yang sama sudah melihatnya.
+    """
+    buffer = _APPEND_BUFFER.get()
+    if buffer is not None:
+        buffer.setdefault(range_name, []).extend(values)
+        _apply_to_snapshot(range_name, values)
+        return
+
+    _execute(
+        sheet.values().append(
+            spreadsheetId=SHEET_ID,
+            range=range_name,
+            valueInputOption="USER_ENTERED",
+            body={"values": values}
+        ),
+        "append",
+        range_name,
+    )
+
+    _forget_snapshot_tab(range_name)
+
+
+def _forget_snapshot_tab(range_name: str):
+    """Buang semua range snapshot dari tab milik range_name (setelah append langsung).
+
+    Versi _meta ikut dibuang: jumlah baris tab sudah berubah, jadi read
+    berikutnya harus melihat baris baru (tail) dan bukan isi cache lama.
+    """
+    _VERSIONS_MEMO["at"] = None
+    snapshot = _SNAPSHOT.get()
+    if snapshot:
+        snapshot.pop(META_RANGE, None)
+        tab = range_name.split("!")[0]
+        for cached in [r for r in snapshot if r.split("!")[0] == tab]:
+            del snapshot[cached]
+
+
+# ===========================
+# BUFFERED APPENDS
+# Satu batch webhook bisa berisi banyak transaksi; append-nya digabung
+# menjadi satu request per range saat batch selesai.
+# ===========================
+
+_APPEND_BUFFER = contextvars.ContextVar("sheets_append_buffer", default=None)
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for ch in letters:
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _extend_result(result: dict, match, values: list) -> dict:
+    """Tambahkan baris append (kolom A..) ke result range kolom penuh `match`."""
+    first, last = _column_index(match.group(1)), _column_index(match.group(2))
+    if result.get("_shared"):
+        # List milik tab cache: copy dulu supaya cache tidak ikut berubah
+        result = {"values": list(result["values"])}
+    rows = result.setdefault("values", [])
+    for row in values:
+        cells_row = ["" if v is None else str(v) for v in row[first:last + 1]]
+        while cells_row and cells_row[-1] == "":
+            cells_row.pop()
+        rows.append(cells_row)
+    return result
+
+
+def _apply_to_snapshot(range_name: str, values: list):
+    """Tambahkan baris yang di-buffer ke range snapshot dari tab yang sama.
+
+    Range kolom penuh (A:H, G:G, termasuk turunan "#live") diperpanjang
+    in-place; range lain untuk tab itu dan "#columns" dibuang supaya
+    dibaca/dibangun ulang (lihat _with_pending).
+    """
+    snapshot = _SNAPSHOT.get()
+    if not snapshot:
+        return
+    tab = range_name.split("!")[0]
+    for cached in [r for r in snapshot if r.split("!")[0] == tab]:
+        cells = cached.split("!", 1)[1].split("#")[0] if "!" in cached else ""
+        match = _COLUMNS_RE.match(cells)
+        if not match or cached == _LIVE_COLUMNS:
+            del snapshot[cached]
+            continue
+        snapshot[cached] = _extend_result(snapshot[cached], match, values)
+
+
+def _with_pending(range_name: str, result: dict) -> dict:
+    """Range kolom penuh yang baru dibaca + baris tab yang masih di buffer append.
+
+    Range yang sudah ada di snapshot saat append diperpanjang oleh
+    _apply_to_snapshot; range yang baru dibaca sesudahnya lewat sini, jadi
+    di dalam buffered_appends() setiap read selalu melihat baris batch ini.
+    """
+    buffer = _APPEND_BUFFER.get()
+    if not buffer or result is None or "!" not in range_name:
+        return result
+    tab, cells = range_name.split("!", 1)
+    match = _COLUMNS_RE.match(cells)
+    if not match:
+        return result
+    for pending_range, values in buffer.items():
+        if pending_range.split("!")[0] == tab:
+            result = _extend_result(result, match, values)
+    return result
+
+
+@contextmanager
+def buffered_appends():
+    """Context manager: tampung semua _append_rows lalu flush di akhir.
+
+    Yields:
+        dict: Buffer {range: [rows]}
+    """
+    if _APPEND_BUFFER.get() is not None:
+        yield _APPEND_BUFFER.get()
+        return
+    buffer = {}
+    token = _APPEND_BUFFER.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _APPEND_BUFFER.reset(token)
+        _flush(buffer)
+
+
+def flush_appends():
+    """Kirim isi buffer aktif sekarang (misal sebelum command yang butuh data di sheet)."""
+    buffer = _APPEND_BUFFER.get()
+    if buffer:
+        _APPEND_BUFFER.set(None)
+        try:
+            _flush(buffer)
+        finally:
+            _APPEND_BUFFER.set(buffer)
+
+
+def _flush(buffer: dict):
+    pending = list(buffer.items())
+    buffer.clear()
+    for range_name, values in pending:
+        try:
+            _append_rows(range_name, values)
+        except Exception as e:
+            ERRORS_SWALLOWED.inc(where="sheets.flush_appends")
+            print(f"Error flushing {len(values)} rows to {range_name}: {e}")
+
+
 def insert_row(phone: str, message: str):
     try:
         values = [[
@@ -31,199 +1010,367 @@ def insert_row(phone: str, message: str):
             message
         ]]
 
-        body = {"values": values}
-
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Raw_Log!A:C",
-            valueInputOption="USER_ENTERED",
-            body=body
-        ).execute()
+        _append_rows("Raw_Log!A:C", values)
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.insert_row")
         print(f"Error inserting raw log: {e}")
 
 def insert_transaction(phone, parsed, message_id):
+    insert_transactions(phone, [(parsed, message_id)])
+
+
+def insert_transactions(phone, entries):
+    """Simpan beberapa transaksi sekaligus dengan satu append ke Database_Input.
+
+    Args:
+        phone (str): Nomor WhatsApp user
+        entries (list): List of (parsed, message_id) hasil parse_message
+
+    Returns:
+        int: Jumlah baris yang dikirim ke sheet (0 jika kosong atau error)
+    """
+    if not entries:
+        return 0
     try:
+        now = datetime.utcnow().isoformat()
         values = [[
-            datetime.utcnow().isoformat(),
+            now,
             phone,
             parsed["type"],
             parsed["category"],
             parsed["amount"],
             parsed["note"],
             message_id,
-        ]]
+        ] for parsed, message_id in entries]
 
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G",
-            valueInputOption="USER_ENTERED",
-            body={"values": values}
-        ).execute()
+        _append_rows("Database_Input!A:G", values)
+        return len(values)
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.insert_transactions")
         print(f"Error inserting transaction: {e}")
+        return 0
 
 from datetime import datetime, timezone
 
-def get_today_transactions_by_phone(phone: str):
-    try:
-        today = datetime.utcnow().date().isoformat()
-
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
-
-        rows = result.get("values", [])[1:]  # skip header
+def _transactions_since(phone: str, start_ts: int, end_ts: int = None) -> list:
+    """[(columns, posisi)] transaksi phone dengan start_ts <= ts (< end_ts), per bagian kolom."""
+    parts = []
+    for columns in transaction_columns().parts:
+        ts = columns.ts
+        parts.append((columns, [
+            i for i in columns.user_positions(phone)
+            if ts[i] >= start_ts and (end_ts is None or ts[i] < end_ts)
+        ]))
+    return parts
 
-        txs = []
-        for r in rows:
-            if len(r) < 6:
-                continue
 
-            ts, r_phone, tx_type, category, amount, note = r[:6]
+def _as_dicts(parts: list) -> list:
+    transactions = []
+    for columns, positions in parts:
+        category, tx_type, amount = columns.category, columns.type, columns.amount
+        names = columns.categories
+        transactions.extend({
+            "type": TYPE_NAMES[tx_type[i]],
+            "category": names[category[i]],
+            "amount": amount[i],
+        } for i in positions)
+    return transactions
 
-            if r_phone != phone:
-                continue
 
-            if ts.startswith(today):
-                txs.append({
-                    "type": tx_type,
-                    "category": category,
-                    "amount": int(amount),
-                })
-        return txs
+def get_today_transactions_by_phone(phone: str):
+    try:
+        return _as_dicts(_transactions_since(phone, *_today_window()))
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_today_transactions_by_phone")
         print(f"Error getting today transactions: {e}")
         return []
 
 def get_transactions_by_phone_and_range(phone: str, start_date: str):
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
+        return _as_dicts(_transactions_since(phone, to_epoch(start_date)))
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_transactions_by_phone_and_range")
+        print(f"Error getting transactions by range: {e}")
+        return []
 
-        rows = result.get("values", [])[1:]
+def _today_window() -> tuple:
+    """(start, end) epoch hari ini (UTC)."""
+    start = to_epoch(datetime.combine(datetime.utcnow().date(), datetime.min.time()))
+    return start, start + 86400
 
-        txs = []
-        for r in rows:
-            if len(r) < 6:
-                continue
 
-            ts, r_phone, tx_type, category, amount, note = r[:6]
+def summarize_today_by_phone(phone: str):
+    try:
+        income, expense = type_totals(transaction_columns(), *_today_window(), phone=phone)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.summarize_today_by_phone")
+        print(f"Error summarizing today: {e}")
+        income = expense = 0
+    return income, expense, income - expense
 
-            if r_phone != phone:
-                continue
+def _summarize_since(phone: str, days: int):
+    try:
+        columns = transaction_columns()
+        start = to_epoch(datetime.utcnow() - timedelta(days=days))
+        income, expense = type_totals(columns, start, phone=phone)
+        categories = category_totals(columns, start, phone=phone)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.summarize_since")
+        print(f"Error summarizing {days} days: {e}")
+        income, expense, categories = 0, 0, {}
+    return income, expense, income - expense, categories
 
-            if ts < start_date:
-                continue
+def summarize_week_by_phone(phone: str):
+    return _summarize_since(phone, 7)
 
-            try:
-                amount = int(amount)
-            except ValueError:
-                continue
+def summarize_month_by_phone(phone: str):
+    return _summarize_since(phone, 30)
 
-            txs.append({
-                "type": tx_type,
-                "category": category,
-                "amount": amount
-            })
 
-        return txs
+def daily_totals_all_users() -> dict:
+    """Income/expense hari ini untuk semua user sekaligus: {phone: (income, expense)}."""
+    try:
+        return totals_by_user(transaction_columns(), *_today_window())
     except Exception as e:
-        print(f"Error getting transactions by range: {e}")
-        return []
+        ERRORS_SWALLOWED.inc(where="sheets.daily_totals_all_users")
+        print(f"[Daily Report] Error aggregating daily totals: {e}")
+        return {}
 
-def summarize_today_by_phone(phone: str):
-    txs = get_today_transactions_by_phone(phone)
-    income = sum(t["amount"] for t in txs if t["type"] == "income")
-    expense = sum(t["amount"] for t in txs if t["type"] == "expense")
-    return income, expense, income - expense
 
-def summarize_week_by_phone(phone: str):
-    start = (datetime.utcnow() - timedelta(days=7)).isoformat()
-    txs = get_transactions_by_phone_and_range(phone, start)
+# Index message ID Database_Input: digest 8-byte dari kolom G (tab cache),
+# dipakai ulang antar request dan di-extend untuk baris tail, sama seperti
+# _COLUMNS_MEMO. Cek ID tidak perlu scan kolom G per panggilan.
+MESSAGE_IDS_RANGE = "Database_Input!G:G"
+_MESSAGE_ID_MEMO = {"values": None, "length": 0, "digests": set()}
+_MESSAGE_ID_LOCK = threading.Lock()
 
-    income = sum(t["amount"] for t in txs if t["type"] == "income")
-    expense = sum(t["amount"] for t in txs if t["type"] == "expense")
 
-    categories = {}
-    for t in txs:
-        if t["type"] == "expense":
-            categories[t["category"]] = categories.get(t["category"], 0) + t["amount"]
+def _id_digest(message_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(message_id.encode(), digest_size=8).digest(), "big")
 
-    return income, expense, income - expense, categories
 
-def summarize_month_by_phone(phone: str):
-    start = (datetime.utcnow() - timedelta(days=30)).isoformat()
-    txs = get_transactions_by_phone_and_range(phone, start)
+def _forget_message_ids():
+    with _MESSAGE_ID_LOCK:
+        _MESSAGE_ID_MEMO.update(values=None, length=0, digests=set())
 
-    income = sum(t["amount"] for t in txs if t["type"] == "income")
-    expense = sum(t["amount"] for t in txs if t["type"] == "expense")
 
-    categories = {}
-    for t in txs:
-        if t["type"] == "expense":
-            categories[t["category"]] = categories.get(t["category"], 0) + t["amount"]
+def _message_id_digests(result: dict) -> tuple:
+    """Digest message ID untuk result read kolom G.
+
+    Returns:
+        tuple: (set digest, jumlah baris yang sudah ter-index). Baris
+        sesudahnya (append yang belum di-flush) harus dicek langsung.
+    """
+    values = result.get("values", [])
+    shared = result.get("_shared")
+    with _MESSAGE_ID_LOCK:
+        memo = _MESSAGE_ID_MEMO
+        previous, length, digests = memo["values"], memo["length"], memo["digests"]
+        if previous is values and length == len(values):
+            return digests, length
+        if _extends(values, previous, length):
+            if not shared:
+                return digests, length
+            digests.update(_id_digest(r[0]) for r in values[length:] if r and r[0])
+        else:
+            digests = {_id_digest(r[0]) for r in values if r and r[0]}
+            if not shared:
+                return digests, len(values)
+        memo.update(values=values, length=len(values), digests=digests)
+        return digests, len(values)
 
-    return income, expense, income - expense, categories
+
+def _message_id_lookup():
+    """Satu read kolom G (lewat tab cache) -> fungsi cek message_id sudah ada atau belum."""
+    result = _read_range(MESSAGE_IDS_RANGE)
+    digests, length = _message_id_digests(result)
+    pending = {r[0] for r in result.get("values", [])[length:] if r}
+    return lambda message_id: message_id in pending or _id_digest(message_id) in digests
 
 
 def has_message_id(message_id: str) -> bool:
+    return message_id in has_message_ids([message_id])
+
+
+def _existing_message_ids(message_ids) -> set:
+    """Seperti has_message_ids, tapi error baca diteruskan ke pemanggil."""
+    exists = _message_id_lookup()
+    return {m for m in set(message_ids) if m and exists(m)}
+
+
+def has_message_ids(message_ids) -> set:
+    """Cek banyak message ID sekaligus dengan satu read kolom G.
+
+    Returns:
+        set: Subset dari message_ids yang sudah ada di Database_Input
+    """
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!G:G"
-        ).execute()
-        ids = [r[0] for r in result.get("values", []) if r]
-        return message_id in ids
+        return _existing_message_ids(message_ids)
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.has_message_ids")
         print(f"Error checking message ID: {e}")
-        return False
+        return set()
+
+def get_last_transaction_by_phone(phone: str):
+    """Transaksi terakhir (belum di-undo) milik user, dari index replica.
 
-def get_last_transaction_row_by_phone(phone: str):
+    Returns:
+        dict atau None: {'row', 'ts', 'timestamp', 'phone', 'type', 'category',
+        'amount', 'note'}; 'row' = nomor baris di Database_Input (1-based),
+        'ts' = epoch detik
+    """
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Sheet1!A:G"
-        ).execute()
+        TRANSACTION_INDEX.sync()
+        return TRANSACTION_INDEX.last_transaction(phone)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_last_transaction_by_phone")
+        print(f"Error getting last transaction row: {e}")
+        return None
 
-        rows = result.get("values", [])
-        # skip header, cari dari bawah
-        for i in range(len(rows) - 1, 0, -1):
-            r = rows[i]
-            if len(r) >= 2 and r[1] == phone:
-                return i + 1  # row index Google Sheets (1-based)
 
+def _row_matches_transaction(r: list, tx: dict) -> bool:
+    """True jika baris sheet r masih transaksi yang sama dengan entry replica tx."""
+    if len(r) < 5 or r[1] != tx["phone"] or (len(r) > 7 and r[7] == TOMBSTONE):
+        return False
+    try:
+        return to_epoch(r[0]) == tx["ts"] and int(r[4]) == tx["amount"] and r[3] == tx["category"]
+    except ValueError:
+        return False
+
+
+def undo_last_transaction(phone: str):
+    """Undo transaksi terakhir user dengan menulis tombstone di kolom status.
+
+    Tidak ada baris yang dihapus atau digeser (deleteDimension), jadi nomor
+    baris di index tetap valid. Sebelum menulis, baris target dibaca ulang
+    (satu baris saja) untuk memastikan index belum basi, misalnya setelah
+    compaction di worker lain; jika basi, index di-rebuild lalu dicoba sekali lagi.
+
+    Returns:
+        dict atau None: Transaksi yang di-undo, None jika tidak ada / error
+    """
+    try:
+        for attempt in range(2):
+            tx = get_last_transaction_by_phone(phone)
+            if not tx:
+                return None
+
+            row = tx["row"]
+            current = _execute(
+                sheet.values().get(spreadsheetId=SHEET_ID, range=f"Database_Input!A{row}:H{row}"),
+                "get",
+                "Database_Input!A:H",
+            ).get("values", [[]])
+            current = current[0] if current else []
+            if not _row_matches_transaction(current, tx):
+                print(f"[Undo] Index basi untuk row {row}, rebuild")
+                TRANSACTION_INDEX.invalidate()
+                continue
+            # Replica hanya menyimpan epoch detik; kembalikan nilai asli dari sheet
+            tx.update(timestamp=current[0], message_id=current[6] if len(current) > 6 else "")
+
+            # Tombstone + versi writer di _meta dalam satu request
+            _execute(
+                sheet.values().batchUpdate(
+                    spreadsheetId=SHEET_ID,
+                    body={
+                        "valueInputOption": "RAW",
+                        "data": [{"range": f"Database_Input!H{row}", "values": [[TOMBSTONE]]}]
+                        + _version_updates(["Database_Input"]),
+                    },
+                ),
+                "batchUpdate",
+                "Database_Input!H",
+            )
+            _forget_tabs(["Database_Input"])
+            TRANSACTION_INDEX.mark_deleted(row)
+
+            snapshot = _SNAPSHOT.get()
+            if snapshot:
+                for cached in [r for r in snapshot if r.split("!")[0] == "Database_Input"]:
+                    del snapshot[cached]
+            return tx
         return None
     except Exception as e:
-        print(f"Error getting last transaction row: {e}")
+        ERRORS_SWALLOWED.inc(where="sheets.undo_last_transaction")
+        print(f"Error undoing transaction: {e}")
         return None
 
-def delete_row(row_index: int):
+
+_SHEET_IDS = {}
+
+
+def _sheet_id(tab: str) -> int:
+    """sheetId numerik untuk tab (dibutuhkan deleteDimension), di-cache per proses."""
+    if tab not in _SHEET_IDS:
+        result = _execute(
+            sheet.get(spreadsheetId=SHEET_ID, fields="sheets.properties(sheetId,title)"),
+            "spreadsheets.get",
+            tab,
+        )
+        for s in result.get("sheets", []):
+            _SHEET_IDS[s["properties"]["title"]] = s["properties"]["sheetId"]
+    return _SHEET_IDS[tab]
+
+
+def compact_transactions() -> int:
+    """Hapus fisik baris tombstone di Database_Input (background job).
+
+    Hanya kolom status (H:H) yang dibaca. Baris tombstone yang berurutan
+    digabung menjadi satu range, lalu semua deleteDimension dikirim dalam
+    satu batchUpdate dari bawah ke atas supaya index range belum bergeser.
+    Setelah itu index replica di-rebuild karena nomor baris berubah.
+
+    Returns:
+        int: Jumlah baris yang dihapus
+    """
     try:
+        statuses = _execute(
+            sheet.values().get(spreadsheetId=SHEET_ID, range="Database_Input!H:H"),
+            "get",
+            "Database_Input!H:H",
+        ).get("values", [])
+        dead = [i for i, r in enumerate(statuses) if i > 0 and r and r[0] == TOMBSTONE]
+        if not dead:
+            return 0
+
+        # Kelompokkan index 0-based yang berurutan: [(start, end), ...]
+        spans = []
+        for i in dead:
+            if spans and spans[-1][1] == i:
+                spans[-1][1] = i + 1
+            else:
+                spans.append([i, i + 1])
+
+        sheet_id = _sheet_id("Database_Input")
         requests_body = {
             "requests": [
                 {
                     "deleteDimension": {
                         "range": {
-                            "sheetId": 0,  # default first sheet
+                            "sheetId": sheet_id,
                             "dimension": "ROWS",
-                            "startIndex": row_index - 1,
-                            "endIndex": row_index
+                            "startIndex": start,
+                            "endIndex": end
                         }
                     }
                 }
+                for start, end in reversed(spans)
             ]
         }
-
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=SHEET_ID,
-            body=requests_body
-        ).execute()
+        _execute(
+            sheet.batchUpdate(spreadsheetId=SHEET_ID, body=requests_body),
+            "batchUpdate",
+            "Database_Input",
+        )
+        bump_versions(["Database_Input"])
+        TRANSACTION_INDEX.invalidate()
+        print(f"[Compaction] Removed {len(dead)} tombstoned rows in {len(spans)} ranges")
+        return len(dead)
     except Exception as e:
-        print(f"Error deleting row: {e}")
+        ERRORS_SWALLOWED.inc(where="sheets.compact_transactions")
+        print(f"Error compacting transactions: {e}")
+        return 0
 
 
 # ===========================
@@ -240,14 +1387,10 @@ def set_budget(phone: str, category: str, amount: int) -> bool:
             amount
         ]]
         
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Budget_Settings!A:D",
-            valueInputOption="USER_ENTERED",
-            body={"values": values}
-        ).execute()
+        _append_rows("Budget_Settings!A:D", values)
         return True
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.set_budget")
         print(f"Error setting budget: {e}")
         return False
 
@@ -255,10 +1398,7 @@ def set_budget(phone: str, category: str, amount: int) -> bool:
 def get_budget(phone: str, category: str) -> int:
     """Get budget untuk kategori tertentu"""
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Budget_Settings!A:D"
-        ).execute()
+        result = _read_range("Budget_Settings!A:D")
         
         rows = result.get("values", [])[1:]  # skip header
         for r in rows:
@@ -266,6 +1406,7 @@ def get_budget(phone: str, category: str) -> int:
                 return int(r[3])
         return 0
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_budget")
         print(f"Error getting budget: {e}")
         return 0
 
@@ -273,10 +1414,7 @@ def get_budget(phone: str, category: str) -> int:
 def get_all_budgets(phone: str) -> dict:
     """Get semua budget untuk user"""
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Budget_Settings!A:D"
-        ).execute()
+        result = _read_range("Budget_Settings!A:D")
         
         rows = result.get("values", [])[1:]
         budgets = {}
@@ -285,6 +1423,7 @@ def get_all_budgets(phone: str) -> dict:
                 budgets[r[2]] = int(r[3])
         return budgets
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_all_budgets")
         print(f"Error getting all budgets: {e}")
         return {}
 
@@ -301,16 +1440,12 @@ def set_spending_target(phone: str, target_type: str, amount: int) -> bool:
             phone,
             target_type,  # 'daily' atau 'weekly'
             amount
-        ]]
-        
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Spending_Target!A:D",
-            valueInputOption="USER_ENTERED",
-            body={"values": values}
-        ).execute()
+        ]]
+        
+        _append_rows("Spending_Target!A:D", values)
         return True
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.set_spending_target")
         print(f"Error setting spending target: {e}")
         return False
 
@@ -318,10 +1453,7 @@ def set_spending_target(phone: str, target_type: str, amount: int) -> bool:
 def get_spending_target(phone: str, target_type: str) -> int:
     """Get daily/weekly spending target"""
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Spending_Target!A:D"
-        ).execute()
+        result = _read_range("Spending_Target!A:D")
         
         rows = result.get("values", [])[1:]
         for r in rows:
@@ -329,6 +1461,7 @@ def get_spending_target(phone: str, target_type: str) -> int:
                 return int(r[3])
         return 0
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_spending_target")
         print(f"Error getting spending target: {e}")
         return 0
 
@@ -338,37 +1471,20 @@ def get_spending_target(phone: str, target_type: str) -> int:
 # ===========================
 
 def get_category_breakdown(phone: str, days: int) -> dict:
-    """Get pengeluaran breakdown per kategori untuk N hari terakhir"""
+    """Get pengeluaran breakdown per kategori untuk N hari terakhir.
+
+    Returns:
+        dict: {kategori: {"total": int, "count": int}}, urut total terbesar
+    """
     try:
-        start = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
-        
-        rows = result.get("values", [])[1:]
-        breakdown = {}
-        
-        for r in rows:
-            if len(r) < 5:
-                continue
-            ts, r_phone, tx_type, category, amount, note = r[:6]
-            
-            if r_phone != phone or tx_type != "expense":
-                continue
-            if ts < start:
-                continue
-            
-            try:
-                amount = int(amount)
-                if category not in breakdown:
-                    breakdown[category] = 0
-                breakdown[category] += amount
-            except ValueError:
-                continue
-        
-        return breakdown
+        start = to_epoch(datetime.utcnow() - timedelta(days=days))
+        stats = category_stats(transaction_columns(), start, phone=phone)
+        return {
+            category: {"total": total, "count": count}
+            for category, (total, count) in sorted(stats.items(), key=lambda kv: kv[1][0], reverse=True)
+        }
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_category_breakdown")
         print(f"Error getting category breakdown: {e}")
         return {}
 
@@ -380,35 +1496,9 @@ def get_category_breakdown(phone: str, days: int) -> dict:
 def get_income_expense_ratio(phone: str, days: int) -> dict:
     """Get income, expense, dan saving rate untuk N hari terakhir"""
     try:
-        start = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
-        
-        rows = result.get("values", [])[1:]
-        income = 0
-        expense = 0
-        
-        for r in rows:
-            if len(r) < 5:
-                continue
-            ts, r_phone, tx_type, category, amount, note = r[:6]
-            
-            if r_phone != phone:
-                continue
-            if ts < start:
-                continue
-            
-            try:
-                amount = int(amount)
-                if tx_type == "income":
-                    income += amount
-                elif tx_type == "expense":
-                    expense += amount
-            except ValueError:
-                continue
-        
+        start = to_epoch(datetime.utcnow() - timedelta(days=days))
+        income, expense = type_totals(transaction_columns(), start, phone=phone)
+
         saved = income - expense
         saving_rate = (saved / income * 100) if income > 0 else 0
         
@@ -419,6 +1509,7 @@ def get_income_expense_ratio(phone: str, days: int) -> dict:
             "saving_rate": round(saving_rate, 1)
         }
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_income_expense_ratio")
         print(f"Error getting income expense ratio: {e}")
         return {}
 
@@ -432,10 +1523,7 @@ def search_transactions(phone: str, category: str = None, days: int = None) -> l
     try:
         start = (datetime.utcnow() - timedelta(days=days)).isoformat() if days else None
         
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
+        result = _read_transactions()
         
         rows = result.get("values", [])[1:]
         transactions = []
@@ -467,6 +1555,7 @@ def search_transactions(phone: str, category: str = None, days: int = None) -> l
         transactions.sort(key=lambda x: x["timestamp"], reverse=True)
         return transactions
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.search_transactions")
         print(f"Error searching transactions: {e}")
         return []
 
@@ -488,14 +1577,10 @@ def add_recurring(phone: str, category: str, amount: int, frequency: str, note:
             note
         ]]
         
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Recurring_Transactions!A:G",
-            valueInputOption="USER_ENTERED",
-            body={"values": values}
-        ).execute()
+        _append_rows("Recurring_Transactions!A:G", values)
         return True
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.add_recurring")
         print(f"Error adding recurring transaction: {e}")
         return False
 
@@ -503,10 +1588,7 @@ def add_recurring(phone: str, category: str, amount: int, frequency: str, note:
 def get_recurring(phone: str) -> list:
     """Get semua recurring transactions untuk user"""
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Recurring_Transactions!A:G"
-        ).execute()
+        result = _read_range("Recurring_Transactions!A:G")
         
         rows = result.get("values", [])[1:]
         recurring = []
@@ -522,107 +1604,236 @@ def get_recurring(phone: str) -> list:
         
         return recurring
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_recurring")
         print(f"Error getting recurring transactions: {e}")
         return []
 
 
-def process_recurring_transactions(phone: str) -> int:
-    """Process dan auto-insert recurring transactions yang sudah saatnya dijalankan. Returns count inserted."""
+RECURRING_RANGE = "Recurring_Transactions!A:G"
+
+
+def next_recurring_run(frequency: str, last_run: datetime):
+    """Hitung kapan recurring transaction berikutnya jatuh tempo.
+
+    Aturannya sama dengan versi per-phone sebelumnya: daily = hari berikutnya,
+    weekly = 7 hari setelah last_run, monthly = tanggal 1 bulan berikutnya.
+
+    Returns:
+        datetime atau None jika frequency tidak dikenal
+    """
+    day = last_run.replace(hour=0, minute=0, second=0, microsecond=0)
+    if frequency == "daily":
+        return day + timedelta(days=1)
+    if frequency == "weekly":
+        return day + timedelta(days=7)
+    if frequency == "monthly":
+        return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return None
+
+
+def _recurring_key(r: list) -> str:
+    """Key stabil item recurring: hash waktu dibuat (kolom A), phone, kategori dan amount.
+
+    Nomor baris bisa bergeser jika ada baris yang dihapus manual, jadi
+    message ID dan target update last_run memakai key ini.
+    """
+    raw = "|".join(str(c) for c in r[:4])
+    return hashlib.blake2b(raw.encode(), digest_size=8).hexdigest()
+
+
+def load_recurring_items() -> list:
+    """Baca semua recurring transactions (satu read) beserta waktu jatuh temponya.
+
+    Returns:
+        list of dict: {'row', 'key', 'phone', 'category', 'amount', 'frequency',
+        'note', 'last_run', 'due'}; 'row' = nomor baris di sheet (1-based)
+        saat dibaca, 'key' = _recurring_key
+    """
     try:
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Recurring_Transactions!A:G"
-        ).execute()
-        
-        rows = result.get("values", [])[1:]
-        today = datetime.utcnow().date()
-        count = 0
-        
-        for idx, r in enumerate(rows):
-            if len(r) < 6 or r[1] != phone:
+        rows = _read_range(RECURRING_RANGE).get("values", [])[1:]
+        items = []
+        for row_number, r in enumerate(rows, start=2):
+            if len(r) < 6:
                 continue
-            
-            category = r[2]
-            amount = int(r[3])
-            frequency = r[4].lower()
-            last_run = datetime.fromisoformat(r[5][:19]).date()
-            note = r[6] if len(r) > 6 else f"Recurring: {category}"
-            
-            should_run = False
-            if frequency == "daily" and last_run < today:
-                should_run = True
-            elif frequency == "weekly" and (today - last_run).days >= 7:
-                should_run = True
-            elif frequency == "monthly" and (today.year, today.month) > (last_run.year, last_run.month):
-                should_run = True
-            
-            if should_run:
-                # Insert as expense transaction
-                parsed = {
-                    "type": "expense",
-                    "category": category,
-                    "amount": amount,
-                    "note": note
-                }
-                insert_transaction(phone, parsed, f"recurring-{category}-{datetime.utcnow().timestamp()}")
-                count += 1
-        
-        return count
+            try:
+                frequency = r[4].lower()
+                last_run = datetime.fromisoformat(r[5][:19])
+                due = next_recurring_run(frequency, last_run)
+                if due is None:
+                    continue
+                items.append({
+                    "row": row_number,
+                    "key": _recurring_key(r),
+                    "phone": r[1],
+                    "category": r[2],
+                    "amount": int(r[3]),
+                    "frequency": frequency,
+                    "note": r[6] if len(r) > 6 else f"Recurring: {r[2]}",
+                    "last_run": last_run,
+                    "due": due,
+                })
+            except ValueError:
+                continue
+        return items
     except Exception as e:
-        print(f"Error processing recurring transactions: {e}")
-        return 0
+        ERRORS_SWALLOWED.inc(where="sheets.load_recurring_items")
+        print(f"Error loading recurring transactions: {e}")
+        return []
+
+
+def _current_recurring_rows() -> dict:
+    """Nomor baris terkini per _recurring_key (read baru, tidak memakai versi _meta lama)."""
+    _VERSIONS_MEMO["at"] = None
+    snapshot = _SNAPSHOT.get()
+    if snapshot:
+        snapshot.pop(META_RANGE, None)
+        snapshot.pop(RECURRING_RANGE, None)
+    rows = _read_range(RECURRING_RANGE).get("values", [])
+    return {_recurring_key(r): row_number for row_number, r in enumerate(rows[1:], start=2) if len(r) >= 4}
+
+
+def run_recurring_items(items: list, now: datetime = None) -> tuple:
+    """Insert recurring transactions yang jatuh tempo dan update last_run-nya.
+
+    Semua transaksi (boleh beda phone) dikirim dengan satu append ke
+    Database_Input, lalu kolom last_run di Recurring_Transactions ditulis
+    dengan satu values().batchUpdate.
+
+    Item bisa berumur sampai RECURRING_RELOAD_SECONDS, sementara baris
+    Recurring_Transactions bisa dihapus manual. Karena itu nomor baris
+    dicocokkan ulang lewat key stabil (_recurring_key) sebelum menulis:
+    item yang barisnya sudah hilang dilewati (due = None), item yang
+    barisnya bergeser ditulis ke baris barunya.
+
+    Append dan batchUpdate tidak atomic: jika append berhasil tapi
+    batchUpdate gagal, item dicoba lagi dengan due yang sama. Message ID
+    `recurring-{key}-{due}` deterministik, jadi baris yang sudah ada di
+    Database_Input dilewati dan hanya last_run-nya yang ditulis.
+
+    Args:
+        items (list): Item dari load_recurring_items yang sudah jatuh tempo
+        now (datetime): Waktu eksekusi (default: utcnow)
+
+    Returns:
+        tuple: (jumlah transaksi baru yang diinsert, ok). ok False jika
+        terjadi error; item yang gagal tidak dimajukan due-nya
+    """
+    if not items:
+        return 0, True
+    now = now or datetime.utcnow()
+    now_iso = now.isoformat()
+    try:
+        current_rows = _current_recurring_rows()
+        live = []
+        for item in items:
+            row = current_rows.get(item["key"])
+            if row is None:
+                print(f"[RECURRING] Item {item['key']} (row {item['row']}) no longer exists, skipping")
+                item["due"] = None
+                continue
+            item["row"] = row
+            live.append(item)
+
+        message_ids = {id(item): f"recurring-{item['key']}-{item['due']:%Y%m%d}" for item in live}
+        existing = _existing_message_ids(message_ids.values())
+        if existing:
+            DEDUPE_HITS.inc(len(existing), source="recurring")
+        new_items = [item for item in live if message_ids[id(item)] not in existing]
+        if new_items:
+            _append_rows("Database_Input!A:G", [[
+                now_iso,
+                item["phone"],
+                "expense",
+                item["category"],
+                item["amount"],
+                item["note"],
+                message_ids[id(item)],
+            ] for item in new_items])
+
+        if live:
+            _execute(
+                sheet.values().batchUpdate(
+                    spreadsheetId=SHEET_ID,
+                    body={
+                        "valueInputOption": "USER_ENTERED",
+                        "data": [
+                            {"range": f"Recurring_Transactions!F{item['row']}", "values": [[now_iso]]}
+                            for item in live
+                        ] + _version_updates(["Recurring_Transactions"]),
+                    },
+                ),
+                "batchUpdate",
+                "Recurring_Transactions",
+            )
+            _forget_tabs(["Recurring_Transactions"])
+            snapshot = _SNAPSHOT.get()
+            if snapshot:
+                snapshot.pop(RECURRING_RANGE, None)
+
+        for item in live:
+            item["last_run"] = now
+            item["due"] = next_recurring_run(item["frequency"], now)
+        return len(new_items), True
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.run_recurring_items")
+        print(f"Error running recurring transactions: {e}")
+        return 0, False
+
+
+def process_recurring_transactions(phone: str) -> int:
+    """Process dan auto-insert recurring transactions yang sudah saatnya dijalankan. Returns count inserted."""
+    now = datetime.utcnow()
+    due = [item for item in load_recurring_items() if item["phone"] == phone and item["due"] <= now]
+    return run_recurring_items(due, now)[0]
 
 
 # ===========================
 # EXPORT TO PDF
 # ===========================
 
+def export_data_version(phone: str, days: int = 30) -> str:
+    """Versi isi PDF export: hash transaksi user dalam window plus tanggal hari ini.
+
+    Berubah jika transaksi di window bertambah, diedit, di-undo, atau keluar
+    dari window, dan setiap ganti hari (periode tercetak di PDF).
+    """
+    start = to_epoch(datetime.utcnow() - timedelta(days=days))
+    digest = hashlib.sha1(f"{datetime.utcnow().date().isoformat()}:{days}".encode())
+    for columns, positions in _transactions_since(phone, start):
+        for i in positions:
+            digest.update(
+                f"|{columns.row[i]},{columns.ts[i]},{columns.type[i]},"
+                f"{columns.categories[columns.category[i]]},{columns.amount[i]},{columns.notes[i]}".encode()
+            )
+    return digest.hexdigest()
+
+
 def generate_export_pdf(phone: str, days: int = 30) -> bytes:
     """Generate formatted PDF report untuk transaksi user"""
     try:
         print(f"[PDF] Starting PDF generation for {phone}, days={days}")
         
         # Get data
-        start = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        print(f"[PDF] Fetching data from {start}")
-        
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
-        
-        rows = result.get("values", [])[1:]
-        print(f"[PDF] Got {len(rows)} total rows from sheet")
-        
-        transactions = []
-        
-        for r in rows:
-            if len(r) < 5:
-                continue
-            ts, r_phone, tx_type, category, amount, note = r[:6]
-            
-            if r_phone != phone or ts < start:
-                continue
-            
-            try:
-                transactions.append({
-                    "timestamp": ts,
-                    "type": tx_type,
-                    "category": category,
-                    "amount": int(amount),
-                    "note": note
-                })
-            except ValueError as ve:
-                print(f"[PDF] Skipping invalid transaction: {ve}")
-                continue
+        start = to_epoch(datetime.utcnow() - timedelta(days=days))
+        print(f"[PDF] Fetching data from {datetime.utcfromtimestamp(start).isoformat()}")
+        
+        columns = transaction_columns()
+        print(f"[PDF] Got {len(columns)} total rows from sheet")
+        
+        transactions = [{
+            "ts": part.ts[i],
+            "timestamp": datetime.utcfromtimestamp(part.ts[i]).isoformat(),
+            "type": TYPE_NAMES[part.type[i]],
+            "category": part.categories[part.category[i]],
+            "amount": part.amount[i],
+            "note": part.notes[i],
+        } for part, positions in _transactions_since(phone, start) for i in positions]
+        transactions.sort(key=lambda tx: tx["ts"], reverse=True)
         
         print(f"[PDF] Filtered to {len(transactions)} transactions for {phone}")
         
-        transactions.sort(key=lambda x: x["timestamp"], reverse=True)
-        
         # Calculate summary
-        income = sum(t["amount"] for t in transactions if t["type"] == "income")
-        expense = sum(t["amount"] for t in transactions if t["type"] == "expense")
+        income, expense = type_totals(columns, start, phone=phone)
         saved = income - expense
         saving_rate = (saved / income * 100) if income > 0 else 0
         
@@ -727,13 +1938,15 @@ def generate_export_pdf(phone: str, days: int = 30) -> bytes:
         
         # Build PDF
         print("[PDF] Building PDF document...")
-        doc.build(story)
+        with PDF_RENDER_LATENCY.time():
+            doc.build(story)
         pdf_buffer.seek(0)
         pdf_data = pdf_buffer.getvalue()
         print(f"[PDF] SUCCESS: Generated {len(pdf_data)} bytes")
         return pdf_data
         
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.generate_export_pdf")
         print(f"[PDF] ERROR generating PDF: {e}")
         import traceback
         traceback.print_exc()
@@ -768,36 +1981,113 @@ def check_budget_exceeded(phone: str, category: str, amount: int) -> dict:
             'percent': float - Persentase penggunaan budget (0-100+)
         }
     """
+    return check_budgets_exceeded(phone, {category: amount}).get(category)
+
+
+# Budget_Settings / Spending_Target di-index per phone sekali per list
+# values (tab cache atau snapshot), supaya lookup per transaksi O(1)
+_SETTINGS_INDEX = {}
+
+
+def _settings_index(range_name: str) -> dict:
+    """{phone: {key lowercase: amount}} dari tab settings A:D (baris pertama yang cocok dipakai)."""
+    values = _read_range(range_name).get("values", [])
+    memo = _SETTINGS_INDEX.get(range_name)
+    if memo and memo[0] is values and memo[1] == len(values):
+        return memo[2]
+    index = {}
+    for r in values[1:]:
+        if len(r) < 4:
+            continue
+        try:
+            amount = int(r[3])
+        except ValueError:
+            continue
+        index.setdefault(r[1], {}).setdefault(r[2].lower(), amount)
+    _SETTINGS_INDEX[range_name] = (values, len(values), index)
+    return index
+
+
+def budget_limits(phone: str) -> dict:
+    """Budget harian user {kategori lowercase: amount}."""
+    return _settings_index("Budget_Settings!A:D").get(phone, {})
+
+
+def spending_limits(phone: str) -> dict:
+    """Spending target user {"daily": amount, "weekly": amount} (yang di-set saja)."""
+    return _settings_index("Spending_Target!A:D").get(phone, {})
+
+
+def today_expense_by_category(phone: str) -> dict:
+    """Pengeluaran hari ini per kategori {kategori lowercase: amount}.
+
+    Di dalam buffered_appends() termasuk transaksi batch ini yang belum
+    di-flush ke sheet (lihat _with_pending).
+    """
+    spent = {}
+    for category, amount in category_totals(transaction_columns(), *_today_window(), phone=phone).items():
+        spent[category.lower()] = spent.get(category.lower(), 0) + amount
+    return spent
+
+
+def check_budgets_exceeded(phone: str, amounts_by_category: dict) -> dict:
+    """Versi batch dari check_budget_exceeded untuk beberapa kategori sekaligus.
+
+    Budget dan transaksi hari ini hanya dibaca sekali, lalu setiap kategori
+    dihitung dari data yang sama (dipakai untuk input transaksi multi-baris).
+
+    Args:
+        phone (str): Nomor WhatsApp user
+        amounts_by_category (dict): {kategori: total pengeluaran baru}
+
+    Returns:
+        dict: {kategori: hasil seperti check_budget_exceeded}. Kategori tanpa
+              budget tidak dimasukkan.
+    """
     try:
-        # Ambil budget untuk kategori ini
-        budget = get_budget(phone, category)
-        if budget == 0:
-            return None  # Tidak ada budget set, skip alert
-        
-        # Hitung total pengeluaran hari ini di kategori ini
-        txs = get_today_transactions_by_phone(phone)
-        spent_today = sum(t["amount"] for t in txs 
-                         if t["category"].lower() == category.lower() 
-                         and t["type"] == "expense")
-        
-        # Hitung total setelah transaksi baru
-        new_total = spent_today + amount
-        exceeded = new_total > budget
-        remaining = budget - new_total
-        percent = (new_total / budget * 100) if budget > 0 else 0
-        
-        return {
-            "exceeded": exceeded,
-            "budget": budget,
-            "spent_today": spent_today,
-            "amount_added": amount,
-            "new_total": new_total,
-            "remaining": remaining,
-            "percent": round(percent, 1)
-        }
+        result = _read_range("Budget_Settings!A:D")
+
+        # Sama seperti get_budget: baris pertama yang cocok yang dipakai
+        budgets = {}
+        for r in result.get("values", [])[1:]:
+            if len(r) >= 4 and r[1] == phone:
+                budgets.setdefault(r[2].lower(), int(r[3]))
+        wanted = {c: budgets.get(c.lower(), 0) for c in amounts_by_category}
+        if not any(wanted.values()):
+            return {}  # Tidak ada budget set, skip alert
+
+        # Hitung total pengeluaran hari ini per kategori
+        spent = {}
+        for t in get_today_transactions_by_phone(phone):
+            if t["type"] == "expense":
+                key = t["category"].lower()
+                spent[key] = spent.get(key, 0) + t["amount"]
+
+        alerts = {}
+        for category, amount in amounts_by_category.items():
+            budget = wanted[category]
+            if budget == 0:
+                continue
+
+            # Hitung total setelah transaksi baru
+            spent_today = spent.get(category.lower(), 0)
+            new_total = spent_today + amount
+            percent = (new_total / budget * 100) if budget > 0 else 0
+
+            alerts[category] = {
+                "exceeded": new_total > budget,
+                "budget": budget,
+                "spent_today": spent_today,
+                "amount_added": amount,
+                "new_total": new_total,
+                "remaining": budget - new_total,
+                "percent": round(percent, 1)
+            }
+        return alerts
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.check_budgets_exceeded")
         print(f"[Budget Alert] Error checking budget: {e}")
-        return None
+        return {}
 
 
 # ===========================
@@ -817,26 +2107,20 @@ def get_all_user_phones() -> list:
               Jika tidak ada transaksi, return list kosong []
     """
     try:
-        # Ambil kolom B (nomor WhatsApp) dari sheet Database_Input
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!B:B"
-        ).execute()
-        
-        # Gunakan set untuk menghilangkan duplikat
+        # Kolom typed hanya berisi transaksi hidup: user yang semua
+        # transaksinya sudah di-undo (tombstone) tidak ikut
+        columns = transaction_columns()
         phones = set()
-        rows = result.get("values", [])[1:]  # skip header row
-        for r in rows:
-            if r:  # skip empty rows
-                phones.add(r[0])
-        
+        for part in columns.parts:
+            phones.update(part.phones[phone_id] for phone_id in part.positions)
         return list(phones)
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_all_user_phones")
         print(f"[Daily Report] Error getting user phones: {e}")
         return []
 
 
-def get_daily_summary(phone: str) -> str:
+def get_daily_summary(phone: str, totals: tuple = None) -> str:
     """Generate ringkasan pengeluaran harian untuk dikirim via WhatsApp.
     
     Fungsi ini membuat pesan yang mencakup:
@@ -847,6 +2131,8 @@ def get_daily_summary(phone: str) -> str:
     
     Args:
         phone (str): Nomor WhatsApp user
+        totals (tuple): (income, expense) hari ini yang sudah dihitung untuk
+            semua user sekaligus (lihat daily_totals_all_users); None = hitung
     
     Returns:
         str: Pesan ringkasan dalam format text yang siap dikirim via WhatsApp
@@ -859,7 +2145,11 @@ def get_daily_summary(phone: str) -> str:
     """
     try:
         # Hitung summary hari ini
-        income, expense, net = summarize_today_by_phone(phone)
+        if totals is not None:
+            income, expense = totals
+            net = income - expense
+        else:
+            income, expense, net = summarize_today_by_phone(phone)
         
         # Cek status budget untuk setiap kategori
         budgets = get_all_budgets(phone)
@@ -867,13 +2157,13 @@ def get_daily_summary(phone: str) -> str:
         
         if budgets:
             over_budget = []
-            txs = get_today_transactions_by_phone(phone)
+            spent_by_category = {}
+            for category, spent in category_totals(transaction_columns(), *_today_window(), phone=phone).items():
+                spent_by_category[category.lower()] = spent_by_category.get(category.lower(), 0) + spent
             
             # Cek setiap kategori yang punya budget
             for category, budget_amount in budgets.items():
-                spent = sum(t["amount"] for t in txs 
-                           if t["category"].lower() == category.lower() 
-                           and t["type"] == "expense")
+                spent = spent_by_category.get(category.lower(), 0)
                 
                 # Jika sudah melebihi, tambahkan ke warning
                 if spent > budget_amount:
@@ -906,6 +2196,7 @@ Time: {datetime.utcnow().strftime('%H:%M')}"""
         
         return summary_text
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_daily_summary")
         print(f"[Daily Report] Error getting daily summary: {e}")
         return None
 
@@ -940,15 +2231,11 @@ def set_goal(phone: str, category: str, target_amount: int) -> bool:
         ]]
         
         # Append row ke sheet Goals_Settings
-        sheet.values().append(
-            spreadsheetId=SHEET_ID,
-            range="Goals_Settings!A:D",
-            valueInputOption="USER_ENTERED",
-            body={"values": values}
-        ).execute()
+        _append_rows("Goals_Settings!A:D", values)
         
         return True
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.set_goal")
         print(f"[Goal Tracking] Error setting goal: {e}")
         return False
 
@@ -965,10 +2252,7 @@ def get_goal(phone: str, category: str) -> int:
     """
     try:
         # Ambil semua data dari sheet Goals_Settings
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Goals_Settings!A:D"
-        ).execute()
+        result = _read_range("Goals_Settings!A:D")
         
         # Cari goal yang cocok dengan phone dan category
         rows = result.get("values", [])[1:]  # skip header
@@ -978,6 +2262,7 @@ def get_goal(phone: str, category: str) -> int:
         
         return 0  # Goal tidak ditemukan
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_goal")
         print(f"[Goal Tracking] Error getting goal: {e}")
         return 0
 
@@ -1011,54 +2296,61 @@ def get_goal_progress(phone: str, category: str, days: int = 30) -> dict:
         goal = get_goal(phone, category)
         if goal == 0:
             return None  # Goal tidak ada
-        
-        # Hitung periode
-        start = (datetime.utcnow() - timedelta(days=days)).isoformat()
-        
-        # Ambil semua transaksi
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Database_Input!A:G"
-        ).execute()
-        
-        # Hitung total income yang masuk ke kategori ini dalam periode
-        rows = result.get("values", [])[1:]
-        saved = 0
-        
-        for r in rows:
-            if len(r) < 5:
-                continue  # Skip incomplete rows
-            
-            ts, r_phone, tx_type, tx_category, amount = r[:5]
-            
-            # Filter: harus user yang sama, dalam periode, kategori dan tipe income
-            if r_phone != phone or ts < start:
-                continue
-            if tx_category.lower() != category.lower() or tx_type != "income":
-                continue
-            
-            # Kumulatifkan amount
-            try:
-                saved += int(amount)
-            except ValueError:
-                continue
-        
-        # Hitung progress
-        percent = (saved / goal * 100) if goal > 0 else 0
-        remaining = max(0, goal - saved)
-        
-        return {
-            "goal": goal,
-            "saved": saved,
-            "percent": round(percent, 1),
-            "remaining": remaining,
-            "days": days
-        }
+
+        saved = _income_by_category(phone, {category.lower()}, days)
+        return _goal_progress(goal, saved.get(category.lower(), 0), days)
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_goal_progress")
         print(f"[Goal Tracking] Error getting goal progress: {e}")
         return None
 
 
+def _income_by_category(phone: str, categories: set, days: int) -> dict:
+    """Total income per kategori (lowercase) dalam periode, satu pass Database_Input.
+
+    Args:
+        phone (str): Nomor WhatsApp user
+        categories (set): Kategori goal (lowercase) yang perlu dihitung
+        days (int): Periode dalam hari
+
+    Returns:
+        dict: {kategori: total income}
+    """
+    start = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    result = _read_transactions()
+
+    saved = {}
+    for r in result.get("values", [])[1:]:
+        if len(r) < 5:
+            continue  # Skip incomplete rows
+
+        ts, r_phone, tx_type, tx_category, amount = r[:5]
+
+        # Filter: harus user yang sama, dalam periode, tipe income dan kategori goal
+        if r_phone != phone or ts < start or tx_type != "income":
+            continue
+        key = tx_category.lower()
+        if key not in categories:
+            continue
+
+        try:
+            saved[key] = saved.get(key, 0) + int(amount)
+        except ValueError:
+            continue
+    return saved
+
+
+def _goal_progress(goal: int, saved: int, days: int) -> dict:
+    percent = (saved / goal * 100) if goal > 0 else 0
+    return {
+        "goal": goal,
+        "saved": saved,
+        "percent": round(percent, 1),
+        "remaining": max(0, goal - saved),
+        "days": days
+    }
+
+
 def get_all_goals(phone: str) -> list:
     """Ambil semua goals user dengan progress masing-masing.
     
@@ -1085,29 +2377,40 @@ def get_all_goals(phone: str) -> list:
         ]
     """
     try:
-        # Ambil semua goals untuk user ini
-        result = sheet.values().get(
-            spreadsheetId=SHEET_ID,
-            range="Goals_Settings!A:D"
-        ).execute()
-        
-        rows = result.get("values", [])[1:]
+        # Satu read Goals_Settings untuk semua goals user ini
+        result = _read_range("Goals_Settings!A:D")
+
+        rows = [r for r in result.get("values", [])[1:] if len(r) >= 4 and r[1] == phone]
+
+        # Target per kategori: baris pertama yang cocok (sama seperti get_goal)
+        targets = {}
+        for r in rows:
+            key = r[2].lower()
+            if key in targets:
+                continue
+            try:
+                targets[key] = int(r[3])
+            except ValueError:
+                targets[key] = 0
+
+        # Satu pass Database_Input untuk semua kategori goal
+        saved = _income_by_category(phone, {k for k, v in targets.items() if v}, 30)
+
         goals = []
-        
-        # Untuk setiap goal, hitung progress-nya
         for r in rows:
-            if len(r) >= 4 and r[1] == phone:
-                goal_progress = get_goal_progress(phone, r[2])
-                # Hanya include goal yang ada progress data
-                if goal_progress:
-                    goals.append({
-                        "category": r[2],
-                        "goal": int(r[3]),
-                        "progress": goal_progress
-                    })
-        
+            goal = targets[r[2].lower()]
+            # Hanya include goal yang ada progress data
+            if not goal:
+                continue
+            goals.append({
+                "category": r[2],
+                "goal": int(r[3]),
+                "progress": _goal_progress(goal, saved.get(r[2].lower(), 0), 30)
+            })
+
         return goals
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.get_all_goals")
         print(f"[Goal Tracking] Error getting all goals: {e}")
         return []
 
@@ -1156,6 +2459,7 @@ def check_daily_target_exceeded(phone: str) -> dict:
             "over_by": over_by
         }
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.check_daily_target_exceeded")
         print(f"[Smart Notifications] Error checking daily target: {e}")
         return None
 
@@ -1208,10 +2512,129 @@ def check_weekly_target_exceeded(phone: str) -> dict:
             "days_remaining": days_remaining
         }
     except Exception as e:
+        ERRORS_SWALLOWED.inc(where="sheets.check_weekly_target_exceeded")
         print(f"[Smart Notifications] Error checking weekly target: {e}")
         return None
 
 
+# ===========================
+# CSV IMPORT (mutasi rekening)
+# Bulk import histori transaksi dari CSV bank
+# ===========================
+
+IMPORT_BATCH_SIZE = 5000
+
+
+def _content_key(phone: str, timestamp: str, tx_type: str, amount, note: str) -> int:
+    """Hash 8-byte untuk isi transaksi (tanggal, tipe, amount, catatan).
+
+    Disimpan sebagai int supaya set/dict dedupe untuk 100k baris tetap kecil.
+    """
+    raw = f"{phone}|{timestamp[:10]}|{tx_type}|{amount}|{note.strip().lower()}"
+    return int.from_bytes(hashlib.blake2b(raw.encode(), digest_size=8).digest(), "big")
+
+
+def _existing_content_counts(phone: str):
+    """Fungsi (content key, timestamp) -> jumlah transaksi user yang sama di hari itu.
+
+    Posisi transaksi user dikelompokkan per hari sekali; content key satu
+    hari baru dihitung saat import pertama kali menyentuh hari tersebut,
+    jadi biayanya sebanding dengan histori user di rentang tanggal import.
+    """
+    by_day = {}
+    for columns in transaction_columns().parts:
+        ts = columns.ts
+        for i in columns.user_positions(phone):
+            by_day.setdefault(ts[i] // 86400, []).append((columns, i))
+    counts = {}
+
+    def count(key: int, timestamp: str) -> int:
+        day = to_epoch(timestamp[:10]) // 86400
+        for columns, i in by_day.pop(day, ()):
+            existing = _content_key(
+                phone, datetime.utcfromtimestamp(columns.ts[i]).isoformat(),
+                TYPE_NAMES[columns.type[i]], columns.amount[i], columns.notes[i],
+            )
+            counts[existing] = counts.get(existing, 0) + 1
+        return counts.get(key, 0)
+
+    return count
+
+
+def import_transactions(phone: str, transactions) -> dict:
+    """Import transaksi (hasil parse_statement_row) ke Database_Input secara batch.
+
+    Fungsi ini:
+    1. Ambil index message ID Database_Input (kolom G) dan kolom transaksi
+       user (TransactionColumns), keduanya lewat tab cache
+    2. Iterasi transaksi sebagai stream (tidak pernah ditampung semua)
+    3. Skip duplikat berdasarkan message ID deterministik
+       "import-<content hash>-<kemunculan>" (import ulang file yang sama
+       atau yang overlap), atau content hash transaksi user yang sudah ada
+       di hari yang sama, termasuk yang dicatat lewat WhatsApp. Transaksi
+       identik di hari yang sama dihitung per kemunculan, jadi dua kopi
+       dengan harga sama tetap tercatat dua kali
+    4. Append per IMPORT_BATCH_SIZE baris, masing-masing lewat quota governor
+
+    Args:
+        phone (str): Nomor WhatsApp user pemilik histori
+        transactions (iterable): Dict {'timestamp','type','category','amount','note'}
+            atau None untuk baris yang tidak valid
+
+    Returns:
+        dict: {'imported': int, 'duplicates': int, 'invalid': int, 'batches': int}
+    """
+    stats = {"imported": 0, "duplicates": 0, "invalid": 0, "batches": 0}
+
+    quota.acquire("read", cost=2)
+    exists = _message_id_lookup()
+    existing_count = _existing_content_counts(phone)
+
+    seen_counts = {}
+    batch = []
+
+    def flush():
+        quota.acquire("write")
+        _append_rows("Database_Input!A:G", batch)
+        stats["imported"] += len(batch)
+        stats["batches"] += 1
+        batch.clear()
+
+    for tx in transactions:
+        if not tx:
+            stats["invalid"] += 1
+            continue
+
+        key = _content_key(phone, tx["timestamp"], tx["type"], tx["amount"], tx["note"])
+        occurrence = seen_counts.get(key, 0)
+        seen_counts[key] = occurrence + 1
+        message_id = f"import-{key:016x}-{occurrence}"
+
+        if exists(message_id) or occurrence < existing_count(key, tx["timestamp"]):
+            stats["duplicates"] += 1
+            continue
+
+        batch.append([
+            tx["timestamp"],
+            phone,
+            tx["type"],
+            tx["category"],
+            tx["amount"],
+            tx["note"],
+            message_id,
+        ])
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    if stats["duplicates"]:
+        DEDUPE_HITS.inc(stats["duplicates"], source="import")
+    print(f"[Import] {phone}: {stats}")
+    return stats
+
+
 def format_currency(amount: int) -> str:
     """Format angka ke format currency Rupiah yang mudah dibaca.
     
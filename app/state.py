@@ -1,10 +1,33 @@
-from time import time
+from app.cache import TTLCache
+from app.shared_state import SHARED_STORE, SharedTTLSet
+from app.config import EXPORT_MEDIA_TTL
 
-RATE_LIMIT = {}
-SEEN_MESSAGE_IDS = {}
+# Token bucket per (jenis pesan, phone) untuk app/ratelimit.py. TTL tiap
+# bucket di-set per entry = waktu refill penuh (RATE_LIMIT_TTL hanya default);
+# maxsize menjaga memory saat banyak nomor unik
+RATE_LIMIT_TTL = 600
+RATE_LIMIT_MAX_PHONES = 100000
+RATE_LIMIT = TTLCache(ttl=RATE_LIMIT_TTL, maxsize=RATE_LIMIT_MAX_PHONES)
+# Query /history terakhir per phone (keyword + cursor) untuk "/history next"
+HISTORY_CURSOR_TTL = 900
+HISTORY_MAX_CURSORS = 10000
+HISTORY_CURSORS = TTLCache(ttl=HISTORY_CURSOR_TTL, maxsize=HISTORY_MAX_CURSORS)
+# State alert per (phone, hari): running total dan threshold terakhir yang
+# sudah dikirim (app/alerts.py). Key memuat tanggal, TTL cukup > 1 hari
+ALERT_STATE_TTL = 2 * 86400
+ALERT_MAX_PHONES = 100000
+ALERT_STATE = TTLCache(ttl=ALERT_STATE_TTL, maxsize=ALERT_MAX_PHONES)
+# Media id WhatsApp PDF /export per (phone, hari, versi data), lihat
+# app/handlers/commands.py cmd_export
+EXPORT_MEDIA_MAX = 10000
+EXPORT_MEDIA = TTLCache(ttl=EXPORT_MEDIA_TTL, maxsize=EXPORT_MEDIA_MAX)
 MESSAGE_TTL = 10
+# Batas jumlah message ID yang diingat (melindungi memory saat retry storm)
+SEEN_MAX_IDS = 50000
 
-def cleanup_seen_ids(now):
-    for mid, ts in list(SEEN_MESSAGE_IDS.items()):
-        if now - ts > MESSAGE_TTL:
-            del SEEN_MESSAGE_IDS[mid]
+# Multi-worker: dedupe lewat SQLite bersama, single-process: TTLCache in-memory
+# (entry kadaluarsa dibuang sendiri oleh TTLCache.add, tanpa job cleanup)
+if SHARED_STORE is not None:
+    SEEN_MESSAGE_IDS = SharedTTLSet(SHARED_STORE, "message_id", ttl=MESSAGE_TTL)
+else:
+    SEEN_MESSAGE_IDS = TTLCache(ttl=MESSAGE_TTL, maxsize=SEEN_MAX_IDS)
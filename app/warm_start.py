@@ -0,0 +1,137 @@
+"""Warm-start snapshot cache tab Sheets, kolom transaksi dan replica di disk.
+
+Tanpa snapshot, setiap deploy/restart mulai dingin: request pertama
+membayar download penuh setiap tab, parse ulang kolom transaksi dan
+rebuild index /history. Snapshot menyimpan isi tab cache (beserta versi
+_meta saat diambil), TransactionColumns (dump array) dan posisi sync
+TransactionIndex ke satu file JSON, ditulis berkala dan saat shutdown.
+
+Format file hanya data (JSON, tanpa pickle): file yang rusak atau dari
+versi lain cukup diabaikan dan tidak pernah dieksekusi sebagai kode.
+Setiap bagian divalidasi saat dimuat (SNAPSHOT_FORMAT, spreadsheet, tipe
+isi tab, typecode/byteorder array kolom). Fitur ini opt-in lewat
+WARM_START_PATH (default kosong).
+
+Saat startup snapshot dimuat, lalu hanya delta sejak versi snapshot yang
+diambil (lihat _cached_read di app/sheets.py: tail untuk baris baru,
+download penuh hanya untuk tab yang versi writer-nya berubah). Index
+replica dibangun dari values tab cache tanpa read. /health mengembalikan
+503 sampai proses ini selesai.
+
+File ditulis atomik (tmp + os.replace) sehingga beberapa worker di host
+yang sama aman menulis ke path yang sama.
+"""
+
+import json
+import os
+import threading
+from time import perf_counter, time
+
+from app.config import WARM_START_PATH
+from app.metrics import ERRORS_SWALLOWED
+from app.replica import TRANSACTION_INDEX
+from app.sheets import (
+    SHEET_ID,
+    TRANSACTIONS_RANGE,
+    cached_values,
+    export_columns,
+    export_tab_cache,
+    load_columns,
+    load_tab_cache,
+    refresh_tab_cache,
+    transaction_columns,
+)
+
+# Naikkan jika struktur snapshot (tab cache / kolom / state replica) berubah
+SNAPSHOT_FORMAT = 2
+
+READY = threading.Event()
+
+
+def save_snapshot(path: str = WARM_START_PATH) -> bool:
+    """Tulis tab cache + kolom transaksi + state replica ke disk. Return True jika tersimpan."""
+    if not path:
+        return False
+    try:
+        tabs = export_tab_cache()
+        if not tabs:
+            return False
+        payload = {
+            "format": SNAPSHOT_FORMAT,
+            "sheet_id": SHEET_ID,
+            "saved_at": time(),
+            "tabs": tabs,
+            "columns": export_columns(),
+            "replica": TRANSACTION_INDEX.export_state(),
+        }
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        print(f"[WarmStart] Saved snapshot: {len(tabs)} ranges -> {path}")
+        return True
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="warm_start.save_snapshot")
+        print(f"[WarmStart] Error saving snapshot: {e}")
+        return False
+
+
+def load_snapshot(path: str = WARM_START_PATH) -> bool:
+    """Muat snapshot ke tab cache, kolom transaksi dan replica. Return True jika dipakai."""
+    if not path or not os.path.exists(path):
+        return False
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if not isinstance(payload, dict) or payload.get("format") != SNAPSHOT_FORMAT or payload.get("sheet_id") != SHEET_ID:
+            print(f"[WarmStart] Ignoring snapshot {path} (format/spreadsheet berbeda)")
+            return False
+        load_tab_cache(payload["tabs"])
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="warm_start.load_snapshot")
+        print(f"[WarmStart] Error loading snapshot: {e}")
+        return False
+
+    # Kolom dan replica opsional: jika bagian ini rusak, tab cache tetap dipakai
+    # dan keduanya dibangun dari values (CPU saja, tanpa read sheet)
+    try:
+        if payload.get("columns"):
+            load_columns(payload["columns"])
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="warm_start.load_snapshot")
+        print(f"[WarmStart] Ignoring snapshot columns: {e}")
+    try:
+        values = cached_values(TRANSACTIONS_RANGE)
+        if payload.get("replica") and values is not None:
+            TRANSACTION_INDEX.load_state(payload["replica"], values)
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="warm_start.load_snapshot")
+        print(f"[WarmStart] Ignoring snapshot replica: {e}")
+
+    age = time() - payload["saved_at"]
+    print(f"[WarmStart] Loaded snapshot: {len(payload['tabs'])} ranges, {age:.0f}s old")
+    return True
+
+
+def warm_start(path: str = WARM_START_PATH):
+    """Muat snapshot lalu ambil delta sejak versinya; set READY setelah selesai.
+
+    READY tetap di-set jika snapshot tidak ada atau gagal dimuat: app tetap
+    bisa melayani request, hanya mulai dingin.
+    """
+    start = perf_counter()
+    try:
+        if load_snapshot(path):
+            refreshed = refresh_tab_cache()
+            TRANSACTION_INDEX.sync()
+            transaction_columns()
+            print(f"[WarmStart] Delta applied for {refreshed} ranges in {perf_counter() - start:.3f}s")
+    except Exception as e:
+        ERRORS_SWALLOWED.inc(where="warm_start.warm_start")
+        print(f"[WarmStart] Error applying delta: {e}")
+    finally:
+        READY.set()
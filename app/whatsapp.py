@@ -1,5 +1,7 @@
 import requests
+from time import perf_counter
 from app.config import WHATSAPP_API_TOKEN, WHATSAPP_PHONE_NUMBER_ID
+from app.metrics import WHATSAPP_LATENCY, ERRORS_SWALLOWED
 
 
 def send_whatsapp_message(phone: str, message: str) -> bool:
@@ -31,8 +33,10 @@ def send_whatsapp_message(phone: str, message: str) -> bool:
         }
     }
     
+    start = perf_counter()
     try:
         response = requests.post(url, json=payload, headers=headers, timeout=10)
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status=response.status_code)
         try:
             response.raise_for_status()
             return True
@@ -41,5 +45,91 @@ def send_whatsapp_message(phone: str, message: str) -> bool:
             print(f"WhatsApp API error {response.status_code}: {response.text}")
             return False
     except requests.exceptions.RequestException as e:
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status="error")
+        ERRORS_SWALLOWED.inc(where="whatsapp.send_whatsapp_message")
         print(f"Error sending WhatsApp message to {phone}: {e}")
         return False
+
+
+def upload_media(data: bytes, mime_type: str, filename: str):
+    """
+    Upload file ke media endpoint WhatsApp Cloud API.
+
+    Args:
+        data: Isi file
+        mime_type: MIME type file (misal: application/pdf)
+        filename: Nama file
+
+    Returns:
+        str: Media id, atau None jika gagal
+    """
+    url = f"https://graph.facebook.com/v18.0/{WHATSAPP_PHONE_NUMBER_ID}/media"
+    headers = {"Authorization": f"Bearer {WHATSAPP_API_TOKEN}"}
+
+    start = perf_counter()
+    try:
+        response = requests.post(
+            url,
+            headers=headers,
+            data={"messaging_product": "whatsapp", "type": mime_type},
+            files={"file": (filename, data, mime_type)},
+            timeout=30,
+        )
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status=response.status_code)
+        try:
+            response.raise_for_status()
+            return response.json().get("id")
+        except requests.exceptions.HTTPError:
+            print(f"WhatsApp media upload error {response.status_code}: {response.text}")
+            return None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status="error")
+        ERRORS_SWALLOWED.inc(where="whatsapp.upload_media")
+        print(f"Error uploading WhatsApp media {filename}: {e}")
+        return None
+
+
+def send_whatsapp_document(phone: str, media_id: str, filename: str, caption: str = None) -> bool:
+    """
+    Mengirim dokumen (media yang sudah di-upload) ke nomor telepon tertentu.
+
+    Args:
+        phone: Nomor telepon penerima (format: 62xxxxxxxxx)
+        media_id: Id dari upload_media
+        filename: Nama file yang ditampilkan di WhatsApp
+        caption: Teks di bawah dokumen (opsional)
+
+    Returns:
+        bool: True jika berhasil dikirim, False jika gagal
+    """
+    url = f"https://graph.facebook.com/v18.0/{WHATSAPP_PHONE_NUMBER_ID}/messages"
+    headers = {
+        "Authorization": f"Bearer {WHATSAPP_API_TOKEN}",
+        "Content-Type": "application/json",
+    }
+    document = {"id": media_id, "filename": filename}
+    if caption:
+        document["caption"] = caption
+    payload = {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": phone,
+        "type": "document",
+        "document": document,
+    }
+
+    start = perf_counter()
+    try:
+        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status=response.status_code)
+        try:
+            response.raise_for_status()
+            return True
+        except requests.exceptions.HTTPError:
+            print(f"WhatsApp API error {response.status_code}: {response.text}")
+            return False
+    except requests.exceptions.RequestException as e:
+        WHATSAPP_LATENCY.observe(perf_counter() - start, status="error")
+        ERRORS_SWALLOWED.inc(where="whatsapp.send_whatsapp_document")
+        print(f"Error sending WhatsApp document to {phone}: {e}")
+        return False
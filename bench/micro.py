@@ -0,0 +1,180 @@
+"""Micro-benchmark untuk fungsi hot path: parser, agregasi, dan PDF.
+
+Setiap fungsi diukur pada Database_Input berisi 100, 10k, dan 100k baris
+(fake backend, tanpa latency). Pembacaan Sheets di-memoize lewat
+read_snapshot setelah satu panggilan warm-up, jadi yang diukur adalah loop
+filter/format di Python, bukan I/O.
+
+Hasil dibandingkan dengan baseline JSON (bench/baselines/micro.json).
+Median yang lebih lambat dari baseline * (1 + threshold) ditandai
+REGRESSION dan exit code menjadi 1.
+
+Contoh:
+    python -m bench.micro                      # bandingkan dengan baseline
+    python -m bench.micro --save               # tulis ulang baseline
+    python -m bench.micro --rows 100,10000 --only parse_message,get_category_breakdown
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+from time import perf_counter
+
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+DEFAULT_ROWS = "100,10000,100000"
+N_USERS = 10
+
+PARSE_SAMPLES = [
+    "makan siang 25k", "gaji 8500000", "grab ke kantor 32.500", "kopi 18k",
+    "belanja bulanan di market 1.250.000", "nonton bioskop 50k", "transfer 100000",
+]
+
+
+def measure(fn, repeat, min_time=0.05):
+    """Jalankan fn berulang, return median detik per panggilan.
+
+    Jumlah loop per sampel dikalibrasi supaya satu sampel minimal min_time
+    detik (fungsi yang sangat cepat seperti parse_message tetap stabil).
+    """
+    loops = 1
+    while True:
+        start = perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((perf_counter() - start) / loops)
+    return statistics.median(samples)
+
+
+def build_cases(sheets, parser, phone):
+    """Daftar (nama, fn, pakai_snapshot). Parser tidak bergantung jumlah baris."""
+    def parse_all():
+        for text in PARSE_SAMPLES:
+            parser.parse_message(text)
+
+    return [
+        ("parse_message", parse_all, False),
+        ("get_category_breakdown", lambda: sheets.get_category_breakdown(phone, 30), True),
+        ("get_income_expense_ratio", lambda: sheets.get_income_expense_ratio(phone, 30), True),
+        ("search_transactions", lambda: sheets.search_transactions(phone, "makan", 90), True),
+        ("get_daily_summary", lambda: sheets.get_daily_summary(phone), True),
+        ("generate_export_pdf", lambda: sheets.generate_export_pdf(phone, 30), True),
+        ("daily_totals_all_users", sheets.daily_totals_all_users, True),
+    ]
+
+
+def run(rows_list, only, repeat):
+    from app import parser, sheets
+
+    service = sheets.service
+    if not hasattr(service, "seed_transactions"):
+        sys.exit("SHEETS_BACKEND harus 'fake' untuk benchmark ini")
+    service.latency_ms = 0
+    service.latency_ms_per_1k = 0
+
+    results = {}
+    for rows in rows_list:
+        service.random.seed(0)
+        service.tabs.pop("_meta", None)
+        for table in service.tabs.values():
+            del table[1:]
+        phone = service.seed_transactions(rows, N_USERS)[0]
+        # Sama seperti startup app: tab _meta untuk change detection
+        sheets.clear_tab_cache()
+        sheets.ensure_meta_tab(ensure_formulas=True)
+
+        for name, fn, uses_snapshot in build_cases(sheets, parser, phone):
+            if only and name not in only:
+                continue
+            if name == "parse_message" and rows != rows_list[0]:
+                continue
+            key = name if name == "parse_message" else f"{name}@{rows}"
+            if uses_snapshot:
+                with sheets.read_snapshot():
+                    fn()
+                    seconds = measure(fn, repeat)
+            else:
+                seconds = measure(fn, repeat)
+            results[key] = seconds
+            print(f"{key:<36}{seconds * 1000:>12.4f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return list regresi (key, baseline, sekarang, rasio)."""
+    regressions = []
+    print(f"\n{'benchmark':<36}{'baseline ms':>14}{'now ms':>12}{'ratio':>8}")
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<36}{'-':>14}{seconds * 1000:>12.4f}{'new':>8}")
+            continue
+        ratio = seconds / base if base else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append((key, base, seconds, ratio))
+        print(f"{key:<36}{base * 1000:>14.4f}{seconds * 1000:>12.4f}{ratio:>8.2f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help=f"Ukuran Database_Input (default: {DEFAULT_ROWS})")
+    parser.add_argument("--only", help="Nama benchmark dipisah koma")
+    parser.add_argument("--repeat", type=int, default=5, help="Jumlah sampel per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Batas regresi relatif (default: 0.20)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="File baseline JSON")
+    parser.add_argument("--save", action="store_true", help="Simpan hasil sebagai baseline baru")
+    args = parser.parse_args(argv)
+
+    rows_list = [int(r) for r in args.rows.split(",")]
+    only = set(args.only.split(",")) if args.only else None
+    results = run(rows_list, only, args.repeat)
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f).get("results", {})
+        baseline.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": dict(sorted(baseline.items())),
+            }, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline disimpan ke {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nBaseline {args.baseline} belum ada, jalankan dengan --save")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regresi di atas {args.threshold:.0%}")
+        return 1
+    print("\nTidak ada regresi")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
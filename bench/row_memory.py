@@ -0,0 +1,98 @@
+"""Memory per baris transaksi untuk beberapa representasi.
+
+Membandingkan (diukur dengan tracemalloc, data sintetis fake backend):
+- api_rows      list of list string, seperti hasil values().get()
+- dict_rows     dict per baris seperti yang dulu dibuat setiap helper
+- columns       TransactionColumns (app/columns.py), dibangun dari api_rows:
+                array, string pool, index posisi, dan list notes
+- notes         object string note yang direferensikan kolom; dipakai
+                bersama dengan api_rows sehingga tidak muncul di "columns",
+                tapi tetap bagian dari biaya per baris jika api_rows dibuang
+- replica       TransactionIndex (app/replica.py): kolom + posting list
+                /history, tanpa object string note
+
+Contoh:
+    python -m bench.row_memory
+    python -m bench.row_memory --rows 100000,1000000 --users 5000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+
+def allocated(build):
+    """(object, byte yang dialokasikan oleh build())."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def run(rows, users):
+    from app.columns import TransactionColumns
+    from app.replica import TransactionIndex
+    from app.fake_sheets import FakeSheetsService
+
+    service = FakeSheetsService(seed=0)
+    for table in service.tabs.values():
+        del table[1:]
+    service.seed_transactions(rows, users)
+    source = service.tabs["Database_Input"]
+
+    # Salin ulang string supaya ukuran api_rows mencerminkan response API
+    # (tiap sel object string sendiri, bukan hasil intern dari seed)
+    api_rows, api_bytes = allocated(lambda: [[("" + c + " ")[:-1] for c in r] for r in source])
+    _, dict_bytes = allocated(lambda: [{
+        "timestamp": r[0], "phone": r[1], "type": r[2],
+        "category": r[3], "amount": int(r[4]), "note": r[5],
+    } for r in api_rows[1:]])
+    columns, columns_bytes = allocated(lambda: TransactionColumns.from_values(api_rows))
+    notes_bytes = sum(sys.getsizeof(note) for note in {id(note): note for note in columns.notes}.values())
+
+    def build_replica():
+        index = TransactionIndex()
+        index._load(api_rows, len(api_rows))
+        return index
+    _, replica_bytes = allocated(build_replica)
+
+    n = max(len(columns), 1)
+    return {
+        "api_rows": api_bytes / n,
+        "dict_rows": dict_bytes / n,
+        "columns": columns_bytes / n,
+        "columns_nbytes": columns.nbytes() / n,
+        "notes": notes_bytes / n,
+        "replica": replica_bytes / n,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000,100000", help="Jumlah baris, dipisah koma")
+    parser.add_argument("--users", type=int, default=1000, help="Jumlah user sintetis")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'rows':>10}{'api_rows':>12}{'dict_rows':>12}{'columns':>12}{'(arrays)':>12}"
+        f"{'+notes':>12}{'replica':>12}  bytes/row"
+    )
+    for rows in [int(r) for r in args.rows.split(",")]:
+        result = run(rows, args.users)
+        print(
+            f"{rows:>10,}{result['api_rows']:>12.1f}{result['dict_rows']:>12.1f}"
+            f"{result['columns']:>12.1f}{result['columns_nbytes']:>12.1f}"
+            f"{result['columns'] + result['notes']:>12.1f}{result['replica']:>12.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+"""Load benchmark end-to-end untuk POST /webhook dengan backend lokal.
+
+Google Sheets diganti FakeSheetsService (SHEETS_BACKEND=fake) dan WhatsApp
+di-stub, lalu payload webhook WhatsApp dikirim langsung ke ASGI app pada
+target QPS (open loop: latency dihitung dari jadwal kirim, jadi antrian ikut
+terukur). Untuk setiap ukuran Database_Input dilaporkan throughput,
+p50/p95/p99 latency, jumlah call backend per pesan, dan error per jenis
+pesan. /webhook selalu menjawab 200, jadi pesan dihitung error jika
+status != 200, ada exception yang ditelan (ERRORS_SWALLOWED) selama pesan
+itu diproses, atau balasannya berisi "❌".
+
+Contoh:
+    python -m bench.webhook_load --rows 1000,10000,100000 --qps 50 --messages 500
+    python -m bench.webhook_load --rows 10000 --latency-ms 80 --latency-ms-per-1k 15
+    python -m bench.webhook_load --replay captured.jsonl --json result.json
+
+Format --replay: satu payload webhook JSON per baris (seperti yang diterima
+dari WhatsApp Cloud API).
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import random
+import sys
+from time import perf_counter
+
+# Backend harus dipilih sebelum app di-import
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+DEFAULT_MIX = "transaction=0.75,/summary=0.08,/breakdown=0.07,/weekly=0.04,/history=0.04,/export=0.02"
+
+TRANSACTION_TEMPLATES = [
+    "makan siang {k}k", "kopi {k}k", "grab kantor {k}k", "bensin {k}k",
+    "belanja bulanan {k}k", "nonton {k}k", "jajan {k}k", "gaji {m}000000",
+]
+
+_current_kind = contextvars.ContextVar("bench_kind", default="other")
+# Hasil pesan yang sedang diproses (ikut terbawa ke run_in_threadpool)
+_current_result = contextvars.ContextVar("bench_result", default=None)
+ERROR_REPLY_MARK = "❌"
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def parse_mix(spec):
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def webhook_payload(phone, message_id, text):
+    """Payload seperti yang dikirim WhatsApp Cloud API untuk satu pesan teks."""
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "bench-waba",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "metadata": {"display_phone_number": "620000000000", "phone_number_id": "bench"},
+                    "contacts": [{"profile": {"name": "bench"}, "wa_id": phone}],
+                    "messages": [{
+                        "from": phone,
+                        "id": message_id,
+                        "timestamp": "0",
+                        "type": "text",
+                        "text": {"body": text},
+                    }],
+                },
+            }],
+        }],
+    }
+
+
+def synthetic_traffic(phones, n_messages, mix, rng, run_tag=""):
+    """Generate (kind, payload) sesuai proporsi mix.
+
+    run_tag masuk ke message id supaya skenario berikutnya tidak kena dedupe.
+    """
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    for i in range(n_messages):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "transaction":
+            text = rng.choice(TRANSACTION_TEMPLATES).format(k=rng.randint(5, 150), m=rng.randint(3, 9))
+        else:
+            text = kind
+        yield kind, webhook_payload(rng.choice(phones), f"wamid.bench.{run_tag}.{i}", text)
+
+
+def replay_traffic(path):
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            try:
+                text = payload["entry"][0]["changes"][0]["value"]["messages"][0]["text"]["body"]
+                kind = text.split()[0] if text.startswith("/") else "transaction"
+            except (KeyError, IndexError):
+                kind = "other"
+            yield kind, payload
+
+
+async def post_webhook(app, payload):
+    body = json.dumps(payload).encode()
+    sent = False
+    status = {}
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status["code"] = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/webhook",
+        "raw_path": b"/webhook",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 8000),
+    }
+    await app(scope, receive, send)
+    return status.get("code")
+
+
+async def run_load(app, traffic, qps):
+    """Kirim traffic pada target QPS, return list hasil per pesan."""
+    results = []
+    start = perf_counter()
+    tasks = []
+
+    async def one(i, kind, payload):
+        scheduled = start + i / qps
+        delay = scheduled - perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _current_kind.set(kind)
+        result = {"kind": kind, "swallowed": {}, "error_replies": 0}
+        _current_result.set(result)
+        code = await post_webhook(app, payload)
+        result.update(latency=perf_counter() - scheduled, status=code)
+        results.append(result)
+
+    for i, (kind, payload) in enumerate(traffic):
+        tasks.append(asyncio.create_task(one(i, kind, payload)))
+    await asyncio.gather(*tasks)
+    return results, perf_counter() - start
+
+
+def is_error(result) -> bool:
+    return result["status"] != 200 or bool(result["swallowed"]) or result["error_replies"] > 0
+
+
+def summarize(results, elapsed, backend_calls, sends):
+    by_kind = {}
+    for r in results:
+        by_kind.setdefault(r["kind"], []).append(r["latency"])
+
+    def stats(latencies):
+        return {
+            "count": len(latencies),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        }
+
+    report = {
+        "messages": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_msg_s": round(len(results) / elapsed, 2) if elapsed else 0,
+        "errors": sum(1 for r in results if is_error(r)),
+        "latency": stats([r["latency"] for r in results]),
+        "whatsapp_sends_per_msg": round(sum(sends.values()) / max(len(results), 1), 2),
+        "by_kind": {},
+    }
+    for kind, latencies in sorted(by_kind.items()):
+        calls = backend_calls.get(kind, {})
+        entry = stats(latencies)
+        entry["sheets_calls_per_msg"] = {
+            method: round(n / len(latencies), 2) for method, n in sorted(calls.items())
+        }
+        entry["whatsapp_sends_per_msg"] = round(sends.get(kind, 0) / len(latencies), 2)
+        kind_results = [r for r in results if r["kind"] == kind]
+        entry["errors"] = sum(1 for r in kind_results if is_error(r))
+        entry["error_replies"] = sum(r["error_replies"] for r in kind_results)
+        swallowed = {}
+        for r in kind_results:
+            for where, n in r["swallowed"].items():
+                swallowed[where] = swallowed.get(where, 0) + n
+        entry["errors_swallowed"] = swallowed
+        report["by_kind"][kind] = entry
+    return report
+
+
+def print_report(rows, report):
+    print(f"\n=== Database_Input rows: {rows:,} ===")
+    lat = report["latency"]
+    print(
+        f"messages={report['messages']} throughput={report['throughput_msg_s']} msg/s "
+        f"p50={lat['p50_ms']}ms p95={lat['p95_ms']}ms p99={lat['p99_ms']}ms "
+        f"errors={report['errors']} wa_sends/msg={report['whatsapp_sends_per_msg']}"
+    )
+    print(f"{'kind':<14}{'n':>6}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  sheets calls/msg")
+    for kind, entry in report["by_kind"].items():
+        calls = ", ".join(f"{m}={n}" for m, n in entry["sheets_calls_per_msg"].items()) or "-"
+        print(
+            f"{kind:<14}{entry['count']:>6}{entry['errors']:>8}"
+            f"{entry['p50_ms']:>10}{entry['p95_ms']:>10}{entry['p99_ms']:>10}  {calls}"
+        )
+    for kind, entry in report["by_kind"].items():
+        if entry["errors_swallowed"] or entry["error_replies"]:
+            where = ", ".join(f"{w}={n}" for w, n in sorted(entry["errors_swallowed"].items())) or "-"
+            print(f"  ! {kind}: error_replies={entry['error_replies']} errors_swallowed: {where}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000,10000", help="Ukuran Database_Input, dipisah koma (default: 1000,10000)")
+    parser.add_argument("--users", type=int, default=200, help="Jumlah user sintetis")
+    parser.add_argument("--messages", type=int, default=300, help="Jumlah pesan per skenario")
+    parser.add_argument("--qps", type=float, default=50, help="Target pesan per detik")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Proporsi jenis pesan (default: {DEFAULT_MIX})")
+    parser.add_argument("--replay", help="File JSONL payload webhook untuk di-replay")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latency fake Sheets per request")
+    parser.add_argument("--latency-ms-per-1k", type=float, default=0, help="Latency fake Sheets per 1000 baris")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep-rate-limit", action="store_true", help="Jangan longgarkan rate limiter")
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    if not args.keep_rate_limit:
+        for kind in ("COMMAND", "TRANSACTION"):
+            os.environ.setdefault(f"RATE_LIMIT_{kind}_BURST", "1000000")
+
+    from app import main as app_main
+    from app import metrics, sheets
+
+    service = sheets.service
+    if not hasattr(service, "seed_transactions"):
+        sys.exit("SHEETS_BACKEND harus 'fake' untuk benchmark ini")
+    service.latency_ms = args.latency_ms
+    service.latency_ms_per_1k = args.latency_ms_per_1k
+
+    # Hitung call Sheets per jenis pesan (contextvar per task asyncio)
+    backend_calls = {}
+    original_count = service._count
+
+    def count(method):
+        original_count(method)
+        per_kind = backend_calls.setdefault(_current_kind.get(), {})
+        per_kind[method] = per_kind.get(method, 0) + 1
+    service._count = count
+
+    # Stub WhatsApp: tidak ada request keluar, cukup dihitung
+    sends = {}
+
+    def fake_send(phone, message):
+        kind = _current_kind.get()
+        sends[kind] = sends.get(kind, 0) + 1
+        result = _current_result.get()
+        if result is not None and ERROR_REPLY_MARK in message:
+            result["error_replies"] += 1
+        return True
+    app_main.send_whatsapp_message = fake_send
+
+    # Exception yang ditelan handler tetap dihitung sebagai error pesan itu
+    original_inc = metrics.ERRORS_SWALLOWED.inc
+
+    def counting_inc(amount=1, **labels):
+        original_inc(amount, **labels)
+        result = _current_result.get()
+        if result is not None:
+            where = labels.get("where", "")
+            result["swallowed"][where] = result["swallowed"].get(where, 0) + amount
+    metrics.ERRORS_SWALLOWED.inc = counting_inc
+
+    all_reports = {}
+    for rows in [int(r) for r in args.rows.split(",")]:
+        rng = random.Random(args.seed)
+        service.random.seed(args.seed)
+        service.tabs.pop("_meta", None)
+        for tab, table in service.tabs.items():
+            del table[1:]
+        phones = service.seed_transactions(rows, args.users)
+        # Sama seperti startup app: tab _meta untuk change detection
+        sheets.clear_tab_cache()
+        sheets.ensure_meta_tab(ensure_formulas=True)
+        backend_calls.clear()
+        sends.clear()
+
+        if args.replay:
+            traffic = list(replay_traffic(args.replay))
+        else:
+            traffic = list(synthetic_traffic(phones, args.messages, parse_mix(args.mix), rng, run_tag=rows))
+
+        results, elapsed = asyncio.run(run_load(app_main.app, traffic, args.qps))
+        report = summarize(results, elapsed, backend_calls, sends)
+        print_report(rows, report)
+        all_reports[rows] = report
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": all_reports}, f, indent=2)
+        print(f"\nHasil disimpan ke {args.json}")
+    return all_reports
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Fixture bersama: app dijalankan ke FakeSheetsService (tanpa kredensial/network)."""
+
+import itertools
+import os
+
+os.environ.setdefault("SHEETS_BACKEND", "fake")
+
+import pytest
+
+from app import sheets
+from app.fake_sheets import FakeSheetsService
+
+_IDS = itertools.count()
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    """Spreadsheet fake kosong (dengan _meta dan _blocks) untuk satu test."""
+    service = FakeSheetsService(seed=0)
+    monkeypatch.setattr(sheets, "service", service)
+    monkeypatch.setattr(sheets, "sheet", service.spreadsheets())
+    sheets.clear_tab_cache()
+    sheets._SETTINGS_INDEX.clear()
+    sheets.ensure_meta_tab(ensure_formulas=True)
+    yield service
+    sheets.clear_tab_cache()
+    sheets._SETTINGS_INDEX.clear()
+
+
+@pytest.fixture
+def webhook(fake_sheets, monkeypatch):
+    """Kirim satu pesan per batch webhook; return balasan WhatsApp untuk pesan itu."""
+    from app import main
+    replies = []
+    monkeypatch.setattr(main, "send_whatsapp_message", lambda phone, text: replies.append(text) or True)
+
+    def send(phone, text, message_id=None):
+        replies.clear()
+        message_id = message_id or f"wamid.test-{next(_IDS)}"
+        main.process_messages([{"from": phone, "id": message_id, "text": {"body": text}}])
+        return "\n\n".join(replies)
+
+    return send
@@ -0,0 +1,93 @@
+"""Alert budget / daily target lewat jalur webhook (process_messages)."""
+
+import pytest
+
+from app.alerts import ALERTS
+from app.cache import TTLCache
+from app.state import SEEN_MESSAGE_IDS
+
+
+@pytest.fixture(autouse=True)
+def alert_state(monkeypatch):
+    monkeypatch.setattr(ALERTS, "cache", TTLCache(ttl=3600, maxsize=100))
+
+
+def test_seed_includes_current_transaction_after_budget_set_mid_day(webhook):
+    phone = "62800000001"
+    webhook(phone, "makan 25000")
+    webhook(phone, "makan 18000")
+    webhook(phone, "/setbudget makan 40000")
+
+    reply = webhook(phone, "makan 30000")
+
+    assert "BUDGET ALERT" in reply
+    assert "Spent: Rp 73,000 (150%)" in reply
+
+
+def test_warning_after_undo_reseeds_from_sheet(webhook):
+    phone = "62800000002"
+    webhook(phone, "/setbudget makan 100000")
+    assert "BUDGET" not in webhook(phone, "makan 50000")
+    assert "BUDGET" not in webhook(phone, "makan 20000")
+    webhook(phone, "/undo")
+
+    reply = webhook(phone, "makan 40000")
+
+    assert "BUDGET WARNING" in reply
+    assert "Spent: Rp 90,000 (80%)" in reply
+
+
+def test_deduplicated_retry_is_not_counted_again(webhook):
+    phone = "62800000003"
+    webhook(phone, "/setbudget makan 100000")
+    assert "BUDGET" not in webhook(phone, "makan 70000", message_id="wamid.retry")
+
+    # Retry setelah dedupe webhook lupa ID-nya: baris ditolak has_message_ids
+    SEEN_MESSAGE_IDS.pop("wamid.retry")
+    assert "BUDGET" not in webhook(phone, "makan 70000", message_id="wamid.retry")
+
+    assert "BUDGET" not in webhook(phone, "makan 5000")
+    reply = webhook(phone, "makan 10000")
+    assert "Spent: Rp 85,000 (80%)" in reply
+
+
+def test_each_threshold_alerts_once(webhook):
+    phone = "62800000004"
+    webhook(phone, "/setbudget makan 100000")
+    replies = [webhook(phone, f"makan {amount}") for amount in (50000, 30000, 10000, 20000, 5000, 40000)]
+
+    assert ["(80%)" in r for r in replies] == [False, True, False, False, False, False]
+    assert ["(100%)" in r for r in replies] == [False, False, False, True, False, False]
+    assert ["(150%)" in r for r in replies] == [False, False, False, False, False, True]
+
+
+def test_concurrent_updates_keep_every_amount(monkeypatch):
+    import threading
+    import time
+
+    from app import alerts
+
+    class SlowCache(TTLCache):
+        def get(self, key, default=None, now=None):
+            value = super().get(key, default, now)
+            time.sleep(0.001)  # perlebar jendela read-modify-write
+            return value
+
+    monkeypatch.setattr(alerts, "budget_limits", lambda phone: {"makan": 10_000_000})
+    monkeypatch.setattr(alerts, "spending_limits", lambda phone: {})
+    monkeypatch.setattr(alerts, "today_expense_by_category", lambda phone: {"makan": 1000})
+    engine = alerts.AlertEngine(store=None, cache=SlowCache(ttl=3600, maxsize=100))
+
+    def worker():
+        for _ in range(20):
+            engine.evaluate("62800000009", {"makan": 1000}, day="2026-10-19")
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    state = engine.cache.get("62800000009:2026-10-19")
+    assert state["budget:makan"]["total"] == 100 * 1000
+    assert "_fired" not in state
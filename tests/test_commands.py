@@ -0,0 +1,39 @@
+"""Render command analisis lewat jalur webhook."""
+
+
+def test_breakdown_lists_totals_and_counts(webhook):
+    phone = "62800000101"
+    for text in ("makan 25000", "makan 15000", "bensin 18000"):
+        webhook(phone, text)
+
+    reply = webhook(phone, "/breakdown 7")
+
+    assert "BREAKDOWN 7 HARI" in reply
+    assert "makan: Rp 40,000 (2 transaksi)" in reply
+    assert "transport: Rp 18,000 (1 transaksi)" in reply
+    assert reply.index("makan") < reply.index("transport")
+
+
+def test_ratio_shows_income_and_expense(webhook):
+    phone = "62800000102"
+    webhook(phone, "gaji 1000000")
+    webhook(phone, "makan 250000")
+
+    reply = webhook(phone, "/ratio 7")
+
+    assert "Income: Rp 1,000,000" in reply
+    assert "Expense: Rp 250,000" in reply
+    assert "Saving Rate: 75.0%" in reply
+
+
+def test_undone_only_user_gets_no_daily_report(webhook):
+    from app import sheets
+
+    webhook("62800000103", "makan 25000")
+    webhook("62800000104", "makan 30000")
+    webhook("62800000104", "/undo")
+
+    phones = sheets.get_all_user_phones()
+
+    assert "62800000103" in phones
+    assert "62800000104" not in phones
@@ -0,0 +1,69 @@
+"""Import CSV mutasi rekening lewat POST /import/{phone}."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main, sheets
+
+TOKEN = "test-import-token"
+CSV = (
+    "Tanggal,Keterangan,Debit,Kredit\n"
+    "2026-10-01,Indomaret,25000,\n"
+    "2026-10-01,Indomaret,25000,\n"
+    "2026-10-02,Gaji,,5000000\n"
+)
+
+
+@pytest.fixture
+def client(fake_sheets, monkeypatch):
+    monkeypatch.setattr(main, "IMPORT_API_TOKEN", TOKEN)
+    return TestClient(main.app)
+
+
+def _upload(client, phone, body):
+    return client.post(
+        f"/import/{phone}",
+        headers={"Authorization": f"Bearer {TOKEN}"},
+        files={"file": ("mutasi.csv", body.encode(), "text/csv")},
+    )
+
+
+def test_bad_header_rejected_before_any_sheets_call(client, fake_sheets):
+    calls = dict(fake_sheets.calls)
+
+    response = _upload(client, "62800000201", "foo,bar\n1,2\n")
+
+    assert response.status_code == 400
+    assert "header" in response.json()["error"]
+    assert fake_sheets.calls == calls
+
+
+def test_reimport_dedupes_via_cached_indexes(client, monkeypatch):
+    phone = "62800000202"
+    first = _upload(client, phone, CSV).json()
+    assert (first["imported"], first["duplicates"]) == (3, 0)
+
+    ranges = []
+    read_range = sheets._read_range
+    monkeypatch.setattr(sheets, "_read_range", lambda r: ranges.append(r) or read_range(r))
+    second = _upload(client, phone, CSV).json()
+
+    assert (second["imported"], second["duplicates"]) == (0, 3)
+    # Index message ID dan kolom transaksi user, keduanya lewat tab cache
+    assert ranges == [sheets.MESSAGE_IDS_RANGE, sheets.TRANSACTIONS_RANGE]
+
+
+def test_import_skips_rows_already_logged_via_whatsapp(client, webhook):
+    phone = "62800000203"
+    webhook(phone, "bakso 25000")
+    today = sheets.datetime.utcnow().date().isoformat()
+    body = (
+        "Tanggal,Keterangan,Debit,Kredit\n"
+        f"{today},bakso 25000,25000,\n"
+        f"{today},bakso 25000,25000,\n"
+    )
+
+    stats = _upload(client, phone, body).json()
+
+    # Satu sudah tercatat lewat WhatsApp, kemunculan kedua tetap diimport
+    assert (stats["imported"], stats["duplicates"]) == (1, 1)
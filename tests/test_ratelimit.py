@@ -0,0 +1,71 @@
+"""Token bucket: bucket yang kosong tidak boleh expired sebelum penuh lagi."""
+
+import threading
+import time
+
+import pytest
+
+from app import ratelimit
+from app.cache import TTLCache
+
+
+@pytest.fixture
+def buckets(monkeypatch):
+    monkeypatch.setattr(ratelimit, "SHARED_STORE", None)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT", TTLCache(ttl=600, maxsize=100))
+
+
+def _drain(phone, now):
+    results = [ratelimit.check_rate_limit(phone, "transaction", now=now) for _ in range(3)]
+    assert results == ["allowed", "allowed", "notify"]
+
+
+def test_slow_refill_bucket_outlives_default_ttl(buckets, monkeypatch):
+    # 2 token, refill 0.1/menit -> penuh lagi setelah 1200 detik (> 600)
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, "transaction", (2, 0.1))
+    _drain("62811", now=0)
+
+    assert ratelimit.check_rate_limit("62811", "transaction", now=700) == "allowed"
+    assert ratelimit.check_rate_limit("62811", "transaction", now=700) != "allowed"
+
+
+def test_zero_refill_bucket_never_expires(buckets, monkeypatch):
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, "transaction", (2, 0))
+    _drain("62812", now=0)
+
+    assert ratelimit.check_rate_limit("62812", "transaction", now=10 ** 7) == "rejected"
+
+
+def test_idle_bucket_is_dropped_after_full_refill(buckets, monkeypatch):
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, "transaction", (2, 60))
+    _drain("62813", now=0)
+
+    assert ratelimit.check_rate_limit("62813", "transaction", now=3) == "allowed"
+    assert ratelimit.RATE_LIMIT.get("transaction:62813", now=10) is None
+
+
+def test_concurrent_messages_never_share_a_token(monkeypatch):
+    class SlowCache(TTLCache):
+        def get(self, key, default=None, now=None):
+            value = super().get(key, default, now)
+            time.sleep(0.001)  # perlebar jendela read-modify-write
+            return value
+
+    monkeypatch.setattr(ratelimit, "SHARED_STORE", None)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT", SlowCache(ttl=600, maxsize=100))
+    monkeypatch.setitem(ratelimit.RATE_LIMITS, "transaction", (10, 0))
+    allowed = ratelimit.RATE_LIMIT_MESSAGES.value(kind="transaction", result="allowed")
+    results = []
+
+    def worker():
+        for _ in range(10):
+            results.append(ratelimit.check_rate_limit("62814", "transaction", now=0))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count("allowed") == 10 and results.count("notify") == 1
+    assert ratelimit.RATE_LIMIT_MESSAGES.value(kind="transaction", result="allowed") == allowed + 10
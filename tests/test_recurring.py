@@ -0,0 +1,79 @@
+"""Recurring: retry setelah batchUpdate last_run gagal tidak menduplikasi transaksi."""
+
+from datetime import datetime, timedelta
+
+from app import sheets
+from app.recurring import RecurringQueue
+
+
+def test_retry_after_failed_last_run_update_does_not_duplicate(fake_sheets, monkeypatch):
+    sheets.add_recurring("62800000009", "netflix", 54000, "daily", "langganan")
+    now = datetime.utcnow() + timedelta(days=1, minutes=1)
+    queue = RecurringQueue()
+
+    execute = sheets._execute
+    failures = []
+
+    def flaky_execute(request, method, range_name):
+        if method == "batchUpdate" and range_name == "Recurring_Transactions" and not failures:
+            failures.append(range_name)
+            raise RuntimeError("quota exceeded")
+        return execute(request, method, range_name)
+
+    monkeypatch.setattr(sheets, "_execute", flaky_execute)
+    assert queue.run_due(now) == 0  # append berhasil, last_run gagal
+    assert failures
+
+    queue.run_due(now)
+    recurring_rows = [r for r in fake_sheets.tabs["Database_Input"] if r[6].startswith("recurring-")]
+    assert len(recurring_rows) == 1
+
+    # last_run sudah ditulis: tick berikutnya tidak menjalankan item lagi
+    assert queue.run_due(now) == 0
+    assert queue._heap[0][0] > now
+
+
+def test_retry_continues_past_batch_with_nothing_new(fake_sheets, monkeypatch):
+    sheets.add_recurring("62800000010", "netflix", 54000, "daily", "langganan")
+    sheets.add_recurring("62800000011", "spotify", 55000, "daily", "langganan")
+    now = datetime.utcnow() + timedelta(days=1, minutes=1)
+    queue = RecurringQueue()
+    monkeypatch.setattr(queue, "pop_due", lambda now: RecurringQueue.pop_due(queue, now, limit=1))
+
+    execute = sheets._execute
+    failures = []
+
+    def flaky_execute(request, method, range_name):
+        if method == "batchUpdate" and range_name == "Recurring_Transactions" and not failures:
+            failures.append(range_name)
+            raise RuntimeError("quota exceeded")
+        return execute(request, method, range_name)
+
+    monkeypatch.setattr(sheets, "_execute", flaky_execute)
+    assert queue.run_due(now) == 0
+
+    # Batch pertama sudah ada di Database_Input (hanya last_run ditulis),
+    # item kedua tetap dijalankan di tick yang sama
+    assert queue.run_due(now) == 1
+    phones = sorted(r[1] for r in fake_sheets.tabs["Database_Input"] if r[6].startswith("recurring-"))
+    assert phones == ["62800000010", "62800000011"]
+
+
+def test_row_deleted_by_hand_does_not_shift_dedupe_or_last_run(fake_sheets):
+    sheets.add_recurring("62800000012", "netflix", 54000, "daily", "langganan")
+    sheets.add_recurring("62800000013", "spotify", 55000, "daily", "langganan")
+    now = datetime.utcnow() + timedelta(days=1, minutes=1)
+    queue = RecurringQueue()
+    queue.reload()
+
+    # Baris pertama dihapus manual setelah heap dimuat: item kedua pindah ke baris 2
+    del fake_sheets.tabs["Recurring_Transactions"][1]
+
+    assert queue.run_due(now) == 1
+    inserted = [r for r in fake_sheets.tabs["Database_Input"] if r[6].startswith("recurring-")]
+    assert [r[1] for r in inserted] == ["62800000013"]
+    recurring = fake_sheets.tabs["Recurring_Transactions"]
+    assert len(recurring) == 2
+    assert recurring[1][1] == "62800000013"
+    assert recurring[1][5] == now.isoformat()
+    assert len(queue) == 1
@@ -0,0 +1,74 @@
+"""Replica /history di atas kolom typed, dan overlay baris yang belum di-flush."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import aggregate, sheets
+from app.columns import ColumnsOverlay, TransactionColumns
+from app.replica import TransactionIndex
+
+
+def _row(minutes_ago, phone, category, amount, note, message_id):
+    ts = (datetime.utcnow() - timedelta(minutes=minutes_ago)).isoformat()
+    return [ts, phone, "expense", category, str(amount), note, message_id]
+
+
+@pytest.fixture
+def index(fake_sheets):
+    rows = fake_sheets.tabs["Database_Input"]
+    phone = "62800000401"
+    for i in range(30):
+        rows.append(_row(100 - i, phone, "transport", 10000 + i, f"grab kantor {i}", f"m-{i}"))
+    rows.append(_row(5, phone, "makan", 25000, "nasi padang", "m-makan"))
+    rows.append(_row(4, "62800000402", "transport", 15000, "grab kantor", "m-other"))
+    index = TransactionIndex()
+    index.sync()
+    return index, phone
+
+
+def test_search_pages_newest_first_by_position(index):
+    index, phone = index
+    assert isinstance(index.columns, TransactionColumns)
+    assert all(type(p).__name__ == "array" for p in index.postings[index.columns.phones.get(phone)].values())
+
+    page, cursor = index.search(phone, ["grab", "kant"], limit=20)
+    assert [tx["note"] for tx in page[:2]] == ["grab kantor 29", "grab kantor 28"]
+    assert cursor is not None
+    rest, cursor = index.search(phone, ["grab", "kant"], before=cursor, limit=20)
+    assert len(page) + len(rest) == 30 and cursor is None
+    assert rest[-1]["note"] == "grab kantor 0"
+
+
+def test_replaced_and_deleted_rows_are_skipped(index):
+    index, phone = index
+    last = index.last_transaction(phone)
+    assert (last["category"], last["amount"]) == ("makan", 25000)
+
+    # Edit manual: baris nasi padang diganti isinya
+    index.replace_rows(last["row"], [_row(5, phone, "makan", 30000, "soto ayam", "m-makan")])
+    assert not index.search(phone, ["padang"])[0]
+    assert index.search(phone, ["soto"])[0][0]["amount"] == 30000
+
+    index.mark_deleted(last["row"])
+    assert not index.search(phone, ["soto"])[0]
+    assert index.last_transaction(phone)["note"] == "grab kantor 29"
+
+
+def test_pending_rows_are_an_overlay_not_a_copy(fake_sheets):
+    phone = "62800000403"
+    fake_sheets.tabs["Database_Input"].append(_row(10, phone, "makan", 20000, "bakso", "m-1"))
+    base = sheets.transaction_columns()
+    start, end = sheets._today_window()
+    assert aggregate.category_totals(base, start, end, phone=phone) == {"makan": 20000}
+    arrays = aggregate._VECTOR_MEMO["arrays"]
+
+    with sheets.read_snapshot(), sheets.buffered_appends():
+        sheets.insert_transactions(phone, [({"type": "expense", "category": "makan", "amount": 5000, "note": "es teh"}, "m-2")])
+        columns = sheets.transaction_columns()
+        assert isinstance(columns, ColumnsOverlay)
+        assert columns.base is base and len(columns.pending) == 1
+        assert sheets.today_expense_by_category(phone) == {"makan": 25000}
+        # Memo NumPy kolom bersama tidak tergeser oleh baris pending
+        if aggregate.NUMPY_AVAILABLE:
+            assert aggregate._VECTOR_MEMO["arrays"] is arrays
@@ -0,0 +1,53 @@
+"""Keputusan tab cache (hit / tail / full) yang dipakai client sync dan async."""
+
+import asyncio
+
+from app import async_sheets, sheets
+
+RANGE = "Budget_Settings!A:D"
+
+
+def _append(fake_sheets, rows):
+    fake_sheets.spreadsheets().values().append(
+        spreadsheetId=sheets.SHEET_ID, range=RANGE, valueInputOption="RAW", body={"values": rows}
+    ).execute()
+
+
+def test_cache_plan_hit_tail_full(fake_sheets):
+    sheets._VERSIONS_MEMO["at"] = None
+    assert sheets._cache_plan(RANGE, sheets.tab_versions())[0] == "full"
+    sheets._read_range(RANGE)
+    assert sheets._cache_plan(RANGE, sheets.tab_versions())[0] == "hit"
+
+    _append(fake_sheets, [["2026-10-19T08:00:00", "62800000301", "makan", "50000"]])
+    sheets._VERSIONS_MEMO["at"] = None
+    kind, plan = sheets._cache_plan(RANGE, sheets.tab_versions())
+    assert (kind, plan[0]) == ("tail", "Budget_Settings!A2:D")
+    assert sheets._cache_plan(RANGE, {}) == ("uncached", None)
+
+
+def test_async_read_uses_same_tail_as_sync(fake_sheets):
+    sheets._read_range(RANGE)
+    _append(fake_sheets, [["2026-10-19T08:00:00", "62800000302", "makan", "50000"]])
+    sheets._VERSIONS_MEMO["at"] = None
+    gets = fake_sheets.calls.get("get", 0)
+
+    result = asyncio.run(async_sheets.read_range(RANGE))
+
+    assert result["values"][-1] == ["2026-10-19T08:00:00", "62800000302", "makan", "50000"]
+    # Satu read _meta + satu read tail, tanpa download ulang tab
+    assert fake_sheets.calls.get("get", 0) - gets == 2
+    assert sheets._TAB_CACHE[RANGE]["values"] is result["values"]
+
+
+def test_startup_block_formulas_only_from_leader(fake_sheets):
+    blocks = fake_sheets.tabs[sheets.BLOCKS_TAB]
+    before = len(blocks)
+    assert before > 1
+
+    # Worker non-leader: _meta/_blocks sudah ada, tidak ada append formula lagi
+    del blocks[1:]
+    sheets.ensure_meta_tab()
+    assert len(blocks) == 1
+    sheets.ensure_meta_tab(ensure_formulas=True)
+    assert len(blocks) == before
@@ -0,0 +1,63 @@
+"""Warm-start snapshot: format data-only, delta-only startup."""
+
+import os
+
+import pytest
+
+from app import sheets, warm_start
+from app.aggregate import category_totals
+from app.replica import TRANSACTION_INDEX
+
+
+@pytest.fixture
+def seeded(fake_sheets):
+    phones = fake_sheets.seed_transactions(500, 5)
+    yield fake_sheets, phones
+    TRANSACTION_INDEX.invalidate()
+
+
+def _restart():
+    """Simulasikan proses baru: semua cache in-memory kosong."""
+    sheets.clear_tab_cache()
+
+
+def test_snapshot_restores_cache_columns_and_replica_without_full_read(seeded, tmp_path):
+    service, phones = seeded
+    path = str(tmp_path / "snapshot.json")
+    before = category_totals(sheets.transaction_columns(), 0, phone=phones[0])
+    TRANSACTION_INDEX.sync()
+    assert warm_start.save_snapshot(path)
+
+    _restart()
+    service.tabs["Database_Input"].append(
+        [sheets.datetime.utcnow().isoformat(), phones[0], "expense", "makan", "1000", "baru", "new-1"]
+    )
+    service.calls.clear()
+    warm_start.warm_start(path)
+
+    # _meta + tail Database_Input saja, tanpa download penuh / batchGet
+    assert "batchGet" not in service.calls
+    assert service.calls.get("get", 0) <= 3
+    columns = sheets.transaction_columns()
+    assert sheets._COLUMNS_MEMO["columns"] is columns
+    after = category_totals(columns, 0, phone=phones[0])
+    assert after.get("makan", 0) == before.get("makan", 0) + 1000
+    assert TRANSACTION_INDEX.search(phones[0], ["baru"])
+
+
+def test_snapshot_is_json_and_rejects_garbage(seeded, tmp_path):
+    path = tmp_path / "snapshot.json"
+    sheets.transaction_columns()
+    assert warm_start.save_snapshot(str(path))
+    assert path.read_text(encoding="utf-8").startswith("{")
+
+    path.write_bytes(b"\x80\x04\x95garbage")
+    _restart()
+    assert warm_start.load_snapshot(str(path)) is False
+    assert sheets.cached_values(sheets.TRANSACTIONS_RANGE) is None
+
+
+@pytest.mark.skipif("WARM_START_PATH" in os.environ, reason="WARM_START_PATH di-set dari environment")
+def test_disabled_by_default():
+    assert warm_start.WARM_START_PATH == ""
+    assert warm_start.save_snapshot() is False